@@ -1,44 +1,784 @@
 # app/core/bridge.py
 import asyncio
+import hashlib
 import json
+import os
+import time
 import uuid
-from typing import Any, Dict, Optional
+from collections import Counter
+from contextlib import aclosing, contextmanager
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from fastapi import WebSocket
 
+from app.core import metrics, tracing
+from app.core.circuit import WorkerHealth
+from app.core.codec import JSON_CODEC, Codec, Frame, negotiate_codec
+from app.core.config import settings
+from app.core.dispatch import DispatchBackend, create_backend
+from app.core.hedging import HedgePolicy
+from app.core.observability import get_logger
+from app.core.prompts import (
+    PROMPT_REFS,
+    PROMPTS_CAPABILITY,
+    PromptMiss,
+    prompt_registry,
+)
+
+# 워커가 능력치를 알리지 않으면 기존 단일 워커처럼 모든 작업을 처리한다고 간주
+DEFAULT_CAPABILITIES: frozenset[str] = frozenset({"emotion", "gpt"})
+# 연결별로 기억하는 등록 프롬프트 해시 수 상한 (넘으면 비우고 다시 등록)
+MAX_REGISTERED_PROMPTS = 4096
+# 이 능력을 알린 워커에만 애플리케이션 수준 ping을 보낸다 ({"type": "pong", "id"}로 응답)
+HEARTBEAT_CAPABILITY = "heartbeat"
+# 호출 태스크 취소 메시지 → 워커에 보내는 cancel 사유
+#   timeout: 합치기(singleflight) 호출자가 모두 기한을 넘김 / hedge: 헤지 경쟁에서 진 시도
+TIMEOUT_CANCEL = "timeout"
+HEDGE_CANCEL = "hedge"
+
+log = get_logger(__name__)
+
+
+class BridgeOverloaded(Exception):
+    """
+    입장 제어 한도를 넘어 요청을 받지 않을 때 발생. 라우터에서 503 + Retry-After로 변환.
+    """
+
+    def __init__(self, task_type: str, retry_after: int):
+        super().__init__(f"AI Worker queue is full ({task_type})")
+        self.task_type = task_type
+        self.retry_after = retry_after
+
+
+class WorkerUnavailable(ConnectionError):
+    """
+    작업을 처리할 수 있는 워커는 있지만 모두 서킷이 열려 있을 때 발생 (타임아웃까지 기다리지 않음).
+    서비스는 이 예외를 폴백으로 처리한다.
+    """
+
+    def __init__(self, task_type: str):
+        super().__init__(f"AI Worker circuit open ({task_type})")
+        self.task_type = task_type
+
+
+def _new_health(worker_id: str, *, requires_probe: bool = False) -> WorkerHealth:
+    health = WorkerHealth(
+        alpha=settings.BRIDGE_EWMA_ALPHA,
+        failure_threshold=settings.BRIDGE_CB_FAILURE_THRESHOLD,
+        error_threshold=settings.BRIDGE_CB_ERROR_RATE,
+        min_samples=settings.BRIDGE_CB_MIN_SAMPLES,
+        open_s=settings.BRIDGE_CB_OPEN_S,
+        max_open_s=settings.BRIDGE_CB_MAX_OPEN_S,
+        requires_probe=requires_probe,
+    )
+    health.on_trip = metrics.BRIDGE_CIRCUIT_TRIPS.labels(worker_id).inc
+    return health
+
+
+@dataclass
+class Reply:
+    """
+    워커 응답 (브리지 내부용). 공개 메서드는 result만 돌려주고 timings는 요청 트레이스에 기록.
+    - timings: 워커가 응답에 실어 보낸 단계 시간 {"compute_ms", "queue_ms"(선택)}
+    """
+
+    result: Any
+    timings: Dict[str, Any] = field(default_factory=dict)
+
+
+def _worker_timings(data: Dict[str, Any]) -> Dict[str, Any]:
+    timings = data.get("timings")
+    return timings if isinstance(timings, dict) else {}
+
+
+def _cancel_reason(e: asyncio.CancelledError) -> str:
+    return e.args[0] if e.args and isinstance(e.args[0], str) else "cancelled"
+
+
+@dataclass(eq=False)
+class WorkerConnection:
+    """
+    연결된 AI 워커 한 대의 상태.
+    - capabilities: 처리 가능한 작업 타입 태그 (예: {"emotion", "gpt"})
+    - in_flight: 현재 이 워커에 보내고 응답을 기다리는 요청 수
+    """
+
+    websocket: WebSocket
+    worker_id: str
+    capabilities: Set[str] = field(default_factory=lambda: set(DEFAULT_CAPABILITIES))
+    in_flight: int = 0
+    # 연결 시 협상된 프레임 직렬화 방식 (기본: JSON 텍스트)
+    codec: Codec = JSON_CODEC
+    # 이 워커에 할당된 request_id 목록 (연결 해제 시 즉시 실패 처리용)
+    pending: Set[str] = field(default_factory=set)
+    # 이 연결에 등록을 마친 프롬프트 해시 (재연결 시 새 객체이므로 자동으로 다시 등록됨)
+    prompts: Set[str] = field(default_factory=set)
+    connected: bool = True
+    is_remote = False
+    # EWMA 지연/오류율 + 서킷 브레이커 (connect에서 하트비트 지원 여부에 맞춰 생성)
+    health: WorkerHealth = field(default_factory=WorkerHealth)
+    # 하트비트: 응답을 기다리는 ping (id, 보낸 시각) / 연속 누락 수 / 마지막 왕복 시간
+    ping: Optional[Tuple[int, float]] = None
+    missed_pongs: int = 0
+    heartbeat_rtt_ms: Optional[float] = None
+
+    def supports(self, task_type: str) -> bool:
+        return task_type in self.capabilities
+
+    @property
+    def load(self) -> int:
+        return self.in_flight
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        payload = message.get("payload")
+        if isinstance(payload, dict) and PROMPT_REFS in payload:
+            if self.supports(PROMPTS_CAPABILITY):
+                await self._register_prompts(payload)
+            else:
+                # 레지스트리를 모르는 워커에는 전체 프롬프트로 펼쳐서 전송
+                message = {**message, "payload": prompt_registry.expand(payload)}
+        await self._write(message)
+
+    async def _register_prompts(self, payload: Dict[str, Any]) -> None:
+        missing = {
+            h: prompt_registry.get(h)
+            for h in payload[PROMPT_REFS].values()
+            if h not in self.prompts
+        }
+        if not missing:
+            return
+        await self._write({"type": "register_prompts", "prompts": missing})
+        # 전송이 끝난 뒤에 표시해야 동시 요청이 등록보다 먼저 나가지 않음 (중복 등록은 무해)
+        if len(self.prompts) + len(missing) > MAX_REGISTERED_PROMPTS:
+            self.prompts.clear()
+        self.prompts.update(missing)
+
+    def forget_prompts(self, hashes: Iterable[str]) -> None:
+        self.prompts.difference_update(hashes)
+
+    async def _write(self, message: Dict[str, Any]) -> None:
+        frame = self.codec.encode(message)
+        if isinstance(frame, bytes):
+            await self.websocket.send_bytes(frame)
+        else:
+            await self.websocket.send_text(frame)
+
+
+@dataclass(eq=False)
+class RemoteWorker:
+    """
+    다른 HTTP 프로세스에 붙어 있는 AI 워커 (디스패치 백엔드로 공지된 것).
+    메시지는 소유 프로세스로 전달되고, 그 프로세스가 실제 워커와 주고받은 응답을 되돌려준다.
+    - reported_in_flight: 소유 프로세스가 마지막으로 공지한 부하
+    - in_flight: 이 프로세스가 보내고 기다리는 요청 수
+    """
+
+    backend: DispatchBackend
+    reply_to: str
+    process_id: str
+    worker_id: str
+    capabilities: Set[str] = field(default_factory=set)
+    reported_in_flight: int = 0
+    in_flight: int = 0
+    pending: Set[str] = field(default_factory=set)
+    connected: bool = True
+    is_remote = True
+    # 이 프로세스에서 본 상태 (하트비트는 소유 프로세스가 담당, 여기서는 요청 결과만)
+    health: WorkerHealth = field(default_factory=WorkerHealth)
+
+    def supports(self, task_type: str) -> bool:
+        return task_type in self.capabilities
+
+    @property
+    def load(self) -> int:
+        return max(self.reported_in_flight, self.in_flight)
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        if message.get("type") == "cancel":
+            envelope = {"kind": "cancel", "reply_to": self.reply_to, **message}
+        else:
+            envelope = {
+                "kind": "request",
+                "reply_to": self.reply_to,
+                "worker_id": self.worker_id,
+                "message": message,
+                # 소유 프로세스의 레지스트리에 없을 수 있으므로 참조하는 프롬프트 텍스트를 동봉
+                "prompts": prompt_registry.texts_for(message.get("payload") or {}),
+            }
+        await self.backend.publish(self.process_id, envelope)
+
+
+Worker = Union[WorkerConnection, RemoteWorker]
+
+
+class MicroBatcher:
+    """
+    짧은 시간창(max_wait_ms) 안에 들어온 같은 종류의 요청을 모아 한 번의 배치 메시지로 전송하고,
+    결과를 개별 요청의 Future로 다시 나눠주는 배칭 단계.
+    - max_size개가 모이면 즉시 전송, 아니면 첫 요청 기준 max_wait_ms 후 전송
+    - 워커 응답: {"results": [item_result, ...]} (요청 순서 유지, 항목별 {"error": "..."} 허용)
+    """
+
+    def __init__(
+        self,
+        bridge: "AIConnectionManager",
+        *,
+        task_type: str,
+        batch_type: str,
+        max_size: int,
+        max_wait_ms: float,
+    ) -> None:
+        self.bridge = bridge
+        self.task_type = task_type
+        self.batch_type = batch_type
+        self.max_size = max(1, int(max_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue: List[Tuple[dict, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 1
+
+    async def submit(self, payload: dict, timeout: float) -> Reply:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((payload, future, timeout))
+
+        if len(self._queue) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_s, self._flush)
+
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self.bridge._timed_out(self.task_type)
+            raise TimeoutError(f"AI Worker response timed out ({self.task_type})")
+        except asyncio.CancelledError as e:
+            if _cancel_reason(e) == TIMEOUT_CANCEL:
+                self.bridge._timed_out(self.task_type)
+            raise
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # 이미 타임아웃/취소된 대기자는 배치에서 제외
+        items = [item for item in self._queue if not item[1].done()]
+        self._queue = []
+        if items:
+            asyncio.create_task(self._dispatch(items))
+
+    async def _dispatch(self, items: List[Tuple[dict, asyncio.Future, float]]) -> None:
+        payload = {"items": [p for p, _, _ in items]}
+        timeout = max(t for _, _, t in items)
+        try:
+            # 개별 항목은 submit 시점에 이미 입장 제어를 통과했으므로 내부 경로로 전송
+            reply = await self.bridge._request(self.batch_type, payload, timeout=timeout)
+            result = reply.result
+            results = result.get("results") if isinstance(result, dict) else result
+            if not isinstance(results, list) or len(results) != len(items):
+                raise ValueError(f"Malformed {self.batch_type} response from AI Worker")
+        except Exception as e:
+            for _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), item_result in zip(items, results):
+            if future.done():
+                continue
+            if isinstance(item_result, dict) and item_result.get("error"):
+                future.set_exception(Exception(item_result["error"]))
+            else:
+                # 배치 연산 시간은 배치에 속한 모든 항목이 함께 기다린 시간
+                future.set_result(Reply(item_result, reply.timings))
+
+
+@dataclass(eq=False)
+class Flight:
+    """같은 요청을 기다리는 호출자들이 함께 공유하는 진행 중 호출 (singleflight)."""
+
+    task: asyncio.Future
+    waiters: int = 0
+
 
 class AIConnectionManager:
     """
-    로컬 AI 워커와 WebSocket 연결을 유지하고,
-    HTTP 요청이 들어오면 워커에게 작업을 토스한 뒤 결과를 기다리는 브리지.
+    로컬 AI 워커들과 WebSocket 연결을 유지하고,
+    HTTP 요청이 들어오면 가장 한가한 워커에게 작업을 토스한 뒤 결과를 기다리는 브리지.
     """
 
-    def __init__(self):
-        self.active_connection: Optional[WebSocket] = None
+    def __init__(
+        self,
+        *,
+        max_in_flight: int = settings.BRIDGE_MAX_IN_FLIGHT,
+        task_limits: Optional[Dict[str, int]] = None,
+        retry_after_s: int = settings.BRIDGE_RETRY_AFTER_S,
+        backend: Optional[DispatchBackend] = None,
+    ):
+        # worker_id : WorkerConnection (동시에 여러 워커 연결 가능)
+        self.workers: Dict[str, WorkerConnection] = {}
+        # 멀티 프로세스(gunicorn) 배포: 다른 프로세스의 워커도 백엔드를 통해 사용
+        self.process_id = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.backend = backend
+        # (process_id, worker_id) : RemoteWorker
+        self.remote_workers: Dict[Tuple[str, str], RemoteWorker] = {}
+        # (요청 프로세스, request_id) : 다른 프로세스 대신 처리 중인 태스크
+        self._remote_jobs: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._announce_task: Optional[asyncio.Task] = None
+        self._metrics_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._ping_seq = 0
+        # 하트비트 누락으로 연결을 끊은 워커 수
+        self.heartbeat_drops = 0
         # 요청 ID : Future 객체 (응답을 기다리는 대기표)
         self.pending_requests: Dict[str, asyncio.Future] = {}
+        # 요청 ID : Queue (스트리밍 요청은 부분 응답 여러 개를 순서대로 받음)
+        self.pending_streams: Dict[str, asyncio.Queue] = {}
+        # 입장 제어: 전체/작업 타입별로 현재 받아들인 요청 수와 상한
+        self.max_in_flight = max_in_flight
+        self.task_limits: Dict[str, int] = dict(
+            settings.BRIDGE_TASK_LIMITS if task_limits is None else task_limits
+        )
+        self.retry_after_s = retry_after_s
+        self.admitted: Counter[str] = Counter()
+        self.rejected: Counter[str] = Counter()
+        # 워커 응답 타임아웃 건수
+        self.timeouts: Counter[str] = Counter()
+        # 중단(cancel) 통계: 사유별 취소 건수 / 워커 확인(ack) 건수
+        self.cancelled_jobs: Counter[str] = Counter()
+        self.cancel_acks: Counter[str] = Counter()
+        # singleflight: (작업 타입, payload 해시) : 진행 중인 공유 호출 / 합쳐진 요청 수
+        self.coalesce_tasks: frozenset[str] = frozenset(settings.BRIDGE_COALESCE_TASKS)
+        self.flights: Dict[Tuple[str, str], Flight] = {}
+        self.coalesced: Counter[str] = Counter()
+        # fire-and-forget 전송 태스크가 GC되지 않도록 참조 보관
+        self._background_tasks: Set[asyncio.Task] = set()
+        # 작업 타입 : 배칭 단계 (워커가 배치 타입을 지원할 때만 사용)
+        self.batchers: Dict[str, MicroBatcher] = {
+            "emotion": MicroBatcher(
+                self,
+                task_type="emotion",
+                batch_type="emotion_batch",
+                max_size=settings.EMOTION_BATCH_MAX_SIZE,
+                max_wait_ms=settings.EMOTION_BATCH_MAX_WAIT_MS,
+            ),
+        }
+        # 작업 타입 : 헤징 정책 (BRIDGE_HEDGE_TASKS에 있는 타입만)
+        self.hedging: Dict[str, HedgePolicy] = {
+            task_type: HedgePolicy(
+                delay_ms=settings.BRIDGE_HEDGE_DELAY_MS,
+                percentile=settings.BRIDGE_HEDGE_PERCENTILE,
+                min_delay_ms=settings.BRIDGE_HEDGE_MIN_DELAY_MS,
+                min_samples=settings.BRIDGE_HEDGE_MIN_SAMPLES,
+                window=settings.BRIDGE_HEDGE_WINDOW,
+                budget=settings.BRIDGE_HEDGE_BUDGET,
+                recompute_every=settings.BRIDGE_HEDGE_RECOMPUTE_EVERY,
+            )
+            for task_type in settings.BRIDGE_HEDGE_TASKS
+        }
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connection = websocket
-        print("Local AI Worker connected!")
+    async def connect(
+        self,
+        websocket: WebSocket,
+        *,
+        worker_id: Optional[str] = None,
+        capabilities: Optional[Iterable[str]] = None,
+    ) -> WorkerConnection:
+        # 워커가 제시한 서브프로토콜 중 하나를 골라 핸드셰이크 응답으로 알려준다
+        offered = websocket.scope.get("subprotocols") or []
+        codec = negotiate_codec(offered)
+        await websocket.accept(subprotocol=codec.name if codec.name in offered else None)
+        worker_id = worker_id or f"worker_{uuid.uuid4().hex[:8]}"
+        old = self.workers.get(worker_id)
+        if old is not None:
+            # 같은 ID로 재접속하면 이전 연결은 끊긴 것으로 보고 교체 (남은 소켓도 닫음)
+            self._drop_worker(old)
+            self._spawn(self._close_quietly(old.websocket))
+        caps = {c.strip() for c in capabilities or () if c.strip()} or set(DEFAULT_CAPABILITIES)
+        worker = WorkerConnection(
+            websocket=websocket,
+            worker_id=worker_id,
+            capabilities=caps,
+            codec=codec,
+            health=_new_health(worker_id, requires_probe=HEARTBEAT_CAPABILITY in caps),
+        )
+        self.workers[worker_id] = worker
+        log.info(
+            "AI worker connected (%s)",
+            worker_id,
+            extra={"worker_id": worker_id, "capabilities": sorted(caps), "protocol": codec.name},
+        )
+        self._spawn(self._announce())
+        return worker
 
     def disconnect(self, websocket: WebSocket):
-        if self.active_connection == websocket:
-            self.active_connection = None
-            print("Local AI Worker disconnected!")
+        for worker in list(self.workers.values()):
+            if worker.websocket is websocket:
+                self._drop_worker(worker)
+                log.info(
+                    "AI worker disconnected (%s)",
+                    worker.worker_id,
+                    extra={"worker_id": worker.worker_id},
+                )
+                self._spawn(self._announce())
+
+    def _drop_worker(self, worker: Worker) -> None:
+        """
+        워커를 풀에서 제거하고,
+        해당 워커에 걸려 있던 요청은 타임아웃까지 기다리지 않고 즉시 실패시킨다.
+        """
+        worker.connected = False
+        if isinstance(worker, RemoteWorker):
+            self.remote_workers.pop((worker.process_id, worker.worker_id), None)
+        elif self.workers.get(worker.worker_id) is worker:
+            del self.workers[worker.worker_id]
+        for req_id in list(worker.pending):
+            future = self.pending_requests.pop(req_id, None)
+            if future is not None and not future.done():
+                future.set_exception(
+                    ConnectionError(f"AI Worker disconnected ({worker.worker_id})")
+                )
+            queue = self.pending_streams.pop(req_id, None)
+            if queue is not None:
+                queue.put_nowait(ConnectionError(f"AI Worker disconnected ({worker.worker_id})"))
+        worker.pending.clear()
+        # 같은 ID의 워커가 이 프로세스에 남아 있지 않으면 worker_id 라벨 지표도 정리
+        others = [*self.workers.values(), *self.remote_workers.values()]
+        if not any(w.worker_id == worker.worker_id for w in others):
+            metrics.forget_worker(worker.worker_id)
+
+    async def _send(self, worker: Worker, message: Dict[str, Any]) -> None:
+        await worker.send(message)
+
+    def _spawn(self, coro: Any) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    @staticmethod
+    def _forget_prompts(worker: Worker, hashes: Iterable[str]) -> None:
+        if isinstance(worker, WorkerConnection):
+            worker.forget_prompts(hashes)
+
+    def _cancel_on_worker(self, worker: Worker, req_id: str, reason: str) -> None:
+        """
+        응답을 더 이상 기다리지 않는 요청에 대해 워커에 cancel 제어 메시지를 보내 작업을 중단시킨다.
+        호출 측이 이미 취소되는 중일 수 있으므로 전송은 별도 태스크로 수행.
+        """
+        if req_id not in worker.pending or not worker.connected:
+            # 이미 최종 응답을 받았거나 워커 연결이 끊긴 경우
+            return
+        if req_id not in self.pending_requests and req_id not in self.pending_streams:
+            return
+        self.cancelled_jobs[reason] += 1
+        self._spawn(self._send_cancel(worker, req_id, reason))
+
+    async def _send_cancel(self, worker: Worker, req_id: str, reason: str) -> None:
+        try:
+            await self._send(worker, {"type": "cancel", "request_id": req_id, "reason": reason})
+        except Exception as e:
+            log.warning(
+                "sending cancel to AI worker %s failed: %r",
+                worker.worker_id,
+                e,
+                extra={"worker_id": worker.worker_id},
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        self._sync_remote_workers()
+        return {
+            "workers": {
+                w.worker_id: {
+                    "in_flight": w.in_flight,
+                    "capabilities": sorted(w.capabilities),
+                    **w.health.snapshot(),
+                    "heartbeat_rtt_ms": w.heartbeat_rtt_ms,
+                    "missed_pongs": w.missed_pongs,
+                }
+                for w in self.workers.values()
+            },
+            "remote_workers": {
+                f"{w.process_id}/{w.worker_id}": {
+                    "in_flight": w.in_flight,
+                    "reported_in_flight": w.reported_in_flight,
+                    "capabilities": sorted(w.capabilities),
+                    **w.health.snapshot(),
+                }
+                for w in self.remote_workers.values()
+            },
+            "heartbeat_drops": self.heartbeat_drops,
+            "pending_requests": len(self.pending_requests),
+            "queue_depth": sum(self.admitted.values()),
+            "queue_capacity": self.max_in_flight,
+            "queue_by_type": dict(+self.admitted),
+            "rejected": dict(self.rejected),
+            "timeouts": dict(self.timeouts),
+            "pending_streams": len(self.pending_streams),
+            "cancelled_jobs": dict(self.cancelled_jobs),
+            "cancel_acks": dict(self.cancel_acks),
+            "flights": len(self.flights),
+            "coalesced": dict(self.coalesced),
+            "hedging": {task: policy.stats() for task, policy in self.hedging.items()},
+        }
+
+    def ensure_capacity(self, *task_types: str) -> None:
+        """
+        작업을 시작하기 전에 여유가 있는지 미리 확인 (없으면 BridgeOverloaded).
+        여러 단계를 거치는 요청이 앞 단계만 처리되고 버려지는 것을 막기 위한 사전 점검.
+        """
+        for task_type in task_types:
+            if not self._has_room(task_type):
+                self.rejected[task_type] += 1
+                metrics.BRIDGE_REJECTIONS.labels(task_type).inc()
+                raise BridgeOverloaded(task_type, self.retry_after_s)
+
+    def _has_room(self, task_type: str) -> bool:
+        if sum(self.admitted.values()) >= self.max_in_flight:
+            return False
+        limit = self.task_limits.get(task_type)
+        return limit is None or self.admitted[task_type] < limit
+
+    @contextmanager
+    def _admission(self, task_type: str) -> Iterator[None]:
+        self.ensure_capacity(task_type)
+        self.admitted[task_type] += 1
+        try:
+            yield
+        finally:
+            self.admitted[task_type] -= 1
+
+    def _all_workers(self) -> List[Worker]:
+        self._sync_remote_workers()
+        return [*self.workers.values(), *self.remote_workers.values()]
+
+    def has_worker(self, task_type: Optional[str] = None) -> bool:
+        return any(task_type is None or w.supports(task_type) for w in self._all_workers())
+
+    def is_available(self, task_type: str) -> bool:
+        """해당 작업을 지금 보낼 수 있는 워커(서킷이 닫혔거나 시험 요청 가능)가 있는지."""
+        return any(w.supports(task_type) and w.health.allows() for w in self._all_workers())
+
+    def _pick_worker(self, task_type: str, *, exclude: Optional[Worker] = None) -> Worker:
+        """
+        해당 작업을 처리할 수 있는 워커(다른 프로세스 소속 포함) 중 부하가 가장 적은 워커를 고른다.
+        부하가 같으면 중계가 필요 없는 로컬 워커, 그다음 EWMA 지연이 짧은 워커를 우선.
+        서킷이 열린 워커는 제외하고, 모두 열려 있으면 WorkerUnavailable로 즉시 실패.
+        exclude: 후보에서 뺄 워커 (헤지 요청은 첫 시도와 다른 워커로)
+        """
+        workers = [w for w in self._all_workers() if w is not exclude]
+        eligible = [w for w in workers if w.supports(task_type)]
+        if not eligible:
+            if not workers:
+                raise ConnectionError("No AI Worker connected via WebSocket.")
+            raise ConnectionError(f"No AI Worker supports task type '{task_type}'.")
+        routable = [w for w in eligible if w.health.allows()]
+        if not routable:
+            raise WorkerUnavailable(task_type)
+        return min(routable, key=lambda w: (w.load, w.is_remote, w.health.latency_ms or 0.0))
 
     async def send_request_and_wait(
         self, task_type: str, payload: dict, timeout: float = 10.0
     ) -> Any:
+        """
+        입장 제어를 통과한 요청만 워커로 전송하고 응답을 기다린다.
+        같은 요청이 이미 진행 중이면 새로 보내지 않고 그 결과를 함께 기다린다.
+        워커가 연산 시간을 보고하면 {task_type}_queue / {task_type}_compute 단계로 기록.
+        """
+
+        async def call() -> Reply:
+            with self._admission(task_type):
+                if task_type in self.hedging:
+                    return await self._hedged_request(task_type, payload, timeout)
+                return await self._request(task_type, payload, timeout=timeout)
+
+        start = time.perf_counter()
+        reply = await self._singleflight(task_type, payload, timeout, call)
+        tracing.add_worker_timings(task_type, (time.perf_counter() - start) * 1000, reply.timings)
+        return reply.result
+
+    async def _hedged_request(self, task_type: str, payload: dict, timeout: float) -> Reply:
+        """
+        헤지 지연 안에 응답이 없으면 같은 작업을 다른 워커에 한 번 더 보내고 먼저 온 응답을 쓴다.
+        - 진 시도는 취소 (워커에 reason="hedge"로 cancel 전파)
+        - 한쪽이 실패하면 다른 쪽을 계속 기다리고, 둘 다 실패하면 먼저 난 오류를 올린다
+        - 헤지 지연 전에 난 오류는 그대로 올림 (재시도가 아님)
+        - 다른 워커가 없거나 예산이 없거나 입장 여유가 없으면 헤지하지 않음
+        - 헤지 시도도 입장 제어에 한 건으로 세고, 승패가 정해지면(또는 둘 다 실패하면) 반납
+        - 헤지 지연 통계에는 첫 시도의 지연만 기록 (헤지가 이기면 취소 시점까지의 경과 시간)
+        """
+        policy = self.hedging[task_type]
+        policy.on_request()
+        delay = policy.delay_s()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        async def attempt(worker: Worker) -> Tuple[Reply, float]:
+            started = loop.time()
+            reply = await self._request(
+                task_type, payload, max(0.0, deadline - loop.time()), worker=worker
+            )
+            return reply, (loop.time() - started) * 1000
+
+        primary_worker = self._pick_worker(task_type)
+        primary_started = loop.time()
+        primary = asyncio.ensure_future(attempt(primary_worker))
+        attempts = [primary]
+        cancel_reason = HEDGE_CANCEL
+        hedge_admitted = False
+        try:
+            if delay is not None and delay < timeout:
+                done, _ = await asyncio.wait(attempts, timeout=delay)
+                if not done:
+                    hedge_admitted = self._start_hedge(
+                        task_type, policy, primary_worker, attempt, attempts
+                    )
+
+            error: Optional[BaseException] = None
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        continue
+                    reply, latency_ms = task.result()
+                    won = task is not primary
+                    if not won:
+                        policy.observe(latency_ms)
+                    elif not primary.done():
+                        policy.observe((loop.time() - primary_started) * 1000)
+                    if len(attempts) > 1:
+                        policy.hedge_wins += int(won)
+                        metrics.BRIDGE_HEDGES.labels(task_type, "won" if won else "lost").inc()
+                    return reply
+            if len(attempts) > 1:
+                metrics.BRIDGE_HEDGES.labels(task_type, "failed").inc()
+            assert error is not None
+            raise error
+        except asyncio.CancelledError as e:
+            # 호출 측 취소/합치기 타임아웃은 같은 사유로 모든 시도에 전파
+            cancel_reason = _cancel_reason(e)
+            raise
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel(cancel_reason)
+            if hedge_admitted:
+                self.admitted[task_type] -= 1
+
+    def _start_hedge(
+        self,
+        task_type: str,
+        policy: HedgePolicy,
+        primary_worker: Worker,
+        attempt: Callable[[Worker], Awaitable[Tuple[Reply, float]]],
+        attempts: List["asyncio.Future[Tuple[Reply, float]]"],
+    ) -> bool:
+        """헤지 시도를 시작했으면 True (입장 제어에 한 건 추가됨, 호출 측이 반납)."""
+        if not self._has_room(task_type):
+            metrics.BRIDGE_HEDGES.labels(task_type, "no_capacity").inc()
+            return False
+        try:
+            backup_worker = self._pick_worker(task_type, exclude=primary_worker)
+        except ConnectionError:
+            return False
+        if not policy.try_spend():
+            metrics.BRIDGE_HEDGES.labels(task_type, "no_budget").inc()
+            return False
+        self.admitted[task_type] += 1
+        attempts.append(asyncio.ensure_future(attempt(backup_worker)))
+        return True
+
+    def _flight_key(self, task_type: str, payload: dict) -> Optional[Tuple[str, str]]:
+        if task_type not in self.coalesce_tasks:
+            return None
+        canonical = json.dumps(
+            payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str
+        )
+        digest = hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+        return task_type, digest
+
+    async def _singleflight(
+        self,
+        task_type: str,
+        payload: dict,
+        timeout: float,
+        call: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        (작업 타입, 정규화한 payload 해시)가 같은 동시 요청은 하나의 공유 호출을 함께 기다린다.
+        - 공유 호출의 기한/입장 제어는 처음 요청한 호출자 기준
+        - 각 호출자는 자기 timeout까지만 기다리며, 타임아웃/취소는 다른 호출자에 영향 없음
+        - 기다리는 호출자가 모두 떠나면 공유 호출을 취소 (워커에 cancel 전파)
+        """
+        key = self._flight_key(task_type, payload)
+        if key is None:
+            return await call()
+
+        flight = self.flights.get(key)
+        if flight is None or flight.task.done():
+            # 과부하는 공유 호출을 만들기 전에 바로 거절
+            self.ensure_capacity(task_type)
+            flight = Flight(task=asyncio.ensure_future(call()))
+            self.flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._end_flight(key, flight))
+        else:
+            self.coalesced[task_type] += 1
+
+        flight.waiters += 1
+        timed_out = False
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), timeout=timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            raise TimeoutError(f"AI Worker response timed out ({task_type})")
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # 기한 초과로 인한 취소는 공유 호출 안에서 타임아웃으로 집계되도록 구분
+                flight.task.cancel(TIMEOUT_CANCEL if timed_out else None)
+
+    def _timed_out(self, task_type: str) -> None:
+        self.timeouts[task_type] += 1
+        metrics.BRIDGE_TIMEOUTS.labels(task_type).inc()
+
+    def _end_flight(self, key: Tuple[str, str], flight: Flight) -> None:
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+
+    async def _request(
+        self,
+        task_type: str,
+        payload: dict,
+        timeout: float = 10.0,
+        *,
+        worker: Optional[Worker] = None,
+    ) -> Reply:
         """
         1. 고유 ID 생성
-        2. 워커에게 JSON 전송
+        2. 가장 한가한 워커를 골라 JSON 전송
         3. Future 객체를 생성해 대기
         4. 워커로부터 응답이 오면 Future에 값 설정 -> 반환
         """
-        if not self.active_connection:
-            raise ConnectionError("No AI Worker connected via WebSocket.")
+        worker = worker or self._pick_worker(task_type)
 
         req_id = str(uuid.uuid4())
         loop = asyncio.get_running_loop()
@@ -46,6 +786,8 @@ class AIConnectionManager:
 
         # 대기열 등록
         self.pending_requests[req_id] = future
+        worker.pending.add(req_id)
+        worker.in_flight += 1
 
         message = {
             "request_id": req_id,
@@ -53,42 +795,389 @@ class AIConnectionManager:
             "payload": payload,
         }
 
+        deadline = loop.time() + timeout
+        started = loop.time()
+        # 서킷 브레이커에 넘길 결과 (None: 호출 측 취소 등 워커 상태와 무관)
+        outcome: Optional[bool] = None
+        worker.health.begin()
+
         try:
             # 워커에게 전송
-            await self.active_connection.send_text(json.dumps(message))
+            await self._send(worker, message)
 
             # 응답 대기 (Timeout 적용)
-            result = await asyncio.wait_for(future, timeout=timeout)
+            try:
+                result = await asyncio.wait_for(future, timeout=timeout)
+            except PromptMiss as e:
+                # 워커가 등록 프롬프트를 잃은 경우(재시작 등): 다시 등록해 한 번만 재전송
+                self._forget_prompts(worker, e.missing)
+                future = loop.create_future()
+                self.pending_requests[req_id] = future
+                await self._send(worker, message)
+                result = await asyncio.wait_for(future, timeout=max(0.0, deadline - loop.time()))
+            outcome = True
             return result
         except asyncio.TimeoutError:
-            del self.pending_requests[req_id]
+            outcome = False
+            self._timed_out(task_type)
+            self._cancel_on_worker(worker, req_id, "timeout")
             raise TimeoutError(f"AI Worker response timed out ({task_type})")
-        except Exception as e:
-            if req_id in self.pending_requests:
-                del self.pending_requests[req_id]
-            raise e
+        except asyncio.CancelledError as e:
+            reason = _cancel_reason(e)
+            if reason == TIMEOUT_CANCEL:
+                # 합치기 호출자들이 모두 기한을 넘긴 경우: 워커 쪽 타임아웃과 같게 처리
+                outcome = False
+                self._timed_out(task_type)
+            # 그 밖에는 HTTP 클라이언트 연결 종료(cancelled), 헤지 경쟁에서 짐(hedge) 등
+            self._cancel_on_worker(worker, req_id, reason)
+            raise
+        except PromptMiss:
+            raise
+        except Exception:
+            # 워커 오류 응답 / 연결 끊김
+            outcome = False
+            raise
+        finally:
+            worker.health.record(outcome, (loop.time() - started) * 1000 if outcome else None)
+            self.pending_requests.pop(req_id, None)
+            worker.pending.discard(req_id)
+            worker.in_flight -= 1
 
-    async def process_message(self, raw_message: str):
+    async def stream_request(
+        self, task_type: str, payload: dict, timeout: float = 10.0
+    ) -> AsyncIterator[Tuple[Any, bool]]:
+        """
+        스트리밍 요청. 워커의 응답을 (result, done) 튜플로 순서대로 흘려준다.
+        - 부분 응답: {"request_id", "partial": true, "result": {"delta": "..."}} → (result, False)
+        - 최종 응답: {"request_id", "result": {...}} → (result, True) 후 종료
+        스트리밍을 모르는 워커는 최종 응답만 보내므로 그대로 호환된다.
+        timeout은 첫 전송부터 최종 응답까지의 전체 기한.
+        최종 응답에 워커 연산 시간이 있으면 send_request_and_wait와 같이 단계로 기록.
         """
-        워커로부터 온 응답 메시지를 처리.
+        start = time.perf_counter()
+        with self._admission(task_type):
+            # 소비자가 중간에 닫으면 내부 스트림도 즉시 닫혀 cancel이 전파되도록 aclosing 사용
+            async with aclosing(self._stream(task_type, payload, timeout=timeout)) as stream:
+                async for result, done, timings in stream:
+                    if done:
+                        elapsed_ms = (time.perf_counter() - start) * 1000
+                        tracing.add_worker_timings(task_type, elapsed_ms, timings)
+                    yield result, done
+
+    async def _stream(
+        self,
+        task_type: str,
+        payload: dict,
+        timeout: float = 10.0,
+        *,
+        worker: Optional[Worker] = None,
+    ) -> AsyncIterator[Tuple[Any, bool, Dict[str, Any]]]:
+        worker = worker or self._pick_worker(task_type)
+
+        req_id = str(uuid.uuid4())
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        self.pending_streams[req_id] = queue
+        worker.pending.add(req_id)
+        worker.in_flight += 1
+
+        message = {
+            "request_id": req_id,
+            "type": task_type,
+            "payload": payload,
+            "stream": True,
+        }
+        deadline = loop.time() + timeout
+        started = loop.time()
+        resent = False
+        outcome: Optional[bool] = None
+        worker.health.begin()
+
+        try:
+            await self._send(worker, message)
+
+            while True:
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=deadline - loop.time())
+                except asyncio.TimeoutError:
+                    outcome = False
+                    self._timed_out(task_type)
+                    self._cancel_on_worker(worker, req_id, "timeout")
+                    raise TimeoutError(f"AI Worker response timed out ({task_type})")
+                if isinstance(data, BaseException):
+                    outcome = False
+                    raise data
+                if data.get("missing_prompts") and not resent:
+                    # 첫 응답 전에만 발생하므로 다시 등록 후 재전송해도 중복 조각이 없음
+                    resent = True
+                    self._forget_prompts(worker, data["missing_prompts"])
+                    await self._send(worker, message)
+                    continue
+                if data.get("error"):
+                    outcome = False
+                    raise Exception(data["error"])
+                done = not data.get("partial")
+                if done:
+                    # 최종 응답 수신 완료: 이후 소비자가 닫아도 cancel 대상이 아님
+                    outcome = True
+                    worker.pending.discard(req_id)
+                yield data.get("result"), done, _worker_timings(data)
+                if done:
+                    return
+        except (asyncio.CancelledError, GeneratorExit):
+            # 클라이언트가 스트림을 끊었거나 소비자가 중간에 그만 읽은 경우
+            self._cancel_on_worker(worker, req_id, "cancelled")
+            raise
+        finally:
+            worker.health.record(outcome, (loop.time() - started) * 1000 if outcome else None)
+            self.pending_streams.pop(req_id, None)
+            worker.pending.discard(req_id)
+            worker.in_flight -= 1
+
+    async def send_batched_request(
+        self, task_type: str, payload: dict, timeout: float = 10.0
+    ) -> Any:
+        """
+        배칭 단계를 거쳐 전송. 배칭이 꺼져 있거나 배치를 처리할 워커가 없으면 단건 전송으로 폴백.
+        """
+        batcher = self.batchers.get(task_type)
+        if batcher is None or not batcher.enabled or not self.is_available(batcher.batch_type):
+            return await self.send_request_and_wait(task_type, payload, timeout=timeout)
+
+        async def call() -> Reply:
+            with self._admission(task_type):
+                return await batcher.submit(payload, timeout)
+
+        start = time.perf_counter()
+        reply = await self._singleflight(task_type, payload, timeout, call)
+        tracing.add_worker_timings(task_type, (time.perf_counter() - start) * 1000, reply.timings)
+        return reply.result
+
+    async def process_message(self, raw_message: Frame, worker: Optional[WorkerConnection] = None):
+        """
+        워커로부터 온 응답 메시지를 처리 (워커가 협상한 codec으로 해석).
         해당하는 request_id의 Future에 결과를 넣어줌으로써 대기 중인 요청을 깨움.
         """
         try:
-            data = json.loads(raw_message)
-            req_id = data.get("request_id")
-            result = data.get("result")
-            error = data.get("error")
-
-            if req_id in self.pending_requests:
-                future = self.pending_requests[req_id]
-                if error:
-                    future.set_exception(Exception(error))
-                else:
-                    future.set_result(result)
-                del self.pending_requests[req_id]
+            codec = worker.codec if worker is not None else JSON_CODEC
+            data = codec.decode(raw_message)
+            if data.get("type") == "pong":
+                if worker is not None:
+                    self._on_pong(worker, data)
+                return
+            self._deliver_response(data)
+        except Exception as e:
+            log.warning("AI worker message ignored: %r", e)
+
+    def _deliver_response(self, data: Dict[str, Any]) -> None:
+        req_id = data.get("request_id")
+        result = data.get("result")
+        error = data.get("error")
+
+        if data.get("type") == "cancel_ack":
+            # 워커가 cancel 제어 메시지를 처리했음을 알림 (aborted: 실제 중단 여부)
+            self.cancel_acks["aborted" if data.get("aborted", True) else "not_running"] += 1
+            return
+
+        queue = self.pending_streams.get(req_id)
+        if queue is not None:
+            queue.put_nowait(data)
+            return
+
+        future = self.pending_requests.pop(req_id, None)
+        if future is not None and not future.done():
+            if data.get("missing_prompts"):
+                future.set_exception(PromptMiss(data["missing_prompts"]))
+            elif error:
+                future.set_exception(Exception(error))
+            else:
+                future.set_result(Reply(result, _worker_timings(data)))
+
+    # ----------------------------
+    # 프로세스 간 디스패치 (gunicorn 멀티 워커)
+    # ----------------------------
+    async def start(self) -> None:
+        """
+        앱 시작 시 호출. 디스패치 백엔드에 접속하고 보유 워커를 주기적으로 공지한다.
+        (백엔드와 무관하게 브리지 상태 지표도 주기적으로 기록)
+        """
+        self._metrics_task = asyncio.create_task(self._metrics_loop())
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        if self.backend is None:
+            return
+        await self.backend.start(self.process_id, self._on_backend_message)
+        self._announce_task = asyncio.create_task(self._announce_loop())
+
+    async def stop(self) -> None:
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+        if self._announce_task is not None:
+            self._announce_task.cancel()
+        if self.backend is not None:
+            await self.backend.close()
+
+    async def _announce_loop(self) -> None:
+        while True:
+            await self._announce()
+            await asyncio.sleep(settings.BRIDGE_ANNOUNCE_INTERVAL_S)
+
+    async def _metrics_loop(self) -> None:
+        while True:
+            metrics.refresh_bridge_gauges(self)
+            await asyncio.sleep(settings.METRICS_REFRESH_INTERVAL_S)
+
+    # ----------------------------
+    # 하트비트 ("heartbeat" 능력을 알린 로컬 워커만)
+    # ----------------------------
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.BRIDGE_HEARTBEAT_INTERVAL_S)
+            for worker in list(self.workers.values()):
+                if worker.supports(HEARTBEAT_CAPABILITY):
+                    await self._heartbeat(worker)
+
+    async def _heartbeat(self, worker: WorkerConnection) -> None:
+        """
+        이전 ping에 pong이 없으면 누락으로 센다.
+        - 한 번이라도 누락: 서킷을 열어 새 요청을 보내지 않음 (멈춘 워커에 타임아웃까지 묶이지 않게)
+        - BRIDGE_HEARTBEAT_MAX_MISSES회 연속 누락: 연결을 끊어 대기 요청을 즉시 실패
+        """
+        if worker.ping is not None:
+            worker.missed_pongs += 1
+            worker.health.trip()
+            if worker.missed_pongs >= settings.BRIDGE_HEARTBEAT_MAX_MISSES:
+                self.heartbeat_drops += 1
+                log.warning(
+                    "AI worker %s missed heartbeats, dropping",
+                    worker.worker_id,
+                    extra={"worker_id": worker.worker_id},
+                )
+                self._drop_worker(worker)
+                self._spawn(self._close_quietly(worker.websocket))
+                self._spawn(self._announce())
+                return
+        self._ping_seq += 1
+        worker.ping = (self._ping_seq, time.perf_counter())
+        try:
+            await worker.send({"type": "ping", "id": self._ping_seq})
+        except Exception as e:
+            log.warning(
+                "sending heartbeat to AI worker %s failed: %r",
+                worker.worker_id,
+                e,
+                extra={"worker_id": worker.worker_id},
+            )
+
+    def _on_pong(self, worker: WorkerConnection, data: Dict[str, Any]) -> None:
+        if worker.ping is None or data.get("id") != worker.ping[0]:
+            return  # 늦게 도착한 이전 ping의 응답
+        worker.heartbeat_rtt_ms = round((time.perf_counter() - worker.ping[1]) * 1000, 3)
+        worker.ping = None
+        worker.missed_pongs = 0
+        worker.health.probe()
+
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+
+    async def _announce(self) -> None:
+        if self.backend is None:
+            return
+        workers = {
+            w.worker_id: {"capabilities": sorted(w.capabilities), "in_flight": w.in_flight}
+            for w in self.workers.values()
+        }
+        try:
+            await self.backend.announce(workers)
+        except Exception as e:
+            log.warning("announcing AI workers failed: %r", e)
+
+    def _sync_remote_workers(self) -> None:
+        """
+        백엔드 디렉터리와 RemoteWorker 목록을 맞춘다. 사라진 워커의 대기 요청은 즉시 실패.
+        """
+        if self.backend is None:
+            return
+        seen: Set[Tuple[str, str]] = set()
+        for pid, workers in self.backend.directory.items():
+            for wid, info in workers.items():
+                key = (pid, wid)
+                seen.add(key)
+                remote = self.remote_workers.get(key)
+                if remote is None:
+                    remote = self.remote_workers[key] = RemoteWorker(
+                        backend=self.backend,
+                        reply_to=self.process_id,
+                        process_id=pid,
+                        worker_id=wid,
+                        health=_new_health(wid),
+                    )
+                remote.capabilities = set(info.get("capabilities") or ())
+                remote.reported_in_flight = int(info.get("in_flight") or 0)
+        for key in [k for k in self.remote_workers if k not in seen]:
+            self._drop_worker(self.remote_workers[key])
+
+    async def _on_backend_message(self, message: Dict[str, Any]) -> None:
+        kind = message.get("kind")
+        if kind == "response":
+            # 다른 프로세스가 대신 받아 준 워커 응답
+            self._deliver_response(message["data"])
+        elif kind == "request":
+            prompt_registry.update(message.get("prompts") or {})
+            key = (message["reply_to"], message["message"]["request_id"])
+            self._remote_jobs[key] = self._spawn(self._serve_remote(message))
+            self._remote_jobs[key].add_done_callback(lambda _t: self._remote_jobs.pop(key, None))
+        elif kind == "cancel":
+            job = self._remote_jobs.get((message["reply_to"], message["request_id"]))
+            if job is not None:
+                job.cancel()
+        elif kind == "backend_reset":
+            for remote in list(self.remote_workers.values()):
+                self._drop_worker(remote)
+
+    async def _serve_remote(self, envelope: Dict[str, Any]) -> None:
+        """
+        다른 프로세스가 요청한 작업을 이 프로세스의 로컬 워커로 실행하고 응답을 되돌려준다.
+        요청 측이 타임아웃/취소하면 cancel 메시지로 이 태스크가 취소되어 워커까지 전파된다.
+        """
+        reply_to = envelope["reply_to"]
+        message = envelope["message"]
+        req_id = message["request_id"]
+        task_type = message["type"]
+        timeout = settings.BRIDGE_REMOTE_TIMEOUT_S
+
+        async def reply(data: Dict[str, Any]) -> None:
+            assert self.backend is not None
+            await self.backend.publish(
+                reply_to, {"kind": "response", "data": {"request_id": req_id, **data}}
+            )
+
+        try:
+            worker = self.workers.get(envelope["worker_id"])
+            if worker is None or not worker.supports(task_type):
+                raise ConnectionError(f"AI Worker {envelope['worker_id']} is no longer connected")
+            if message.get("stream"):
+                stream = self._stream(task_type, message["payload"], timeout, worker=worker)
+                async with aclosing(stream):
+                    async for result, done, timings in stream:
+                        await reply({"result": result, "partial": not done, "timings": timings})
+            else:
+                r = await self._request(task_type, message["payload"], timeout, worker=worker)
+                await reply({"result": r.result, "timings": r.timings})
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            print(f"Error processing message: {e}")
+            try:
+                await reply({"error": str(e) or type(e).__name__})
+            except Exception:
+                pass
 
 
 # 전역 인스턴스
-ai_bridge = AIConnectionManager()
+ai_bridge = AIConnectionManager(backend=create_backend())
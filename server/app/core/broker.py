@@ -0,0 +1,207 @@
+# app/core/broker.py
+"""
+gunicorn 워커 프로세스들 사이에서 브리지 메시지를 중계하는 로컬 브로커.
+
+AI 워커의 WebSocket은 여러 HTTP 프로세스 중 하나에만 붙기 때문에,
+각 프로세스는 Unix 도메인 소켓으로 이 브로커에 접속해
+  - 자신이 보유한 AI 워커 목록(능력치/부하)을 공지(announce)하고
+  - 다른 프로세스가 보유한 워커로 작업을 보낼 때 브로커를 통해 전달(send)한다.
+
+프레임: 4바이트 big-endian 길이 + UTF-8 JSON
+
+실행:
+    python -m app.core.broker --path /tmp/dialog-bridge.sock
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import struct
+from typing import Any, Dict, Optional
+
+from app.core.cache import TTLCache
+from app.core.nonce import NonceStore
+from app.core.observability import get_logger, setup_logging
+from app.core.ratelimit import GCRALimiter, RateLimit
+
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+log = get_logger(__name__)
+
+# 응답({"op": "<op>_result", "id", ...})을 돌려주는 요청 op
+_QUERY_OPS = ("kv", "rl", "nonce")
+
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    body = json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(len(body)) + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    header = await reader.readexactly(_HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise ConnectionError(f"Frame too large ({length} bytes)")
+    return json.loads(await reader.readexactly(length))
+
+
+class Broker:
+    """
+    접속한 프로세스별 writer와 워커 디렉터리를 보관하고 메시지를 라우팅.
+      - {"op": "hello", "process_id"}        : 접속 등록
+      - {"op": "announce", "workers": {...}} : 보유 워커 공지 → 모든 프로세스에 directory 방송
+      - {"op": "send", "target", "message"}  : target 프로세스에 {"op": "deliver", "message"}
+      - {"op": "kv", "id", "cmd", "key", ...}  : 공유 키-값 저장소 → {"op": "kv_result", "id", ...}
+      - {"op": "rl", "id", "key", "rate", "per", "cost"}
+          : 공유 레이트리밋(GCRA) → {"op": "rl_result", "id", "allowed", "retry_after"}
+      - {"op": "nonce", "id", "nonce", "window_s"}
+          : 공유 HMAC nonce 등록 → {"op": "nonce_result", "id", "fresh"}
+    """
+
+    def __init__(
+        self,
+        *,
+        kv_max_bytes: int = 64 * 1024 * 1024,
+        nonce_options: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.clients: Dict[str, asyncio.StreamWriter] = {}
+        self.directory: Dict[str, Dict[str, Any]] = {}
+        # 프로세스 간 공유 캐시 등에 쓰는 키-값 저장소 (TTL + LRU, 바이트 상한)
+        self.kv = TTLCache(ttl_s=60.0, max_entries=1_000_000, max_bytes=kv_max_bytes)
+        # 모든 HTTP 프로세스가 함께 쓰는 레이트리밋 상태
+        self.limiter = GCRALimiter()
+        # 창 길이별 nonce 저장소 (보통 하나, 요청에 실린 window_s로 지연 생성)
+        self.nonces: Dict[float, NonceStore] = {}
+        self.nonce_options = nonce_options or {}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        프레임 하나의 오류(필드 누락/타입 오류, 해석 불가 JSON)로 연결을 끊지 않는다.
+        응답이 있는 요청(kv/rl/nonce)은 같은 id로 {"error"}를 돌려주고 나머지는 기록만 하고 무시.
+        """
+        process_id = ""
+        try:
+            while True:
+                try:
+                    msg = await read_frame(reader)
+                except json.JSONDecodeError as e:
+                    # 길이 접두사로 프레임 경계는 유지되므로 이 프레임만 버림
+                    log.warning("broker dropped an undecodable frame: %r", e)
+                    continue
+                if not isinstance(msg, dict):
+                    log.warning("broker dropped a non-object frame")
+                    continue
+                op = msg.get("op")
+                try:
+                    if op == "hello":
+                        process_id = str(msg["process_id"])
+                        self.clients[process_id] = writer
+                        await self._write(writer, {"op": "directory", "directory": self.directory})
+                    elif op == "announce" and process_id:
+                        self.directory[process_id] = dict(msg.get("workers") or {})
+                        await self._broadcast_directory()
+                    elif op == "send":
+                        target = self.clients.get(str(msg.get("target")))
+                        if target is not None:
+                            await self._write(target, {"op": "deliver", "message": msg["message"]})
+                    elif op in _QUERY_OPS:
+                        result = self._query(op, msg)
+                        await self._write(
+                            writer, {"op": f"{op}_result", "id": msg.get("id"), **result}
+                        )
+                except (KeyError, ValueError, TypeError) as e:
+                    log.warning("broker rejected a %s frame: %r", op, e)
+                    if op in _QUERY_OPS:
+                        await self._write(
+                            writer,
+                            {
+                                "op": f"{op}_result",
+                                "id": msg.get("id"),
+                                "error": f"bad {op}: {e!r}",
+                            },
+                        )
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if process_id and self.clients.get(process_id) is writer:
+                del self.clients[process_id]
+                self.directory.pop(process_id, None)
+                await self._broadcast_directory()
+            writer.close()
+
+    def _query(self, op: str, msg: Dict[str, Any]) -> Dict[str, Any]:
+        if op == "kv":
+            return self._kv(msg)
+        if op == "rl":
+            allowed, retry_after = self.limiter.hit(
+                str(msg.get("key")),
+                RateLimit(int(msg["rate"]), float(msg["per"])),
+                int(msg.get("cost", 1)),
+            )
+            return {"allowed": allowed, "retry_after": retry_after}
+        fresh = self._nonce_store(float(msg["window_s"])).claim(str(msg.get("nonce")))
+        return {"fresh": fresh}
+
+    def _kv(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        cmd = msg.get("cmd")
+        key = str(msg.get("key"))
+        if cmd == "get":
+            return {"value": self.kv.get(key)}
+        if cmd == "set":
+            self.kv.set(key, msg.get("value"), msg.get("ttl_s"))
+            return {"ok": True}
+        return {"error": f"unknown kv command: {cmd}"}
+
+    def _nonce_store(self, window_s: float) -> NonceStore:
+        store = self.nonces.get(window_s)
+        if store is None:
+            store = self.nonces[window_s] = NonceStore(window_s=window_s, **self.nonce_options)
+        return store
+
+    async def _broadcast_directory(self) -> None:
+        frame = {"op": "directory", "directory": self.directory}
+        for writer in list(self.clients.values()):
+            await self._write(writer, frame)
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, message: Dict[str, Any]) -> None:
+        try:
+            writer.write(encode_frame(message))
+            await writer.drain()
+        except (ConnectionError, RuntimeError):
+            pass
+
+
+async def serve(path: str, *, nonce_options: Optional[Dict[str, Any]] = None) -> None:
+    if os.path.exists(path):
+        os.unlink(path)
+    broker = Broker(nonce_options=nonce_options)
+    server = await asyncio.start_unix_server(broker.handle, path=path)
+    os.chmod(path, 0o660)
+    log.info("broker listening on %s", path)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Local bridge broker for multi-process servers")
+    parser.add_argument("--path", default=settings.BRIDGE_BROKER_PATH)
+    args = parser.parse_args()
+    setup_logging(settings.LOG_LEVEL, json=settings.LOG_JSON, queue_size=settings.LOG_QUEUE_SIZE)
+    nonce_options = {
+        "buckets": settings.HMAC_NONCE_BUCKETS,
+        "mode": settings.HMAC_NONCE_MODE,
+        "bloom_capacity": settings.HMAC_NONCE_BLOOM_CAPACITY,
+        "bloom_fp_rate": settings.HMAC_NONCE_BLOOM_FP_RATE,
+    }
+    asyncio.run(serve(args.path, nonce_options=nonce_options))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# app/core/cache.py
+"""
+TTL + LRU 인메모리 캐시.
+- 항목 수/대략적 바이트 크기 상한을 넘으면 가장 오래 안 쓴 항목부터 제거
+- 만료(TTL)는 조회 시점에 판단 (별도 타이머 없음)
+- 선택적으로 프로세스 간 공유 저장소(로컬 브로커/Redis)를 2차 캐시로 사용
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Protocol
+
+_MISSING = object()
+
+
+def approx_size(key: str, value: Any) -> int:
+    """
+    항목의 대략적 바이트 크기 (키 + 값 JSON 직렬화 길이). 정확한 메모리 사용량이 아닌 상한 관리용.
+    """
+    try:
+        body = json.dumps(value, ensure_ascii=False, default=str)
+    except Exception:
+        body = repr(value)
+    return len(key.encode("utf-8")) + len(body.encode("utf-8"))
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+    size: int
+
+
+class TTLCache:
+    def __init__(
+        self,
+        *,
+        ttl_s: float,
+        max_entries: int = 10_000,
+        max_bytes: int = 8 * 1024 * 1024,
+        sizeof: Callable[[str, Any], int] = approx_size,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._clock = clock
+        self._data: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        if entry.expires_at <= self._clock():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl_s: Optional[float] = None) -> None:
+        size = self._sizeof(key, value)
+        if size > self.max_bytes:
+            # 한 항목이 전체 상한보다 크면 저장하지 않음
+            return
+        if key in self._data:
+            self._remove(key)
+        ttl = self.ttl_s if ttl_s is None else ttl_s
+        self._data[key] = _Entry(value=value, expires_at=self._clock() + ttl, size=size)
+        self.bytes += size
+        while self._data and (len(self._data) > self.max_entries or self.bytes > self.max_bytes):
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        if key in self._data:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._data.pop(key)
+        self.bytes -= entry.size
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SharedStore(Protocol):
+    """프로세스 간 공유 저장소 (디스패치 백엔드가 구현)."""
+
+    async def kv_get(self, key: str) -> Any: ...
+
+    async def kv_set(self, key: str, value: Any, ttl_s: float) -> None: ...
+
+
+class TieredCache:
+    """
+    1차: 프로세스 로컬 TTLCache, 2차: (선택) 공유 저장소.
+    공유 저장소 오류는 캐시 미스로 취급해 본 경로를 막지 않는다.
+    """
+
+    def __init__(
+        self,
+        local: TTLCache,
+        *,
+        store: Optional[Callable[[], Optional[SharedStore]]] = None,
+        namespace: str = "cache",
+    ) -> None:
+        self.local = local
+        self._store = store
+        self.namespace = namespace
+        self.shared_hits = 0
+
+    async def get(self, key: str) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        store = self._store() if self._store else None
+        if store is None:
+            return None
+        try:
+            value = await store.kv_get(f"{self.namespace}:{key}")
+        except Exception:
+            return None
+        if value is not None:
+            self.shared_hits += 1
+            self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+        store = self._store() if self._store else None
+        if store is None:
+            return
+        try:
+            await store.kv_set(f"{self.namespace}:{key}", value, self.local.ttl_s)
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.local.stats(), "shared_hits": self.shared_hits}
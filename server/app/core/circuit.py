@@ -0,0 +1,139 @@
+# app/core/circuit.py
+"""
+AI 워커별 상태 추적: EWMA 지연/오류율 + 서킷 브레이커.
+
+  closed ──(연속 실패 failure_threshold회, 또는 min_samples 이후 EWMA 오류율 ≥ error_threshold,
+            또는 하트비트 pong 누락)──▶ open: 라우팅에서 제외
+  open ──(open_s 경과 후 프로브 통과)──▶ half_open
+         프로브: 하트비트 워커는 경과 후 도착한 pong, 하트비트 미지원 워커는 경과 자체
+  half_open ──(시험 요청 1건 성공)──▶ closed
+            ──(실패)──▶ open (open_s를 두 배로, 상한 max_open_s)
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class WorkerHealth:
+    def __init__(
+        self,
+        *,
+        alpha: float = 0.2,
+        failure_threshold: int = 5,
+        error_threshold: float = 0.5,
+        min_samples: int = 10,
+        open_s: float = 5.0,
+        max_open_s: float = 60.0,
+        requires_probe: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.alpha = alpha
+        self.failure_threshold = max(1, failure_threshold)
+        self.error_threshold = error_threshold
+        self.min_samples = min_samples
+        self.base_open_s = open_s
+        self.max_open_s = max(open_s, max_open_s)
+        self.requires_probe = requires_probe
+        self._clock = clock
+
+        self.state = CLOSED
+        self.latency_ms: Optional[float] = None
+        self.error_rate = 0.0
+        self.samples = 0
+        self.consecutive_failures = 0
+        self.open_s = open_s
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.trips = 0
+        # open으로 바뀔 때 호출 (지표용)
+        self.on_trip: Optional[Callable[[], None]] = None
+
+    # ----------------------------
+    # 라우팅
+    # ----------------------------
+    def allows(self) -> bool:
+        """지금 이 워커로 요청을 보내도 되는지. half_open에서는 시험 요청 1건만."""
+        if self.state == OPEN and not self.requires_probe and self._cooled_down():
+            self.state = HALF_OPEN
+        if self.state == CLOSED:
+            return True
+        return self.state == HALF_OPEN and not self.trial_in_flight
+
+    def begin(self) -> None:
+        if self.state == HALF_OPEN:
+            self.trial_in_flight = True
+
+    # ----------------------------
+    # 결과 기록
+    # ----------------------------
+    def record(self, ok: Optional[bool], latency_ms: Optional[float] = None) -> None:
+        """
+        요청 하나의 결과. ok=None은 판단 불가(호출 측 취소, 프롬프트 재등록 등)로 통계에서 제외.
+        """
+        self.trial_in_flight = False
+        if ok is None:
+            return
+        self.samples += 1
+        self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+        if ok:
+            self.consecutive_failures = 0
+            if latency_ms is not None:
+                self.latency_ms = (
+                    latency_ms
+                    if self.latency_ms is None
+                    else self.latency_ms + self.alpha * (latency_ms - self.latency_ms)
+                )
+            if self.state == HALF_OPEN:
+                self._close()
+            return
+
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            self.trip(backoff=True)
+        elif self.state == CLOSED and (
+            self.consecutive_failures >= self.failure_threshold
+            or (self.samples >= self.min_samples and self.error_rate >= self.error_threshold)
+        ):
+            self.trip()
+
+    def probe(self) -> None:
+        """하트비트 pong 수신. open 상태에서 대기 시간이 지났으면 시험 요청을 허용."""
+        if self.state == OPEN and self._cooled_down():
+            self.state = HALF_OPEN
+
+    def trip(self, *, backoff: bool = False) -> None:
+        if self.state == OPEN:
+            return
+        self.open_s = min(self.open_s * 2, self.max_open_s) if backoff else self.base_open_s
+        self.state = OPEN
+        self.opened_at = self._clock()
+        self.trial_in_flight = False
+        self.trips += 1
+        if self.on_trip is not None:
+            self.on_trip()
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self.open_s = self.base_open_s
+        self.consecutive_failures = 0
+        # 회복 직후 과거 오류율로 곧바로 다시 열리지 않도록
+        self.error_rate = 0.0
+        self.samples = 0
+
+    def _cooled_down(self) -> bool:
+        return self._clock() - self.opened_at >= self.open_s
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "latency_ewma_ms": None if self.latency_ms is None else round(self.latency_ms, 2),
+            "error_rate_ewma": round(self.error_rate, 4),
+            "consecutive_failures": self.consecutive_failures,
+            "trips": self.trips,
+        }
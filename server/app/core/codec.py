@@ -0,0 +1,88 @@
+# app/core/codec.py
+"""
+AI 워커 WebSocket 프로토콜의 프레임 직렬화 방식(codec).
+
+워커는 연결 시 WebSocket 서브프로토콜(Sec-WebSocket-Protocol)로 선호 순서대로 방식을 제시하고,
+서버는 지원하는 첫 번째 방식을 골라 핸드셰이크 응답에 실어 보낸다.
+  - "msgpack"   : msgpack 바이너리 프레임 (msgpack 패키지가 설치된 경우에만)
+  - "json-utf8" : 이스케이프 없는 UTF-8 JSON 바이너리 프레임 (한글이 \\uXXXX로 부풀지 않음)
+  - "json"      : 기존 텍스트 프레임 (서브프로토콜 미지정 시 기본값)
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, Optional, Protocol, Union
+
+try:
+    import msgpack  # type: ignore
+except Exception:  # pragma: no cover
+    msgpack = None  # type: ignore
+
+Frame = Union[str, bytes]
+
+
+class Codec(Protocol):
+    name: str
+    binary: bool
+
+    def encode(self, message: Dict[str, Any]) -> Frame: ...
+
+    def decode(self, raw: Frame) -> Dict[str, Any]: ...
+
+
+class JsonTextCodec:
+    name = "json"
+    binary = False
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        return json.dumps(message)
+
+    def decode(self, raw: Frame) -> Dict[str, Any]:
+        return json.loads(raw)
+
+
+class JsonBytesCodec:
+    name = "json-utf8"
+    binary = True
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, raw: Frame) -> Dict[str, Any]:
+        return json.loads(raw)
+
+
+class MsgpackCodec:
+    name = "msgpack"
+    binary = True
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        return msgpack.packb(message, use_bin_type=True)
+
+    def decode(self, raw: Frame) -> Dict[str, Any]:
+        # 협상 후에도 워커가 텍스트 프레임을 보내면 JSON으로 해석
+        if isinstance(raw, str):
+            return json.loads(raw)
+        return msgpack.unpackb(raw, raw=False)
+
+
+JSON_CODEC = JsonTextCodec()
+
+# 서버가 지원하는 방식 (msgpack은 선택 의존성)
+_AVAILABLE: list[Codec] = [JsonBytesCodec(), JSON_CODEC]
+if msgpack is not None:
+    _AVAILABLE.insert(0, MsgpackCodec())
+CODECS: Dict[str, Codec] = {c.name: c for c in _AVAILABLE}
+
+
+def negotiate_codec(offered: Optional[Iterable[str]]) -> Codec:
+    """
+    워커가 제시한 서브프로토콜 목록(선호 순) 중 서버가 지원하는 첫 번째 codec을 반환.
+    일치하는 것이 없으면 기존 JSON 텍스트 방식.
+    """
+    for name in offered or ():
+        codec = CODECS.get(name)
+        if codec is not None:
+            return codec
+    return JSON_CODEC
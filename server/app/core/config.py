@@ -1,4 +1,4 @@
-from typing import List, cast
+from typing import Any, Dict, List, cast
 
 from pydantic import AnyHttpUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -16,15 +16,145 @@ class Settings(BaseSettings):
     # Emotion 분석 API
     EMOTION_API_URL: AnyHttpUrl = cast(AnyHttpUrl, "http://localhost:9000/v1/predict")
     EMOTION_TIMEOUT_S: float = 2.0
+    # 감정 추론 마이크로 배칭 (워커가 "emotion_batch" 능력을 알릴 때만 사용, 1 이하면 비활성)
+    EMOTION_BATCH_MAX_SIZE: int = 32
+    EMOTION_BATCH_MAX_WAIT_MS: float = 5.0
+    # 감정 추론 결과 캐시 (정규화된 텍스트 + 로캘 기준, TTL + LRU)
+    EMOTION_CACHE_ENABLED: bool = True
+    EMOTION_CACHE_TTL_S: float = 600.0
+    EMOTION_CACHE_MAX_ENTRIES: int = 50_000
+    EMOTION_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    # True면 브리지 디스패치 백엔드(로컬 브로커/Redis)를 2차 캐시로 공유
+    EMOTION_CACHE_SHARED: bool = False
 
     # GPT API
     GPT_API_URL: AnyHttpUrl = cast(AnyHttpUrl, "https://api.openai.com/v1/chat/completions")
     GPT_MODEL: str = "gpt-4o-mini"
     GPT_API_KEY: str = "REPLACE_WITH_YOUR_KEY"
+    # 안전 필터 렉시콘: UTF-8 텍스트(한 줄에 금칙어 하나), 파일 이름이 분류명
+    # SAFETY_INCLUDE_DEFAULT_LEXICON: 내장 기본 금칙어 목록도 함께 사용할지
+    SAFETY_LEXICON_PATHS: List[str] = []
+    SAFETY_INCLUDE_DEFAULT_LEXICON: bool = True
+    # 대사 응답 캐시 (기본 비활성). 페르소나별 정책, "*"는 나머지 페르소나의 기본 정책
+    #   enabled: 캐시 사용 여부 / ttl_s: 유지 시간 / variants: 라운드로빈으로 돌려 쓸 대사 수
+    GPT_CACHE_ENABLED: bool = False
+    GPT_CACHE_POLICIES: Dict[str, Dict[str, Any]] = {
+        "*": {"enabled": True, "ttl_s": 600.0, "variants": 3},
+    }
+    GPT_CACHE_MAX_ENTRIES: int = 20_000
+    GPT_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # 세션 대화 메모리: session_id별 최근 대화 + 누적 요약을 프롬프트에 포함
+    #   SESSION_MAX_TURNS: 원문으로 유지하는 최근 턴 수
+    #   SESSION_TOKEN_BUDGET: 요약 + 최근 턴의 추정 토큰 상한. 넘으면 오래된 턴을 워커가 요약에 합침
+    #     ("summarize" 능력을 알린 워커가 없으면 오래된 턴은 버림)
+    #   SESSION_MAX_SESSIONS / SESSION_IDLE_TTL_S: LRU + 유휴 만료
+    #   SESSION_SNAPSHOT_PATH: 지정하면 시작 시 읽고 주기적으로/종료 시 저장
+    SESSION_MEMORY_ENABLED: bool = True
+    SESSION_MAX_TURNS: int = 6
+    SESSION_TOKEN_BUDGET: int = 600
+    SESSION_SUMMARY_MAX_TOKENS: int = 200
+    SESSION_MAX_SESSIONS: int = 10_000
+    SESSION_IDLE_TTL_S: float = 1800.0
+    SESSION_SNAPSHOT_PATH: str = ""
+    SESSION_SNAPSHOT_INTERVAL_S: float = 60.0
 
     # 공통 설정
     REQUEST_TIMEOUT_S: float = 6.0
     MAX_INPUT_CHARS: int = 1000
+    # HTTP 요청 바디 상한 (바이트). 넘으면 파싱 전에 413
+    MAX_BODY_BYTES: int = 1024 * 1024
+    # 배치 대화 생성(/v1/dialog/batch): 한 요청당 최대 항목 수 / 동시에 처리할 항목 수
+    DIALOG_BATCH_MAX_ITEMS: int = 64
+    DIALOG_BATCH_CONCURRENCY: int = 8
+
+    # 브리지 입장 제어: 동시에 워커로 나가 있는 요청 수 상한 (초과 시 즉시 503)
+    BRIDGE_MAX_IN_FLIGHT: int = 256
+    BRIDGE_TASK_LIMITS: Dict[str, int] = {"emotion": 192, "gpt": 96, "dialog": 96}
+    BRIDGE_RETRY_AFTER_S: int = 1
+    # 같은 작업 타입 + 같은 payload 요청이 동시에 들어오면 워커 호출 1번을 공유 (빈 목록이면 끔)
+    BRIDGE_COALESCE_TASKS: List[str] = ["emotion", "gpt", "dialog"]
+
+    # 멀티 프로세스(gunicorn) 브리지 공유: none | unix(로컬 브로커) | redis
+    BRIDGE_BACKEND: str = "none"
+    BRIDGE_BROKER_PATH: str = "/tmp/dialog-bridge.sock"
+    BRIDGE_REDIS_URL: str = "redis://localhost:6379/0"
+    BRIDGE_ANNOUNCE_INTERVAL_S: float = 1.0
+    BRIDGE_REMOTE_TIMEOUT_S: float = 30.0
+
+    # 워커 상태 감시
+    #   하트비트: "heartbeat" 능력을 알린 워커에 주기적으로 ping, pong이 없으면 서킷을 열고
+    #            MAX_MISSES회 연속 없으면 연결을 끊음
+    #   서킷 브레이커: 연속 실패(타임아웃/오류) 또는 EWMA 오류율이 임계치를 넘으면 OPEN_S초 동안
+    #            라우팅에서 제외 → 프로브 통과 후 시험 요청 1건 성공 시 복귀
+    #            (시험 요청이 실패하면 대기 시간 2배, 상한 MAX_OPEN_S)
+    BRIDGE_HEARTBEAT_INTERVAL_S: float = 5.0
+    BRIDGE_HEARTBEAT_MAX_MISSES: int = 3
+    BRIDGE_EWMA_ALPHA: float = 0.2
+    BRIDGE_CB_FAILURE_THRESHOLD: int = 5
+    BRIDGE_CB_ERROR_RATE: float = 0.5
+    BRIDGE_CB_MIN_SAMPLES: int = 10
+    BRIDGE_CB_OPEN_S: float = 5.0
+    BRIDGE_CB_MAX_OPEN_S: float = 60.0
+
+    # 요청 헤징 (기본 끔, 예: ["gpt"]): 응답이 헤지 지연 안에 오지 않으면 같은 작업을 다른 워커에
+    #   한 번 더 보내 먼저 온 응답을 쓰고 나머지는 취소 (워커 2대 이상, 비스트리밍 요청만)
+    #   BRIDGE_HEDGE_DELAY_MS: 고정 지연 (0이면 최근 응답 지연의 BRIDGE_HEDGE_PERCENTILE 백분위수)
+    #   BRIDGE_HEDGE_RECOMPUTE_EVERY: 백분위수를 다시 계산하는 관측 간격
+    #   BRIDGE_HEDGE_BUDGET: 헤지 요청 상한 (기본 요청 수 대비 비율)
+    BRIDGE_HEDGE_TASKS: List[str] = []
+    BRIDGE_HEDGE_DELAY_MS: float = 0.0
+    BRIDGE_HEDGE_PERCENTILE: float = 95.0
+    BRIDGE_HEDGE_MIN_DELAY_MS: float = 50.0
+    BRIDGE_HEDGE_MIN_SAMPLES: int = 50
+    BRIDGE_HEDGE_WINDOW: int = 1000
+    BRIDGE_HEDGE_RECOMPUTE_EVERY: int = 20
+    BRIDGE_HEDGE_BUDGET: float = 0.05
+
+    # 레이트리밋 (GCRA). 기본 한도는 RL_DEFAULT_RATE / RL_DEFAULT_PER 환경변수
+    #   경로별 / 주체별(principal: api_key, hmac, 또는 IP) 개별 한도: {"키": [횟수, 초]}
+    #   주체별 한도가 경로별 한도보다 우선, 카운트는 항상 (주체, 경로) 조합별로 따로 센다
+    RL_ROUTE_LIMITS: Dict[str, List[float]] = {"/v1/dialog/batch": [10, 60]}
+    RL_PRINCIPAL_LIMITS: Dict[str, List[float]] = {}
+    RL_MAX_KEYS: int = 100_000
+    # True면 브리지 디스패치 백엔드(로컬 브로커/Redis)로 모든 프로세스가 한도를 공유
+    RL_SHARED: bool = True
+
+    # HMAC 서명 검증 대상 경로 접두사 (SERVER_HMAC_SECRET 설정 시)
+    HMAC_PROTECTED_PREFIXES: List[str] = ["/v1/"]
+    # HMAC nonce 재사용 거부 (허용 타임스큐 창 안에서 같은 X-Nonce는 한 번만 통과)
+    #   HMAC_NONCE_MODE: exact(버킷별 집합) | bloom(버킷별 Bloom 필터, 고정 메모리, 극소 오탐)
+    #   HMAC_NONCE_BLOOM_CAPACITY: bloom 모드에서 창 하나 동안 예상되는 최대 요청 수
+    HMAC_NONCE_MODE: str = "exact"
+    HMAC_NONCE_BUCKETS: int = 4
+    HMAC_NONCE_BLOOM_CAPACITY: int = 1_000_000
+    HMAC_NONCE_BLOOM_FP_RATE: float = 1e-6
+    # True면 브리지 디스패치 백엔드(로컬 브로커/Redis)로 모든 프로세스가 nonce를 공유
+    HMAC_NONCE_SHARED: bool = True
+
+    # 로깅: 포맷/출력은 별도 스레드, 큐가 가득 차면 버림(/healthz/logging의 dropped)
+    #   LOG_SAMPLE_RATE: 요청 로그(start/end)를 남길 요청 비율 (5xx/예외/느린 요청의 end는 항상)
+    #   LOG_SKIP_PATHS: 요청 로그를 남기지 않는 경로 (하위 경로 포함: /healthz → /healthz/bridge)
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True
+    LOG_QUEUE_SIZE: int = 10_000
+    LOG_SAMPLE_RATE: float = 1.0
+    LOG_SLOW_MS: int = 1000
+    LOG_REQUEST_START: bool = True
+    LOG_SKIP_PATHS: List[str] = ["/healthz", "/metrics"]
+
+    # /metrics: 브리지 게이지(대기 요청/연결 워커/워커별 in-flight)를 프로세스별로 기록하는 주기
+    METRICS_REFRESH_INTERVAL_S: float = 1.0
+
+    # 단계별 시간 측정 (auth, rate_limit, emotion/gpt 대기·연산, postprocess)
+    #   SERVER_TIMING_ENABLED: 응답에 Server-Timing 헤더
+    #   TRACING_EXPORTER: none | file(OTLP/JSON 줄 단위) | otlp_http(수집기 /v1/traces)
+    SERVER_TIMING_ENABLED: bool = True
+    TRACING_EXPORTER: str = "none"
+    TRACING_FILE_PATH: str = "traces.otlp.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SAMPLE_RATE: float = 1.0
+    TRACING_QUEUE_SIZE: int = 1000
 
     # CORS
     CORS_ORIGINS: List[str] = ["*"]
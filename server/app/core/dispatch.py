@@ -0,0 +1,356 @@
+# app/core/dispatch.py
+"""
+프로세스 간 브리지 디스패치 백엔드.
+  - "unix"  : 같은 호스트의 로컬 브로커(app.core.broker)에 Unix 도메인 소켓으로 접속
+  - "redis" : Redis 호환 서버의 pub/sub + 해시 하나로 디렉터리 공유 (redis 패키지 필요)
+  - "none"  : 단일 프로세스 (백엔드 없음)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.broker import encode_frame, read_frame
+from app.core.config import settings
+from app.core.observability import get_logger
+
+try:
+    from redis import asyncio as aioredis  # type: ignore
+except Exception:  # pragma: no cover
+    aioredis = None  # type: ignore
+
+log = get_logger(__name__)
+
+OnMessage = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# process_id : {worker_id : {"capabilities": [...], "in_flight": n}}
+Directory = Dict[str, Dict[str, Any]]
+
+
+class DispatchBackend:
+    """
+    백엔드 공통 인터페이스.
+    - directory: 다른 프로세스가 공지한 워커 목록 (자기 자신 제외)
+    - on_message: 다른 프로세스가 보낸 메시지 수신 콜백
+      (연결이 끊기면 {"kind": "backend_reset"}을 전달)
+    """
+
+    def __init__(self) -> None:
+        self.process_id = ""
+        self.directory: Directory = {}
+        self._on_message: Optional[OnMessage] = None
+
+    async def start(self, process_id: str, on_message: OnMessage) -> None:
+        self.process_id = process_id
+        self._on_message = on_message
+
+    async def announce(self, workers: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    async def publish(self, target: str, message: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    # 공유 키-값 저장소 (app.core.cache.SharedStore)
+    async def kv_get(self, key: str) -> Any:
+        raise NotImplementedError
+
+    async def kv_set(self, key: str, value: Any, ttl_s: float) -> None:
+        raise NotImplementedError
+
+    # 공유 레이트리밋 (GCRA): (허용 여부, 거절 시 재시도까지 남은 초)
+    async def rate_limit(
+        self, key: str, rate: int, per: float, cost: int = 1
+    ) -> Tuple[bool, float]:
+        raise NotImplementedError
+
+    # 공유 HMAC nonce: window_s 안에서 처음 보는 nonce면 기록하고 True
+    async def claim_nonce(self, nonce: str, window_s: float) -> bool:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+    def _set_directory(self, directory: Directory) -> None:
+        self.directory = {pid: w for pid, w in directory.items() if pid != self.process_id}
+
+    async def _deliver(self, message: Dict[str, Any]) -> None:
+        if self._on_message is not None:
+            await self._on_message(message)
+
+
+def _log_task_death(task: asyncio.Task) -> None:
+    """수신 루프가 취소 외의 이유로 끝나면 기록 (이후 다른 프로세스의 메시지를 받지 못함)."""
+    if task.cancelled():
+        return
+    log.error("bridge backend task %s stopped: %r", task.get_name(), task.exception())
+
+
+class UnixSocketBackend(DispatchBackend):
+    def __init__(self, path: str, *, reconnect_s: float = 1.0, call_timeout_s: float = 0.2) -> None:
+        super().__init__()
+        self.path = path
+        self.reconnect_s = reconnect_s
+        self.call_timeout_s = call_timeout_s
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._last_announce: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        # kv/rl/nonce 요청 id : 응답 Future
+        self._waiters: Dict[int, asyncio.Future] = {}
+        self._seq = itertools.count(1)
+
+    async def start(self, process_id: str, on_message: OnMessage) -> None:
+        await super().start(process_id, on_message)
+        self._task = asyncio.create_task(self._run(), name="bridge-broker-listen")
+        self._task.add_done_callback(_log_task_death)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+                self._writer = writer
+                await self._write({"op": "hello", "process_id": self.process_id})
+                if self._last_announce is not None:
+                    await self._write(self._last_announce)
+                while True:
+                    msg = await read_frame(reader)
+                    try:
+                        await self._handle(msg)
+                    except Exception as e:
+                        # 메시지 하나의 처리 오류로 수신 루프가 죽지 않도록 기록만 하고 계속
+                        log.warning("bridge broker message error (%s): %r", msg.get("op"), e)
+            except (OSError, asyncio.IncompleteReadError, ConnectionError) as e:
+                if self._writer is not None:
+                    log.warning("bridge broker connection lost: %r", e)
+                    await self._deliver({"kind": "backend_reset"})
+                self._writer = None
+                for waiter in self._waiters.values():
+                    if not waiter.done():
+                        waiter.set_exception(ConnectionError("Bridge broker connection lost"))
+                self._waiters.clear()
+                self.directory = {}
+                await asyncio.sleep(self.reconnect_s)
+
+    async def _handle(self, msg: Dict[str, Any]) -> None:
+        if msg.get("op") == "directory":
+            self._set_directory(msg.get("directory") or {})
+        elif msg.get("op") == "deliver":
+            await self._deliver(msg["message"])
+        elif msg.get("op") in ("kv_result", "rl_result", "nonce_result"):
+            waiter = self._waiters.pop(msg.get("id"), None)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(msg)
+
+    async def _write(self, message: Dict[str, Any]) -> None:
+        if self._writer is None:
+            raise ConnectionError("Bridge broker is not connected.")
+        self._writer.write(encode_frame(message))
+        await self._writer.drain()
+
+    async def announce(self, workers: Dict[str, Any]) -> None:
+        self._last_announce = {"op": "announce", "workers": workers}
+        if self._writer is not None:
+            await self._write(self._last_announce)
+
+    async def publish(self, target: str, message: Dict[str, Any]) -> None:
+        await self._write({"op": "send", "target": target, "message": message})
+
+    async def _call(self, op: str, **fields: Any) -> Dict[str, Any]:
+        """브로커에 요청 후 같은 id의 *_result 응답을 기다린다."""
+        req_id = next(self._seq)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[req_id] = waiter
+        try:
+            await self._write({"op": op, "id": req_id, **fields})
+            result = await asyncio.wait_for(waiter, timeout=self.call_timeout_s)
+        finally:
+            self._waiters.pop(req_id, None)
+        if result.get("error"):
+            raise RuntimeError(result["error"])
+        return result
+
+    async def kv_get(self, key: str) -> Any:
+        return (await self._call("kv", cmd="get", key=key)).get("value")
+
+    async def kv_set(self, key: str, value: Any, ttl_s: float) -> None:
+        await self._call("kv", cmd="set", key=key, value=value, ttl_s=ttl_s)
+
+    async def rate_limit(
+        self, key: str, rate: int, per: float, cost: int = 1
+    ) -> Tuple[bool, float]:
+        result = await self._call("rl", key=key, rate=rate, per=per, cost=cost)
+        return bool(result["allowed"]), float(result["retry_after"])
+
+    async def claim_nonce(self, nonce: str, window_s: float) -> bool:
+        result = await self._call("nonce", nonce=nonce, window_s=window_s)
+        return bool(result["fresh"])
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+# GCRA: 키에 TAT(초, 실수 문자열) 저장. 서버 시각(TIME) 기준이라 프로세스 간 시계 차이 무관
+_GCRA_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local per = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval * cost
+local allow_at = new_tat - per
+if allow_at > now then
+  return {0, tostring(allow_at - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, '0'}
+"""
+
+# 디렉터리 공지 + 조회 (왕복 1회): KEYS[1] 해시(process_id → 워커 JSON), KEYS[2] 하트비트 정렬 집합
+# ttl 동안 공지가 없는 프로세스는 두 키에서 함께 지우고 남은 해시 전체를 돌려준다
+_ANNOUNCE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[3])
+redis.call('ZADD', KEYS[2], now, ARGV[1])
+local stale = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now - tonumber(ARGV[2]))
+for _, pid in ipairs(stale) do
+  redis.call('HDEL', KEYS[1], pid)
+  redis.call('ZREM', KEYS[2], pid)
+end
+return redis.call('HGETALL', KEYS[1])
+"""
+
+
+class RedisBackend(DispatchBackend):
+    """
+    Redis 호환 서버를 이용한 백엔드.
+    - 디렉터리: {prefix}:dir 해시에 프로세스별 필드로 저장, {prefix}:dir:beats 정렬 집합의
+      하트비트로 만료 (announce마다 스크립트 1회로 갱신/만료/재조회, 키 스캔 없음)
+    - 메시지: {prefix}:proc:{process_id} 채널로 publish
+    """
+
+    def __init__(
+        self, url: str, *, prefix: str = "bridge", ttl_s: float = 5.0, reconnect_s: float = 1.0
+    ) -> None:
+        super().__init__()
+        if aioredis is None:
+            raise RuntimeError("BRIDGE_BACKEND=redis requires the 'redis' package.")
+        self.url = url
+        self.prefix = prefix
+        self.ttl_s = ttl_s
+        self.reconnect_s = reconnect_s
+        self._redis: Any = None
+        self._gcra: Any = None
+        self._announce: Any = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, process_id: str, on_message: OnMessage) -> None:
+        await super().start(process_id, on_message)
+        self._redis = aioredis.from_url(self.url)
+        self._gcra = self._redis.register_script(_GCRA_LUA)
+        self._announce = self._redis.register_script(_ANNOUNCE_LUA)
+        self._task = asyncio.create_task(self._listen(), name="bridge-redis-listen")
+        self._task.add_done_callback(_log_task_death)
+
+    async def _listen(self) -> None:
+        """구독이 끊기면 다시 구독 (UnixSocketBackend._run과 같은 재접속 규칙)."""
+        channel = f"{self.prefix}:proc:{self.process_id}"
+        subscribed = False
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(channel)
+                subscribed = True
+                async for item in pubsub.listen():
+                    if item.get("type") != "message":
+                        continue
+                    try:
+                        await self._deliver(json.loads(item["data"]))
+                    except Exception as e:
+                        # 메시지 하나의 처리 오류로 수신 루프가 죽지 않도록 기록만 하고 계속
+                        log.warning("bridge redis message error: %r", e)
+                raise ConnectionError("subscription closed")
+            except Exception as e:
+                # redis 연결 오류(redis.exceptions.ConnectionError 등)는 내장 예외 계층이 아님
+                if subscribed:
+                    log.warning("bridge redis subscription lost: %r", e)
+                    # 끊긴 사이의 응답/취소는 유실되므로 원격 워커를 비워 대기 요청을 실패시킴
+                    await self._deliver({"kind": "backend_reset"})
+                subscribed = False
+                self.directory = {}
+                await asyncio.sleep(self.reconnect_s)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def announce(self, workers: Dict[str, Any]) -> None:
+        flat = await self._announce(
+            keys=self._directory_keys(),
+            args=[self.process_id, self.ttl_s, json.dumps(workers, ensure_ascii=False)],
+        )
+        directory: Directory = {}
+        for pid, value in zip(flat[::2], flat[1::2]):
+            directory[pid.decode() if isinstance(pid, bytes) else pid] = json.loads(value)
+        self._set_directory(directory)
+
+    def _directory_keys(self) -> List[str]:
+        return [f"{self.prefix}:dir", f"{self.prefix}:dir:beats"]
+
+    async def publish(self, target: str, message: Dict[str, Any]) -> None:
+        await self._redis.publish(
+            f"{self.prefix}:proc:{target}", json.dumps(message, ensure_ascii=False)
+        )
+
+    async def kv_get(self, key: str) -> Any:
+        raw = await self._redis.get(f"{self.prefix}:kv:{key}")
+        return None if raw is None else json.loads(raw)
+
+    async def kv_set(self, key: str, value: Any, ttl_s: float) -> None:
+        await self._redis.set(
+            f"{self.prefix}:kv:{key}",
+            json.dumps(value, ensure_ascii=False),
+            px=int(ttl_s * 1000),
+        )
+
+    async def rate_limit(
+        self, key: str, rate: int, per: float, cost: int = 1
+    ) -> Tuple[bool, float]:
+        allowed, retry_after = await self._gcra(
+            keys=[f"{self.prefix}:rl:{key}"], args=[per / max(1, rate), per, cost]
+        )
+        return bool(int(allowed)), float(retry_after)
+
+    async def claim_nonce(self, nonce: str, window_s: float) -> bool:
+        # SET NX: 이미 있으면 None → 재사용
+        created = await self._redis.set(
+            f"{self.prefix}:nonce:{nonce}", b"1", nx=True, px=int(window_s * 1000)
+        )
+        return bool(created)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        if self._redis is not None:
+            directory_key, beats_key = self._directory_keys()
+            await self._redis.hdel(directory_key, self.process_id)
+            await self._redis.zrem(beats_key, self.process_id)
+            await self._redis.aclose()
+
+
+def create_backend(kind: Optional[str] = None) -> Optional[DispatchBackend]:
+    kind = (kind or settings.BRIDGE_BACKEND).lower()
+    if kind == "unix":
+        return UnixSocketBackend(settings.BRIDGE_BROKER_PATH)
+    if kind == "redis":
+        return RedisBackend(settings.BRIDGE_REDIS_URL)
+    return None
@@ -0,0 +1,93 @@
+# app/core/hedging.py
+"""
+요청 헤징 정책: 응답이 늦는 요청을 다른 워커에 한 번 더 보내 꼬리 지연을 줄인다.
+
+  - 헤지 지연: 고정값(delay_ms), 또는 최근 window개 응답 지연의 percentile 백분위수
+              (관측이 min_samples개 모이기 전에는 헤지하지 않음, 하한 min_delay_ms)
+              백분위수는 recompute_every개 관측마다 다시 계산해 두고 요청마다 정렬하지 않음
+  - 예산: 기본 요청 1건마다 budget개의 토큰이 쌓이고(최대 burst) 헤지 1건에 1개를 쓴다
+          → 헤지 트래픽은 장기적으로 기본 요청의 budget 비율을 넘지 않음
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+class HedgePolicy:
+    def __init__(
+        self,
+        *,
+        delay_ms: float = 0.0,
+        percentile: float = 95.0,
+        min_delay_ms: float = 50.0,
+        min_samples: int = 50,
+        window: int = 1000,
+        budget: float = 0.05,
+        burst: float = 10.0,
+        recompute_every: int = 20,
+    ) -> None:
+        self.fixed_delay_ms = delay_ms
+        self.percentile = min(max(percentile, 0.0), 100.0)
+        self.min_delay_ms = min_delay_ms
+        self.min_samples = max(1, min_samples)
+        self.budget = max(0.0, budget)
+        self.burst = max(1.0, burst)
+        self.samples: Deque[float] = deque(maxlen=max(self.min_samples, window))
+        self.tokens = 0.0
+        self.recompute_every = max(1, recompute_every)
+        self._quantile_ms: Optional[float] = None
+        self._since_recompute = 0
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.no_budget = 0
+
+    def observe(self, latency_ms: float) -> None:
+        """
+        첫 시도의 지연 (시도 시작부터 응답까지). 헤지가 이겨 첫 시도가 취소됐으면
+        취소 시점까지의 경과 시간 (실제 지연의 하한, 빼면 분포가 짧은 쪽으로 치우침).
+        """
+        self.samples.append(latency_ms)
+        self._since_recompute += 1
+        if len(self.samples) < self.min_samples:
+            return
+        if self._quantile_ms is None or self._since_recompute >= self.recompute_every:
+            ordered = sorted(self.samples)
+            rank = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+            self._quantile_ms = ordered[rank]
+            self._since_recompute = 0
+
+    def delay_s(self) -> Optional[float]:
+        """지금 요청에 적용할 헤지 지연(초). None이면 헤지하지 않음."""
+        if self.fixed_delay_ms > 0:
+            return self.fixed_delay_ms / 1000
+        if self._quantile_ms is None:
+            return None
+        return max(self.min_delay_ms, self._quantile_ms) / 1000
+
+    def on_request(self) -> None:
+        self.requests += 1
+        self.tokens = min(self.burst, self.tokens + self.budget)
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1.0:
+            self.no_budget += 1
+            return False
+        self.tokens -= 1.0
+        self.hedged += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.delay_s()
+        return {
+            "delay_ms": None if delay is None else round(delay * 1000, 2),
+            "samples": len(self.samples),
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "no_budget": self.no_budget,
+            "tokens": round(self.tokens, 3),
+        }
@@ -0,0 +1,197 @@
+# app/core/metrics.py
+"""
+Prometheus 지표 (/metrics).
+
+gunicorn 멀티 프로세스:
+  PROMETHEUS_MULTIPROC_DIR 환경변수가 설정된 채로 시작하면 prometheus_client가 지표를
+  프로세스별 mmap 파일에 기록하고, /metrics는 어느 프로세스가 받든 모든 프로세스 값을 합산한다.
+  - 디렉터리는 서버 시작 전에 비워야 함 (docker/start.sh)
+  - 종료된 프로세스의 게이지는 gunicorn.conf.py의 child_exit 훅에서 정리
+  - 브리지 게이지는 프로세스마다 자기 값만 주기적으로 기록하고 살아 있는 프로세스 값만 합산(livesum)
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# ----------------------------
+# 지표 정의
+# ----------------------------
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status",
+    ["route", "method", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+STAGE_LATENCY = Histogram(
+    "dialog_stage_duration_seconds",
+    "Dialog pipeline stage latency (emotion, gpt)",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+BRIDGE_PENDING = Gauge(
+    "bridge_pending_requests",
+    "Requests sent to AI workers and awaiting a response",
+    multiprocess_mode="livesum",
+)
+BRIDGE_WORKERS = Gauge(
+    "bridge_workers_connected",
+    "AI workers connected over WebSocket",
+    multiprocess_mode="livesum",
+)
+BRIDGE_WORKER_IN_FLIGHT = Gauge(
+    "bridge_worker_in_flight",
+    "In-flight requests per AI worker",
+    ["worker_id"],
+    multiprocess_mode="livesum",
+)
+BRIDGE_TIMEOUTS = Counter("bridge_timeouts_total", "AI worker responses that timed out", ["task"])
+BRIDGE_CIRCUIT_TRIPS = Counter(
+    "bridge_circuit_trips_total", "Times a worker's circuit breaker opened", ["worker_id"]
+)
+BRIDGE_HEDGES = Counter(
+    "bridge_hedges_total",
+    "Hedged requests by result (won, lost, failed, no_budget, no_capacity)",
+    ["task", "result"],
+)
+BRIDGE_REJECTIONS = Counter(
+    "bridge_rejections_total", "Requests rejected by bridge admission control (503)", ["task"]
+)
+DIALOG_FALLBACKS = Counter(
+    "dialog_fallbacks_total", "NPC lines replaced by a fallback line", ["reason"]
+)
+RATE_LIMITED = Counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter (429)", ["route"]
+)
+
+
+def observe_stage(stage: str, ms: Optional[float]) -> None:
+    if ms is not None:
+        STAGE_LATENCY.labels(stage).observe(ms / 1000.0)
+
+
+def fallback_reason(safety: Dict[str, Any]) -> Optional[str]:
+    """
+    safety 딕셔너리 → 폴백 사유 (폴백이 아니면 None).
+    오류 폴백은 폴백을 만든 쪽이 예외 타입으로 정한 reason 코드를 그대로 쓴다
+    (app.services.gpt.fallback_reason_code: timeout, circuit_open, prompt_miss, error).
+    """
+    if not safety.get("fallback"):
+        return None
+    if safety.get("reason"):
+        return str(safety["reason"])
+    if safety.get("error"):
+        return "error"
+    if safety.get("blocked"):
+        return "blocked"
+    return "other"
+
+
+def observe_safety(safety: Dict[str, Any]) -> None:
+    reason = fallback_reason(safety)
+    if reason is not None:
+        DIALOG_FALLBACKS.labels(reason).inc()
+
+
+# ----------------------------
+# 브리지 게이지
+# ----------------------------
+_worker_labels: Set[str] = set()
+
+
+def refresh_bridge_gauges(bridge: Any) -> None:
+    """이 프로세스의 브리지 상태를 게이지에 기록 (원격 워커는 소유 프로세스가 기록)."""
+    BRIDGE_PENDING.set(len(bridge.pending_requests) + len(bridge.pending_streams))
+    BRIDGE_WORKERS.set(len(bridge.workers))
+    current = set()
+    for worker in list(bridge.workers.values()):
+        current.add(worker.worker_id)
+        BRIDGE_WORKER_IN_FLIGHT.labels(worker.worker_id).set(worker.in_flight)
+    for worker_id in _worker_labels - current:
+        # 멀티 프로세스 모드에서는 값 파일이 남으므로 0으로 만든 뒤 제거
+        BRIDGE_WORKER_IN_FLIGHT.labels(worker_id).set(0)
+        BRIDGE_WORKER_IN_FLIGHT.remove(worker_id)
+    _worker_labels.clear()
+    _worker_labels.update(current)
+
+
+def forget_worker(worker_id: str) -> None:
+    """
+    떠난 워커의 worker_id 라벨 시리즈를 지운다.
+    (재연결마다 새 ID를 쓰는 워커 때문에 시리즈가 계속 쌓이지 않게)
+    다시 연결되면 새 시리즈로 0부터 센다.
+    """
+    if worker_id in _worker_labels:
+        BRIDGE_WORKER_IN_FLIGHT.labels(worker_id).set(0)
+        _worker_labels.discard(worker_id)
+    for metric in (BRIDGE_WORKER_IN_FLIGHT, BRIDGE_CIRCUIT_TRIPS):
+        try:
+            metric.remove(worker_id)
+        except KeyError:
+            pass
+
+
+# ----------------------------
+# 노출
+# ----------------------------
+def render_metrics() -> Tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """gunicorn child_exit 훅용."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+class MetricsMiddleware:
+    """
+    HTTP 요청 지연 히스토그램 (순수 ASGI). 라벨은 경로 원문이 아니라 라우트 템플릿
+    (매칭 실패는 "unmatched")이라 라벨 수가 라우트 수로 제한된다.
+    """
+
+    def __init__(self, app: ASGIApp, *, skip_paths: Optional[Set[str]] = None) -> None:
+        self.app = app
+        self.skip_paths = skip_paths or {"/metrics"}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_LATENCY.labels(
+                getattr(route, "path", "unmatched"), scope["method"], str(status_code)
+            ).observe(time.perf_counter() - start)
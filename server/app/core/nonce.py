@@ -0,0 +1,115 @@
+# app/core/nonce.py
+"""
+HMAC 재전송(replay) 방지용 nonce 저장소.
+- 시간 버킷 회전: window를 n개 버킷으로 나눠 저장하고, 가장 오래된 버킷을 통째로 버린다
+  (항목별 만료 처리 없이 메모리 상한 = window 동안 들어온 nonce 수)
+- exact 모드: 버킷마다 set  /  bloom 모드: 버킷마다 Bloom 필터 (고정 메모리, 극히 낮은 오탐)
+- 조회/등록은 버킷 수에 비례하는 상수 시간
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Protocol, Tuple
+
+
+class _Bucket(Protocol):
+    def __contains__(self, item: str) -> bool: ...
+
+    def add(self, item: str) -> None: ...
+
+
+class BloomFilter:
+    """
+    비트 배열 + k개 해시 (blake2b 다이제스트를 나눠 double hashing).
+    오탐(처음 보는 nonce를 봤다고 판단) 시 정상 요청 하나가 401로 거절될 수 있으므로
+    capacity/fp_rate를 넉넉히 잡는다. 미탐은 없다.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float = 1e-6) -> None:
+        capacity = max(1, capacity)
+        bits = math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))
+        self.size = max(8, bits)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Tuple[int, ...]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return tuple((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str) -> None:
+        for p in self._positions(item):
+            self._bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class NonceStore:
+    def __init__(
+        self,
+        *,
+        window_s: float,
+        buckets: int = 4,
+        mode: str = "exact",
+        bloom_capacity: int = 1_000_000,
+        bloom_fp_rate: float = 1e-6,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if mode not in ("exact", "bloom"):
+            raise ValueError(f"unknown nonce store mode: {mode}")
+        self.window_s = window_s
+        self.mode = mode
+        self.bucket_s = window_s / max(1, buckets)
+        # 현재 버킷까지 합쳐 항상 window 이상을 덮도록 buckets + 1개 유지
+        self.max_buckets = max(1, buckets) + 1
+        self.bloom_capacity = max(1, bloom_capacity // max(1, buckets))
+        self.bloom_fp_rate = bloom_fp_rate
+        self._clock = clock
+        self._buckets: Deque[Tuple[int, _Bucket]] = deque()
+        self.claimed = 0
+        self.replayed = 0
+
+    def _new_bucket(self) -> _Bucket:
+        if self.mode == "bloom":
+            return BloomFilter(self.bloom_capacity, self.bloom_fp_rate)
+        return set()
+
+    def _current(self) -> _Bucket:
+        idx = int(self._clock() // self.bucket_s)
+        if not self._buckets or self._buckets[-1][0] != idx:
+            self._buckets.append((idx, self._new_bucket()))
+        # 오래된 버킷은 통째로 버림
+        while self._buckets and self._buckets[0][0] <= idx - self.max_buckets:
+            self._buckets.popleft()
+        return self._buckets[-1][1]
+
+    def claim(self, nonce: str) -> bool:
+        """처음 보는 nonce면 기록하고 True, window 안에서 이미 쓰인 nonce면 False."""
+        current = self._current()
+        for _, bucket in self._buckets:
+            if nonce in bucket:
+                self.replayed += 1
+                return False
+        current.add(nonce)
+        self.claimed += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "buckets": len(self._buckets),
+            "entries": sum(len(b) for _, b in self._buckets),  # type: ignore[arg-type]
+            "claimed": self.claimed,
+            "replayed": self.replayed,
+        }
@@ -1,13 +1,17 @@
+import atexit
 import contextvars
 import logging
+import logging.handlers
+import queue
+import random
 import sys
 import time
 import uuid
-from typing import Callable, Optional
+from typing import Any, Dict, MutableMapping, Optional, Tuple
 
-from fastapi import FastAPI, Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from fastapi import FastAPI
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 # 요청별 상관관계 ID(Request ID)를 contextvar로 보관
 _request_id_ctx: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="")
@@ -16,12 +20,49 @@ _request_id_ctx: contextvars.ContextVar[str] = contextvars.ContextVar("request_i
 # ----------------------------
 # 로깅 설정
 # ----------------------------
-def setup_logging(level: str = "INFO", json: bool = True) -> None:
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    이벤트 루프 스레드에서는 레코드를 큐에 넣기만 한다.
+    - 포맷(메시지 병합/JSON 직렬화/트레이스백 문자열화)과 stdout 쓰기는 리스너 스레드에서
+    - 큐가 가득 차면 기다리지 않고 버린 뒤 dropped를 센다
+    """
+
+    def __init__(self, q: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 같은 프로세스 안의 큐라 피클링용 사전 포맷이 필요 없음
+        # (args로 넘긴 객체를 로그 직후 변경하면 변경된 값이 찍힐 수 있음)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _DrainingQueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # 큐가 가득 차 있어도 종료 신호는 버리지 않고 리스너가 비울 때까지 대기
+        self.queue.put(self._sentinel)  # type: ignore[attr-defined]
+
+
+_queue_handler: Optional[_DroppingQueueHandler] = None
+_listener: Optional[_DrainingQueueListener] = None
+
+
+def setup_logging(level: str = "INFO", json: bool = True, *, queue_size: int = 10_000) -> None:
     """
     애플리케이션 전역 로깅 초기화.
     - json=True면 python-json-logger가 있으면 JSON 포맷, 없으면 기본 포맷
+    - 루트 로거에는 큐 핸들러만 달고, 실제 포맷/출력은 QueueListener 스레드가 담당
     - uvicorn 기본 로거도 동일 레벨로 맞춤
     """
+    global _queue_handler, _listener
+    # 재호출 시 이전 리스너는 남은 레코드를 비우고 종료
+    shutdown_logging()
     root = logging.getLogger()
     # 중복 핸들러 방지
     for h in list(root.handlers):
@@ -54,19 +95,78 @@ def setup_logging(level: str = "INFO", json: bool = True) -> None:
             )
         )
 
-    root.addHandler(handler)
+    # shutdown_logging() 이후 직접 기록으로 돌아갔을 때용
+    handler.addFilter(_RequestIdFilter())
+    _queue_handler = _DroppingQueueHandler(queue.Queue(maxsize=max(1, queue_size)))
+    # request_id는 contextvar라 로그를 남기는 스레드(큐 핸들러 쪽)에서 채워야 함
+    _queue_handler.addFilter(_RequestIdFilter())
+    root.addHandler(_queue_handler)
+    _listener = _DrainingQueueListener(_queue_handler.queue, handler)
+    _listener.start()
 
     # uvicorn 로거 레벨 동기화
     for logger_name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
         logging.getLogger(logger_name).setLevel(level_value)
 
 
+def shutdown_logging() -> None:
+    """
+    리스너 스레드를 멈추고 큐에 남은 레코드를 모두 출력 (종료 시/재설정 시).
+    이후 로그는 출력 핸들러에 직접 기록 (동기 방식으로 복귀).
+    """
+    global _queue_handler, _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    root = logging.getLogger()
+    if _queue_handler in root.handlers:
+        root.removeHandler(_queue_handler)
+        for handler in _listener.handlers:
+            root.addHandler(handler)
+    _queue_handler = None
+    _listener = None
+
+
+def logging_stats() -> Dict[str, Any]:
+    if _queue_handler is None:
+        return {"queued": 0, "capacity": 0, "dropped": 0}
+    q = _queue_handler.queue
+    return {
+        "queued": q.qsize(),  # type: ignore[attr-defined]
+        "capacity": q.maxsize,  # type: ignore[attr-defined]
+        "dropped": _queue_handler.dropped,
+    }
+
+
+atexit.register(shutdown_logging)
+
+
+class _RequestIdFilter(logging.Filter):
+    """request_id가 없는 레코드(서드파티 로거 포함)에 현재 요청 ID를 채운다 (포맷 오류 방지)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "request_id", None):
+            record.request_id = current_request_id() or "-"
+        return True
+
+
+class _ContextAdapter(logging.LoggerAdapter):
+    """
+    호출 측 extra를 유지하는 어댑터 (request_id는 핸들러 필터가 로그 시점에 채움).
+    기본 LoggerAdapter는 생성 시점의 extra로 호출 측 extra를 통째로 덮어쓴다.
+    """
+
+    def process(self, msg: Any, kwargs: MutableMapping[str, Any]) -> Tuple[Any, Any]:
+        kwargs["extra"] = {**(self.extra or {}), **(kwargs.get("extra") or {})}
+        return msg, kwargs
+
+
 def get_logger(name: Optional[str] = None) -> logging.LoggerAdapter:
     """
     logger 어댑터를 반환하여 모든 로그에 request_id 필드를 자동 주입.
     """
     base_logger = logging.getLogger(name or __name__)
-    return logging.LoggerAdapter(base_logger, {"request_id": current_request_id()})
+    return _ContextAdapter(base_logger, {})
 
 
 def current_request_id() -> str:
@@ -80,11 +180,20 @@ def _set_request_id(value: str) -> None:
 # ----------------------------
 # 미들웨어
 # ----------------------------
-class RequestContextMiddleware(BaseHTTPMiddleware):
+# 요청 로그를 남기지 않는 경로 (하위 경로 포함: /healthz/bridge 등)
+DEFAULT_SKIP_PATHS = ("/healthz", "/metrics")
+
+
+class RequestContextMiddleware:
     """
-    - 요청에 X-Request-ID 없으면 생성하여 헤더/컨텍스트에 주입
+    순수 ASGI 미들웨어 (BaseHTTPMiddleware의 태스크/메모리 스트림 경유 없음).
+    - 요청에 X-Request-ID 없으면 생성하여 헤더/컨텍스트에 주입 (HTTP 응답 + WebSocket accept)
     - 요청/응답의 핵심 정보(메서드, 경로, 상태코드, 지연시간)를 구조화 로깅
-    - /healthz 등 잡음 많은 경로는 스킵 가능
+      지연시간은 스트리밍 응답이면 마지막 청크까지, WebSocket이면 연결 종료까지
+    - /healthz, /metrics 등 잡음 많은 경로는 스킵 (skip_paths의 경로와 그 하위 경로)
+    - 요청 단위로 sample_rate 비율만 표본으로 뽑아 "request start"/"request end"를 짝지어 남기고,
+      5xx/예외와 slow_ms 이상 걸린 요청은 표본이 아니어도 "request end"를 남긴다
+      (log_start=False면 "request start"는 남기지 않음)
     """
 
     def __init__(
@@ -92,36 +201,72 @@ class RequestContextMiddleware(BaseHTTPMiddleware):
         app: ASGIApp,
         *,
         skip_paths: Optional[set[str]] = None,
-        logger: Optional[logging.Logger] = None,
+        logger: Optional[logging.LoggerAdapter] = None,
+        sample_rate: float = 1.0,
+        slow_ms: int = 1000,
+        log_start: bool = True,
     ) -> None:
-        super().__init__(app)
-        self.skip_paths = skip_paths or {"/healthz"}
+        self.app = app
+        self.skip_paths = set(DEFAULT_SKIP_PATHS) if skip_paths is None else skip_paths
         self._logger = logger or get_logger("request")
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.log_start = log_start
+
+    def _skipped(self, path: str) -> bool:
+        return any(path == p or path.startswith(p.rstrip("/") + "/") for p in self.skip_paths)
+
+    def _sampled(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:  # type: ignore[override]
-        # Request ID 설정
-        request_id = request.headers.get("X-Request-ID") or _gen_request_id()
-        _set_request_id(request_id)
+    def _should_log_end(self, sampled: bool, status_code: Optional[int], latency_ms: int) -> bool:
+        if (status_code or 0) >= 500 or latency_ms >= self.slow_ms:
+            return True
+        return sampled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        # Request ID 설정 (라우트/서비스 코드는 같은 태스크에서 실행되므로 contextvar가 그대로 보임)
+        request_id = Headers(scope=scope).get("x-request-id") or _gen_request_id()
+        token = _request_id_ctx.set(request_id)
 
         # 시간 측정
         start = time.perf_counter()
-        method = request.method
-        path = request.url.path
+        method = scope.get("method", "WEBSOCKET")
+        path = scope["path"]
+        logged = not self._skipped(path)
+        # 표본 여부는 시작 시 한 번 정해 start/end 로그가 짝을 이루게 함
+        sampled = logged and self._sampled()
+        status_code: Optional[int] = None
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                if "x-request-id" not in headers:
+                    headers.append("X-Request-ID", request_id)
+            elif message["type"] == "websocket.accept":
+                status_code = 101
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-request-id", request_id.encode("latin-1")),
+                ]
+            elif message["type"] == "websocket.close" and status_code is None:
+                status_code = 403  # accept 전에 닫힘
+            await send(message)
 
-        if path not in self.skip_paths:
+        if sampled and self.log_start:
             self._logger.info(
                 "request start",
-                extra={
-                    "method": method,
-                    "path": path,
-                    "status_code": None,
-                    "latency_ms": None,
-                    "request_id": request_id,
-                },
+                extra={"method": method, "path": path, "status_code": None, "latency_ms": None},
             )
 
         try:
-            response: Response = await call_next(request)
+            await self.app(scope, receive, send_with_request_id)
         except Exception:
             latency_ms = int((time.perf_counter() - start) * 1000)
             self._logger.exception(
@@ -131,28 +276,24 @@ class RequestContextMiddleware(BaseHTTPMiddleware):
                     "path": path,
                     "status_code": 500,
                     "latency_ms": latency_ms,
-                    "request_id": request_id,
                 },
             )
             raise
-
-        # 응답 헤더에 Request ID 반영
-        response.headers.setdefault("X-Request-ID", request_id)
-
-        latency_ms = int((time.perf_counter() - start) * 1000)
-        if path not in self.skip_paths:
-            self._logger.info(
-                "request end",
-                extra={
-                    "method": method,
-                    "path": path,
-                    "status_code": getattr(response, "status_code", None),
-                    "latency_ms": latency_ms,
-                    "request_id": request_id,
-                },
-            )
-
-        return response
+        else:
+            latency_ms = int((time.perf_counter() - start) * 1000)
+            if logged and self._should_log_end(sampled, status_code, latency_ms):
+                self._logger.log(
+                    logging.WARNING if (status_code or 0) >= 500 else logging.INFO,
+                    "request end",
+                    extra={
+                        "method": method,
+                        "path": path,
+                        "status_code": status_code,
+                        "latency_ms": latency_ms,
+                    },
+                )
+        finally:
+            _request_id_ctx.reset(token)
 
 
 def _gen_request_id() -> str:
@@ -162,14 +303,30 @@ def _gen_request_id() -> str:
 # ----------------------------
 # FastAPI에 붙이는 헬퍼
 # ----------------------------
-def add_observability(app: FastAPI, *, log_level: str = "INFO", json: bool = True) -> None:
+def add_observability(
+    app: FastAPI,
+    *,
+    log_level: str = "INFO",
+    json: bool = True,
+    queue_size: int = 10_000,
+    sample_rate: float = 1.0,
+    slow_ms: int = 1000,
+    log_start: bool = True,
+    skip_paths: Optional[set[str]] = None,
+) -> None:
     """
     애플리케이션 시작 시 한 번 호출하여:
-    - 로깅 초기화
+    - 로깅 초기화 (큐 + 리스너 스레드)
     - 요청 컨텍스트/로깅 미들웨어 장착
     """
-    setup_logging(level=log_level, json=json)
+    setup_logging(level=log_level, json=json, queue_size=queue_size)
     # 올바른 등록 방법: add_middleware 사용
-    app.add_middleware(RequestContextMiddleware)
+    app.add_middleware(
+        RequestContextMiddleware,
+        skip_paths=skip_paths,
+        sample_rate=sample_rate,
+        slow_ms=slow_ms,
+        log_start=log_start,
+    )
     logger = get_logger("startup")
     logger.info("observability initialized", extra={"request_id": current_request_id() or "-"})
@@ -0,0 +1,104 @@
+# app/core/prompts.py
+"""
+프롬프트/페르소나 레지스트리.
+
+긴 프롬프트 텍스트는 내용 해시로 한 번만 워커에 등록하고, 요청에는 해시와 가변 필드만 싣는다.
+  - 등록(연결마다 1회): {"type": "register_prompts", "prompts": {hash: text, ...}}  (응답 없음)
+  - 요청 payload     : {"prompt_refs": {"system": h, "template": h, <필드명>: h, ...},
+                        "prompt_vars": {<필드명>: 값, ...}, ...}
+    렌더링 규칙: system_prompt = text[system]
+                user_prompt   = text[template].format(**prompt_vars, <필드명>=text[h], ...)
+  - 워커가 모르는 해시: {"request_id", "error": "prompt_miss", "missing_prompts": [h, ...]}
+    → 서버가 해당 해시를 다시 등록하고 한 번 재전송
+
+"prompts" 능력을 공지하지 않은 워커에는 서버가 렌더링한 user_prompt/system_prompt를 그대로 보낸다.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Any, Callable, Dict, Iterable
+
+from app.core.cache import TTLCache
+
+# 워커가 이 능력을 공지하면 해시 참조 형식으로 전송
+PROMPTS_CAPABILITY = "prompts"
+
+PROMPT_REFS = "prompt_refs"
+PROMPT_VARS = "prompt_vars"
+
+
+class PromptMiss(Exception):
+    """워커가 등록되지 않은 프롬프트 해시를 받았을 때 (재등록 후 재전송 대상)."""
+
+    def __init__(self, missing: Iterable[str]):
+        self.missing = [str(h) for h in missing]
+        super().__init__(f"Prompt not registered on worker: {', '.join(self.missing)}")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class PromptRegistry:
+    """
+    해시 → 텍스트.
+    - 고정 프롬프트(시스템 프롬프트/사용자 템플릿): register_static, 만료/제거 없이 보관
+    - 요청마다 들어오는 페르소나 등: register, TTL + LRU로 크기 제한
+      (요청을 만들 때마다 다시 등록되어 만료가 연장되므로 사용 중인 항목은 유지됨)
+    저장소가 분리되어 있어 페르소나가 아무리 많아도 고정 프롬프트는 밀려나지 않는다.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_s: float = 3600.0,
+        max_entries: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._static: Dict[str, str] = {}
+        self._texts = TTLCache(
+            ttl_s=ttl_s, max_entries=max_entries, max_bytes=64 * 1024 * 1024, clock=clock
+        )
+
+    def register_static(self, text: str) -> str:
+        key = content_hash(text)
+        self._static[key] = text
+        return key
+
+    def register(self, text: str) -> str:
+        key = content_hash(text)
+        if key not in self._static:
+            self._texts.set(key, text)
+        return key
+
+    def update(self, prompts: Dict[str, str]) -> None:
+        # 다른 프로세스에서 넘어온 요청에 딸린 텍스트 (해시는 내용에서 다시 계산)
+        for text in prompts.values():
+            self.register(str(text))
+
+    def get(self, key: str) -> str:
+        text = self._static.get(key)
+        if text is None:
+            text = self._texts.get(key)
+        if text is None:
+            raise PromptMiss([key])
+        return text
+
+    def texts_for(self, payload: Dict[str, Any]) -> Dict[str, str]:
+        return {h: self.get(h) for h in (payload.get(PROMPT_REFS) or {}).values()}
+
+    def expand(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """해시 참조 payload → user_prompt/system_prompt 전체 텍스트 payload (구형 워커용)."""
+        refs = dict(payload[PROMPT_REFS])
+        system = self.get(refs.pop("system"))
+        template = self.get(refs.pop("template"))
+        fields = {name: self.get(h) for name, h in refs.items()}
+        expanded = {k: v for k, v in payload.items() if k not in (PROMPT_REFS, PROMPT_VARS)}
+        expanded["user_prompt"] = template.format(**(payload.get(PROMPT_VARS) or {}), **fields)
+        expanded["system_prompt"] = system
+        return expanded
+
+
+prompt_registry = PromptRegistry()
@@ -0,0 +1,82 @@
+# app/core/ratelimit.py
+"""
+GCRA(Generic Cell Rate Algorithm) 레이트리미터.
+- 키마다 TAT(이론적 도착 시각) 실수 하나만 저장 → O(1) 상태
+- 고정 윈도우와 달리 윈도우 경계에서 2배 버스트가 생기지 않음 (최대 버스트 = rate)
+- TAT가 현재 시각보다 과거인 키는 새 키와 같으므로 주기적으로 통째로 제거
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rate: int  # per초 동안 허용할 요청 수
+    per: float  # 초
+
+    @property
+    def interval(self) -> float:
+        return self.per / max(1, self.rate)
+
+
+class GCRALimiter:
+    def __init__(
+        self,
+        *,
+        max_keys: int = 100_000,
+        sweep_interval_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_keys = max_keys
+        self.sweep_interval_s = sweep_interval_s
+        self._clock = clock
+        # key : TAT
+        self._tat: Dict[str, float] = {}
+        self._next_sweep = clock() + sweep_interval_s
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    def hit(self, key: str, limit: RateLimit, cost: int = 1) -> Tuple[bool, float]:
+        """(허용 여부, 거절 시 다시 시도할 수 있을 때까지 남은 초)."""
+        now = self._clock()
+        if now >= self._next_sweep or len(self._tat) >= self.max_keys:
+            self._sweep(now)
+
+        tat = max(self._tat.get(key, now), now)
+        new_tat = tat + limit.interval * cost
+        allow_at = new_tat - limit.per
+        if allow_at > now:
+            self.limited += 1
+            return False, allow_at - now
+        self._tat[key] = new_tat
+        self.allowed += 1
+        return True, 0.0
+
+    def _sweep(self, now: float) -> None:
+        self._next_sweep = now + self.sweep_interval_s
+        idle = [k for k, tat in self._tat.items() if tat <= now]
+        for k in idle:
+            del self._tat[k]
+        self.evicted += len(idle)
+        # 그래도 넘치면 먼저 들어온 키부터 90%까지 버림 (버린 키는 한도가 느슨해지는 쪽으로만 틀림)
+        overflow = len(self._tat) - self.max_keys * 9 // 10
+        if len(self._tat) >= self.max_keys and overflow > 0:
+            for k in list(self._tat)[:overflow]:
+                del self._tat[k]
+            self.evicted += overflow
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._tat),
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "evicted": self.evicted,
+        }
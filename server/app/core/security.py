@@ -3,12 +3,21 @@ from __future__ import annotations
 import base64
 import hashlib
 import hmac
+import math
 import os
 import time
+from collections import deque
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, cast
 
 from fastapi import Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics, tracing
+from app.core.nonce import NonceStore
+from app.core.ratelimit import GCRALimiter, RateLimit
 
 # 선택적으로 settings를 사용할 수 있으면 사용
 try:
@@ -46,7 +55,7 @@ HMAC_SECRET: Optional[str] = _read_str_env("SERVER_HMAC_SECRET", None)
 # 허용 타임스큐(초) – 서명된 요청의 유효 시간창
 HMAC_ALLOWED_SKEW: int = int(_read_str_env("HMAC_ALLOWED_SKEW", "300") or "300")
 
-# 개발용 레이트리밋 (기본: 60req/60s)
+# 기본 레이트리밋 (기본: 60req/60s)
 RL_DEFAULT_RATE = int(_read_str_env("RL_DEFAULT_RATE", "60") or "60")
 RL_DEFAULT_PER = int(_read_str_env("RL_DEFAULT_PER", "60") or "60")
 
@@ -75,8 +84,12 @@ def _hmac_sign(secret: str, body: bytes, ts: str, nonce: str) -> bytes:
     sign_input = ts + "\n" + nonce + "\n" + sha256(body).hexdigest()
     signature = HMAC_SHA256(secret, sign_input)
     """
-    body_hash = hashlib.sha256(body).hexdigest()
-    sign_input = f"{ts}\n{nonce}\n{body_hash}".encode("utf-8")
+    return _hmac_sign_digest(secret, hashlib.sha256(body).hexdigest(), ts, nonce)
+
+
+def _hmac_sign_digest(secret: str, body_sha256: str, ts: str, nonce: str) -> bytes:
+    """바디 해시를 이미 알고 있을 때 (미들웨어가 청크 단위로 계산)."""
+    sign_input = f"{ts}\n{nonce}\n{body_sha256}".encode("utf-8")
     return hmac.new(secret.encode("utf-8"), sign_input, hashlib.sha256).digest()
 
 
@@ -101,20 +114,21 @@ def _decode_signature(sig: str) -> bytes:
 
 
 def verify_hmac_headers(
-    request: Request,
+    headers: Mapping[str, str],
     *,
     secret: str,
+    body_sha256: str,
     allowed_skew: int = HMAC_ALLOWED_SKEW,
 ) -> SecurityContext:
     """
     HMAC 헤더 검증:
       - X-Timestamp: 현재 시간과의 차이 <= allowed_skew
-      - X-Nonce: 존재만 체크(실제 운영에선 캐시 저장하여 재사용 거부 권장)
-      - X-Signature: 서버 계산값과 동일해야 함
+      - X-Nonce: 8자 이상 (재사용 여부는 서명 확인 후 NonceGuard에서 판단)
+      - X-Signature: 서버 계산값과 동일해야 함 (body_sha256: 요청 바디 전체의 sha256 hex)
     """
-    ts = request.headers.get(HEADER_TIMESTAMP)
-    nonce = request.headers.get(HEADER_NONCE)
-    sig = request.headers.get(HEADER_SIGNATURE)
+    ts = headers.get(HEADER_TIMESTAMP)
+    nonce = headers.get(HEADER_NONCE)
+    sig = headers.get(HEADER_SIGNATURE)
 
     if not ts or not nonce or not sig:
         raise HTTPException(
@@ -135,16 +149,11 @@ def verify_hmac_headers(
     if abs(now - ts_i) > allowed_skew:
         raise HTTPException(status_code=401, detail="Request timestamp is out of allowed window.")
 
-    # 논스 재사용 방지(간단 구현: 존재 체크만) — 실제 운영에선 Redis 등으로 nonce 캐시
     if len(nonce) < 8:
         raise HTTPException(status_code=400, detail="X-Nonce too short (>= 8 required).")
 
-    # 바디 바이트 획득(계산을 위해 다시 읽음)
-    # FastAPI/Starlette의 요청 바디는 스트림이므로, receive를 래핑하여 복원
-    body = _read_and_restore_body(request)
-
     client_sig = _decode_signature(sig)
-    server_sig = _hmac_sign(secret=secret, body=body, ts=ts, nonce=nonce)
+    server_sig = _hmac_sign_digest(secret=secret, body_sha256=body_sha256, ts=ts, nonce=nonce)
 
     # 타이밍 공격 완화: hmac.compare_digest
     if not hmac.compare_digest(client_sig, server_sig):
@@ -156,22 +165,25 @@ def verify_hmac_headers(
 async def api_key_or_hmac_dependency(request: Request) -> SecurityContext:
     """
     FastAPI 의존성:
-      1) HMAC_SECRET이 설정되어 있으면 HMAC 우선 검증
+      1) HMAC_SECRET이 설정되어 있으면 HMAC 우선 — 검증 자체는 HMACBodyMiddleware가
+         라우트 실행 전에 끝내고 결과를 request.state.security에 남긴다
       2) 아니면 SERVER_API_KEY가 설정되어 있으면 API Key 검증
       3) 둘 다 없으면 인증 생략(개발 편의) — 운영에서는 반드시 최소 하나 설정 권장
     """
     # HMAC 우선
     if HMAC_SECRET:
-        try:
-            return verify_hmac_headers(request, secret=HMAC_SECRET, allowed_skew=HMAC_ALLOWED_SKEW)
-        except HTTPException as e:
-            # HMAC이 설정되어 있으면 실패 시 바로 거부
-            raise e
+        ctx = getattr(request.state, "security", None)
+        if ctx is None:
+            # 미들웨어 보호 경로 밖이거나 미들웨어가 장착되지 않은 경우 — 통과시키지 않음
+            raise HTTPException(status_code=401, detail="HMAC verification required.")
+        return ctx
 
     # API KEY 대안
     if API_KEY_VALUE:
         api_key = request.headers.get(HEADER_API_KEY)
-        if not api_key or not hmac.compare_digest(api_key, API_KEY_VALUE):
+        with tracing.span("auth"):
+            valid = bool(api_key) and hmac.compare_digest(cast(str, api_key), API_KEY_VALUE)
+        if not valid:
             raise HTTPException(status_code=401, detail="Invalid or missing API Key.")
         return SecurityContext(principal="api_key", method="api_key")
 
@@ -180,111 +192,256 @@ async def api_key_or_hmac_dependency(request: Request) -> SecurityContext:
 
 
 # ----------------------------
-# 인메모리 레이트리밋 (개발용)
+# 바디 스트리밍 검증 (순수 ASGI 미들웨어)
 # ----------------------------
-class InMemoryRateLimiter:
+class HMACBodyMiddleware:
     """
-    아주 단순한 개발용 레이트리미터(토큰 버킷 유사).
-    - 프로세스 메모리 기반이므로 멀티인스턴스/재시작 환경에선 적합하지 않음.
-    - 운영에선 Redis + lua 스크립트, Nginx/Cloudflare, 또는 API Gateway 권장.
+    - 모든 HTTP 요청: Content-Length 또는 실제 수신량이 max_body_bytes를 넘으면 즉시 413
+      (pydantic 파싱 전, 바디를 끝까지 받기 전에 거절)
+    - HMAC 보호 경로: 바디 청크를 도착하는 대로 sha256에 넣고 청크 객체만 보관(이어붙이지 않음),
+      끝까지 받으면 서명/타임스큐/nonce를 검증한 뒤 보관한 청크를 그대로 하위 앱에 재생
+    - 검증 실패는 라우트를 실행하지 않고 여기서 응답 (의존성과 같은 {"detail": ...} 형식)
     """
 
-    def __init__(self) -> None:
-        # key -> (window_start_epoch, count)
-        self._store: dict[str, Tuple[int, int]] = {}
-
-    def allow(self, key: str, *, rate: int = RL_DEFAULT_RATE, per: int = RL_DEFAULT_PER) -> bool:
-        now = int(time.time())
-        window_start = now - (now % per)
-
-        start, cnt = self._store.get(key, (window_start, 0))
-        if start != window_start:
-            # 새 윈도우 시작
-            start, cnt = window_start, 0
-
-        if cnt + 1 > rate:
-            self._store[key] = (start, cnt)  # 유지
-            return False
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        secret: Optional[str] = None,
+        allowed_skew: int = HMAC_ALLOWED_SKEW,
+        max_body_bytes: int = 1024 * 1024,
+        protected_prefixes: Sequence[str] = ("/v1/",),
+    ) -> None:
+        self.app = app
+        self.secret = secret
+        self.allowed_skew = allowed_skew
+        self.max_body_bytes = max_body_bytes
+        self.protected_prefixes = tuple(protected_prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        length = headers.get("content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_body_bytes:
+            await self._reject(scope, receive, send, self._too_large())
+            return
+
+        if self.secret and scope["path"].startswith(self.protected_prefixes):
+            await self._verify_and_replay(scope, receive, send, headers)
+            return
+
+        await self.app(scope, self._limited(receive), send)
+
+    def _limited(self, receive: Receive) -> Receive:
+        """바디를 버퍼링 없이 통과시키며 누적 크기만 센다 (Content-Length 없는 청크 전송 대비)."""
+        received = 0
+
+        async def wrapped() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    # 라우트의 request.body() 안에서 발생 → 예외 처리기가 413 응답
+                    raise self._too_large()
+            return message
 
-        self._store[key] = (start, cnt + 1)
-        return True
+        return wrapped
+
+    async def _verify_and_replay(
+        self, scope: Scope, receive: Receive, send: Send, headers: Headers
+    ) -> None:
+        digest = hashlib.sha256()
+        chunks: List[Message] = []
+        received = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunk = message.get("body", b"")
+            received += len(chunk)
+            if received > self.max_body_bytes:
+                await self._reject(scope, receive, send, self._too_large())
+                return
+            digest.update(chunk)
+            chunks.append(message)
+            if not message.get("more_body", False):
+                break
 
+        try:
+            # 바디 수신 시간은 제외하고 서명 검증 + nonce 확인만 auth 단계로 측정
+            with tracing.span("auth"):
+                ctx = verify_hmac_headers(
+                    headers,
+                    secret=cast(str, self.secret),
+                    body_sha256=digest.hexdigest(),
+                    allowed_skew=self.allowed_skew,
+                )
+                # 서명이 맞는 요청만 nonce를 소모 (위조 요청으로 남의 nonce를 선점할 수 없게)
+                if not await _nonce_guard.claim(headers[HEADER_NONCE]):
+                    raise HTTPException(status_code=401, detail="Replayed X-Nonce.")
+        except HTTPException as exc:
+            await self._reject(scope, receive, send, exc)
+            return
+        scope.setdefault("state", {})["security"] = ctx
+
+        pending = deque(chunks)
+
+        async def replay() -> Message:
+            if pending:
+                return pending.popleft()
+            return await receive()
+
+        await self.app(scope, replay, send)
+
+    def _too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=413, detail=f"Request body too large (>{self.max_body_bytes} bytes)"
+        )
 
-_rate_limiter = InMemoryRateLimiter()
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, exc: HTTPException) -> None:
+        response = JSONResponse(
+            {"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers
+        )
+        await response(scope, receive, send)
 
 
-async def rate_limit_dependency(
-    request: Request,
-    ctx: SecurityContext = Depends(api_key_or_hmac_dependency),
-) -> SecurityContext:
+# ----------------------------
+# nonce 재사용 거부 (프로세스 간 공유)
+# ----------------------------
+class NonceGuard:
     """
-    라우터에서 Depends로 추가하여 레이트리밋 적용.
-    기본: 클라이언트 식별자 + 경로 조합으로 분당 60회.
+    HMAC nonce 재사용 검사.
+    - 타임스탬프가 [now - skew, now + skew] 안이면 통과하므로, 처음 본 시각부터 2 * skew 동안 기억
+    - 공유 저장소(로컬 브로커/Redis)가 있으면 모든 프로세스가 같은 nonce 집합을 보고,
+      응답하지 않으면 프로세스 로컬 저장소로 대신 판단 (레이트리밋과 같은 가용성 우선 정책)
     """
-    # 식별자 키 (인증 방식에 따라)
-    client = ctx.principal
-    if client == "anonymous":
-        # 인증 미사용 시, IP 기반(신뢰 낮음)
-        client = request.client.host if request.client else "unknown"
-
-    key = f"{client}:{request.url.path}"
-    if not _rate_limiter.allow(key):
-        raise HTTPException(status_code=429, detail="Rate limit exceeded. Slow down.")
-    return ctx
+
+    def __init__(
+        self,
+        *,
+        allowed_skew: int = HMAC_ALLOWED_SKEW,
+        store: Optional[Callable[[], Any]] = None,
+        **options: Any,
+    ) -> None:
+        self.window_s = float(2 * allowed_skew)
+        self._store = store
+        self.local = NonceStore(window_s=self.window_s, **options)
+        self.shared_errors = 0
+
+    async def claim(self, nonce: str) -> bool:
+        store = self._store() if self._store else None
+        if store is not None:
+            try:
+                return await store.claim_nonce(nonce, self.window_s)
+            except Exception:
+                self.shared_errors += 1
+        return self.local.claim(nonce)
 
 
 # ----------------------------
-# 내부 유틸
+# 레이트리밋 (GCRA, 프로세스 간 공유)
 # ----------------------------
-def _read_and_restore_body(request: Request) -> bytes:
-    """
-    Request body를 읽고, 이후 라우터에서 다시 읽을 수 있도록 복원.
-    """
-    if not hasattr(request.state, "_cached_body"):
-        # 원본 receive 저장
-        receive_ = request.receive
+def _limits_setting(name: str) -> Dict[str, RateLimit]:
+    raw = getattr(settings, name, None) or {}
+    return {key: RateLimit(int(rate), float(per)) for key, (rate, per) in raw.items()}
 
-        async def receive_wrapper():
-            message = await receive_()
-            if message["type"] == "http.request":
-                body = message.get("body", b"") or b""
-                more_body = message.get("more_body", False)
-                # 캐시
-                if not hasattr(request.state, "_cached_body"):
-                    request.state._cached_body = body
-                else:
-                    request.state._cached_body += body
-                return {"type": "http.request", "body": body, "more_body": more_body}
-            return message
 
-        request._receive = receive_wrapper  # type: ignore[attr-defined]
+class RateLimiter:
+    """
+    GCRA 기반 레이트리미터.
+    - 공유 저장소(브리지 디스패치 백엔드: 로컬 브로커/Redis)가 있으면 모든 프로세스가 한도를 공유
+    - 공유 저장소가 없거나 응답하지 않으면 프로세스 로컬 상태로 대신 판단 (가용성 우선)
+    - 한도: 주체별 > 경로별 > 기본값 순으로 결정
+    """
 
-        # body를 한 번 강제로 소비해서 캐시한다
-        # (Starlette는 body() 호출 시 내부에서 receive를 소모)
-        # 이후 라우터 단계에서 request.body()를 다시 호출해도 캐시된 값을 반환하게 됨.
-    # body()는 이미 캐시가 있으면 그대로 반환
-    # 단, 여기서는 동기 함수이므로 직접 이벤트 루프 없이 접근하지 않음.
-    # 호출자(verify_hmac_headers)에서 request.body()를 쓰지 않고 캐시를 참조하도록 구현.
-    # 캐시가 비어있으면 실제로 읽어서 채운다.
-    # 아래는 동기 함수라서, Starlette의 비동기 body()를 직접 기다릴 수 없으므로,
-    # HMAC 검증은 라우터 이전 미들웨어보다 '의존성 단계'에서 수행하는 것을 전제로 한다.
-    # → FastAPI 의존성은 비동기 컨텍스트에서 실행되므로 request.body()를 await 가능.
-    return _get_cached_body_sync_unsafe(request)
+    def __init__(
+        self,
+        *,
+        default: RateLimit = RateLimit(RL_DEFAULT_RATE, RL_DEFAULT_PER),
+        routes: Optional[Dict[str, RateLimit]] = None,
+        principals: Optional[Dict[str, RateLimit]] = None,
+        store: Optional[Callable[[], Any]] = None,
+        max_keys: int = 100_000,
+    ) -> None:
+        self.default = default
+        self.routes = routes or {}
+        self.principals = principals or {}
+        self._store = store
+        self.local = GCRALimiter(max_keys=max_keys)
+        self.shared_errors = 0
+
+    def limit_for(self, principal: str, path: str) -> RateLimit:
+        return self.principals.get(principal) or self.routes.get(path) or self.default
+
+    async def allow(self, principal: str, path: str) -> Tuple[bool, float]:
+        limit = self.limit_for(principal, path)
+        key = f"{principal}:{path}"
+        store = self._store() if self._store else None
+        if store is not None:
+            try:
+                return await store.rate_limit(key, limit.rate, limit.per)
+            except Exception:
+                self.shared_errors += 1
+        return self.local.hit(key, limit)
+
+
+def _shared_store() -> Any:
+    from app.core.bridge import ai_bridge
+
+    return ai_bridge.backend
+
+
+_rate_limiter = RateLimiter(
+    routes=_limits_setting("RL_ROUTE_LIMITS"),
+    principals=_limits_setting("RL_PRINCIPAL_LIMITS"),
+    store=_shared_store if getattr(settings, "RL_SHARED", False) else None,
+    max_keys=int(getattr(settings, "RL_MAX_KEYS", 100_000)),
+)
+
+
+_nonce_guard = NonceGuard(
+    store=_shared_store if getattr(settings, "HMAC_NONCE_SHARED", False) else None,
+    buckets=int(getattr(settings, "HMAC_NONCE_BUCKETS", 4)),
+    mode=str(getattr(settings, "HMAC_NONCE_MODE", "exact")),
+    bloom_capacity=int(getattr(settings, "HMAC_NONCE_BLOOM_CAPACITY", 1_000_000)),
+    bloom_fp_rate=float(getattr(settings, "HMAC_NONCE_BLOOM_FP_RATE", 1e-6)),
+)
+
+
+def client_identity(request: Request, ctx: SecurityContext) -> str:
+    """레이트리밋/세션 메모리에 쓰는 클라이언트 식별자 (인증 미사용 시 IP 기반, 신뢰 낮음)."""
+    if ctx.principal == "anonymous":
+        return request.client.host if request.client else "unknown"
+    return ctx.principal
 
 
-def _get_cached_body_sync_unsafe(request: Request) -> bytes:
+async def rate_limit_dependency(
+    request: Request,
+    ctx: SecurityContext = Depends(api_key_or_hmac_dependency),
+) -> SecurityContext:
     """
-    현재 state에 캐시된 body를 가능한 한 반환.
-    비동기 컨텍스트가 아니라면 request.body()를 await할 수 없으므로,
-    캐시가 없을 경우 빈 바이트를 반환(서명 입력에 빈 바디 해시 사용).
+    라우터에서 Depends로 추가하여 레이트리밋 적용.
+    기본: 클라이언트 식별자 + 경로 조합으로 분당 60회 (경로/주체별 한도는 설정으로 조정).
     """
-    cached = getattr(request.state, "_cached_body", None)
-    if cached is None:
-        # 의존성에서 최초 접근 시점엔 아직 캐시가 없을 수 있다.
-        # 가능한 해법: 라우터에서 request.body()를 먼저 await하여 캐시되도록 하거나,
-        # 클라이언트가 항상 JSON 본문을 보내도록 강제.
-        return b""
-    return cached
+    # 식별자 키 (인증 방식에 따라)
+    client = client_identity(request, ctx)
+
+    with tracing.span("rate_limit"):
+        allowed, retry_after = await _rate_limiter.allow(client, request.url.path)
+    if not allowed:
+        route = request.scope.get("route")
+        metrics.RATE_LIMITED.labels(getattr(route, "path", request.url.path)).inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded. Slow down.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+    return ctx
 
 
 # ----------------------------
@@ -0,0 +1,393 @@
+# app/core/tracing.py
+"""
+요청 단계별 시간 측정 + 스팬 기록.
+
+- TracingMiddleware: 요청마다 Trace를 만들고 (W3C traceparent 헤더가 있으면 이어받음)
+  응답 시작 시점까지 측정된 단계를 Server-Timing 헤더로 내보낸 뒤,
+  요청이 끝나면 스팬을 OTLP/JSON(ExportTraceServiceRequest)으로 내보낸다.
+    - file     : 한 줄에 요청 하나 (OpenTelemetry Collector의 otlpjson 파일 수신기 형식)
+    - otlp_http: 수집기의 /v1/traces 로 POST
+  직렬화/쓰기는 별도 스레드에서 하고, 큐가 가득 차면 버린 뒤 dropped를 센다.
+- 단계 기록:
+    with span("emotion"): ...              # 구간 측정
+    add_timing("emotion_compute", ms)      # 외부(워커)에서 보고한 시간
+    add_worker_timings("gpt", total_ms, {"compute_ms": ...})  # 브리지 왕복을 대기/연산으로 분리
+- timings(): 현재 컨텍스트(요청, 또는 child()로 나눈 배치 항목)의 단계별 누적 ms
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+SERVICE_NAME = "game-dialog-server"
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: str
+    parent_id: str
+    start_ns: int
+    end_ns: int
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class Trace:
+    """
+    요청 하나의 스팬 목록과 단계별 시간.
+    child()는 스팬 목록/trace_id는 공유하고 단계별 시간만 따로 모은다 (배치 항목별 usage).
+    """
+
+    def __init__(
+        self,
+        trace_id: str,
+        parent_id: str = "",
+        *,
+        sampled: bool = True,
+        spans: Optional[List[Span]] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.root_id = _new_span_id()
+        self.sampled = sampled
+        self.spans: List[Span] = [] if spans is None else spans
+        self.timings: Dict[str, float] = {} if timings is None else timings
+
+    def child(self) -> "Trace":
+        child = Trace(
+            self.trace_id,
+            _span_id.get() or self.root_id,
+            sampled=self.sampled,
+            spans=self.spans,
+            timings=dict(self.timings),  # 요청 단위 단계(auth, rate_limit)는 물려받음
+        )
+        child.root_id = child.parent_id
+        return child
+
+    def add(self, name: str, start_ns: int, end_ns: int, **attributes: Any) -> None:
+        parent = _span_id.get() or self.root_id
+        self.spans.append(Span(name, _new_span_id(), parent, start_ns, end_ns, attributes))
+        self.timings[name] = self.timings.get(name, 0.0) + (end_ns - start_ns) / 1e6
+
+
+_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+# 현재 열려 있는 스팬 (새 스팬의 부모)
+_span_id: contextvars.ContextVar[str] = contextvars.ContextVar("span_id", default="")
+
+
+def _new_span_id() -> str:
+    return secrets.token_hex(8)
+
+
+def current() -> Optional[Trace]:
+    return _trace.get()
+
+
+def timings() -> Dict[str, float]:
+    trace = _trace.get()
+    return dict(trace.timings) if trace is not None else {}
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+    span_id = _new_span_id()
+    parent = _span_id.get() or trace.root_id
+    token = _span_id.set(span_id)
+    start_ns = time.time_ns()
+    t0 = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        _span_id.reset(token)
+        end_ns = start_ns + (time.perf_counter_ns() - t0)
+        trace.spans.append(Span(name, span_id, parent, start_ns, end_ns, attributes))
+        trace.timings[name] = trace.timings.get(name, 0.0) + (end_ns - start_ns) / 1e6
+
+
+def add_timing(name: str, ms: float, *, end_ns: Optional[int] = None, **attributes: Any) -> None:
+    trace = _trace.get()
+    if trace is None:
+        return
+    end_ns = time.time_ns() if end_ns is None else end_ns
+    trace.add(name, end_ns - int(ms * 1e6), end_ns, **attributes)
+
+
+def add_worker_timings(stage: str, total_ms: float, worker: Dict[str, Any]) -> None:
+    """
+    브리지 왕복 시간(total_ms)을 워커가 보고한 연산 시간(compute_ms)으로 나눠
+    {stage}_queue(배칭 대기 + 전송 + 워커 대기열) / {stage}_compute 로 기록.
+    워커가 보고하지 않으면 분리할 수 없으므로 기록하지 않는다.
+    """
+    compute = _as_float(worker.get("compute_ms"))
+    if compute is None:
+        return
+    compute = min(max(compute, 0.0), total_ms)
+    attrs = {}
+    worker_queue = _as_float(worker.get("queue_ms"))
+    if worker_queue is not None:
+        attrs["worker.queue_ms"] = worker_queue
+    now = time.time_ns()
+    add_timing(f"{stage}_queue", total_ms - compute, end_ns=now - int(compute * 1e6), **attrs)
+    add_timing(f"{stage}_compute", compute, end_ns=now)
+
+
+@contextmanager
+def child() -> Iterator[None]:
+    """이 블록 안의 단계 시간은 부모 요청과 따로 모은다 (스팬은 같은 trace에 기록)."""
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+    token = _trace.set(trace.child())
+    try:
+        yield
+    finally:
+        _trace.reset(token)
+
+
+def _as_float(value: Any) -> Optional[float]:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def server_timing(values: Dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in values.items())
+
+
+def _parse_traceparent(value: Optional[str]) -> Tuple[str, str, bool]:
+    """(trace_id, parent span id, sampled). 형식이 틀리면 새 trace."""
+    parts = (value or "").strip().split("-")
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        try:
+            int(parts[1], 16), int(parts[2], 16), int(parts[3], 16)
+        except ValueError:
+            pass
+        else:
+            if parts[1] != "0" * 32:
+                return parts[1], parts[2], bool(int(parts[3], 16) & 1)
+    return secrets.token_hex(16), "", True
+
+
+# ----------------------------
+# OTLP/JSON 내보내기 (별도 스레드)
+# ----------------------------
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None]
+
+
+def otlp_request(trace: Trace, root: Span) -> Dict[str, Any]:
+    """Trace → ExportTraceServiceRequest (OTLP/JSON 인코딩)."""
+    spans = []
+    for s in (root, *trace.spans):
+        spans.append(
+            {
+                "traceId": trace.trace_id,
+                "spanId": s.span_id,
+                "parentSpanId": s.parent_id,
+                "name": s.name,
+                "kind": 2 if s is root else 1,  # SERVER / INTERNAL
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": _otlp_attributes(s.attributes),
+            }
+        )
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": _otlp_attributes(
+                        {"service.name": SERVICE_NAME, "process.pid": os.getpid()}
+                    )
+                },
+                "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": spans}],
+            }
+        ]
+    }
+
+
+class SpanExporter:
+    """
+    완료된 요청의 스팬을 큐에 넣고 별도 스레드에서 파일에 쓰거나 수집기로 보낸다.
+    - kind: "file" (path) | "otlp_http" (endpoint, 예: http://localhost:4318/v1/traces)
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        *,
+        path: str = "traces.otlp.jsonl",
+        endpoint: str = "http://localhost:4318/v1/traces",
+        queue_size: int = 1000,
+    ) -> None:
+        if kind not in ("file", "otlp_http"):
+            raise ValueError(f"unknown span exporter: {kind}")
+        self.kind = kind
+        self.path = path
+        self.endpoint = endpoint
+        self._queue: "queue.Queue[Optional[Tuple[Trace, Span]]]" = queue.Queue(
+            maxsize=max(1, queue_size)
+        )
+        self.exported = 0
+        self.dropped = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Trace, root: Span) -> None:
+        try:
+            self._queue.put_nowait((trace, root))
+        except queue.Full:
+            self.dropped += 1
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5.0)
+
+    def _run(self) -> None:
+        client = httpx.Client(timeout=5.0) if self.kind == "otlp_http" else None
+        out = open(self.path, "a", encoding="utf-8") if self.kind == "file" else None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                body = json.dumps(otlp_request(*item), separators=(",", ":"))
+                try:
+                    if out is not None:
+                        out.write(body + "\n")
+                        if self._queue.empty():
+                            out.flush()
+                    elif client is not None:
+                        client.post(
+                            self.endpoint,
+                            content=body,
+                            headers={"Content-Type": "application/json"},
+                        ).raise_for_status()
+                    self.exported += 1
+                except Exception:
+                    self.errors += 1
+        finally:
+            if out is not None:
+                out.close()
+            if client is not None:
+                client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "queued": self._queue.qsize(),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+
+def create_exporter(kind: str, **kwargs: Any) -> Optional[SpanExporter]:
+    kind = (kind or "none").lower()
+    if kind == "none":
+        return None
+    return SpanExporter(kind, **kwargs)
+
+
+# ----------------------------
+# 미들웨어
+# ----------------------------
+class TracingMiddleware:
+    """
+    순수 ASGI. 요청마다 Trace를 컨텍스트에 두고,
+    응답 시작 시 Server-Timing 헤더(그때까지 측정된 단계 + total)를 붙이고
+    끝나면 루트 스팬과 함께 내보낸다 (sample_rate 비율, 상위 traceparent가 비샘플이면 제외).
+    스트리밍 응답은 헤더가 먼저 나가므로 Server-Timing에는 그 전 단계만 담긴다.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        exporter: Optional[SpanExporter] = None,
+        sample_rate: float = 1.0,
+        server_timing: bool = True,
+    ) -> None:
+        self.app = app
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id, sampled = _parse_traceparent(Headers(scope=scope).get("traceparent"))
+        sampled = sampled and (self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+        trace = Trace(trace_id, parent_id, sampled=sampled)
+        trace_token = _trace.set(trace)
+        span_token = _span_id.set(trace.root_id)
+        start_ns = time.time_ns()
+        t0 = time.perf_counter_ns()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    values = {
+                        **trace.timings,
+                        "total": (time.perf_counter_ns() - t0) / 1e6,
+                    }
+                    MutableHeaders(scope=message).append("Server-Timing", server_timing(values))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _span_id.reset(span_token)
+            _trace.reset(trace_token)
+            if self.exporter is not None and trace.sampled:
+                route = scope.get("route")
+                root = Span(
+                    f"{scope['method']} {getattr(route, 'path', scope['path'])}",
+                    trace.root_id,
+                    parent_id,
+                    start_ns,
+                    start_ns + (time.perf_counter_ns() - t0),
+                    {
+                        "http.request.method": scope["method"],
+                        "http.route": getattr(route, "path", None),
+                        "url.path": scope["path"],
+                        "http.response.status_code": status_code,
+                    },
+                )
+                self.exporter.export(trace, root)
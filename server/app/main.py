@@ -1,13 +1,41 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
 
+from app.core.bridge import ai_bridge
 from app.core.config import settings
-from app.core.observability import add_observability
+from app.core.metrics import MetricsMiddleware, refresh_bridge_gauges, render_metrics
+from app.core.observability import add_observability, logging_stats, shutdown_logging
+from app.core.security import HMAC_ALLOWED_SKEW, HMAC_SECRET, HMACBodyMiddleware
+from app.core.tracing import TracingMiddleware, create_exporter
 from app.routers.dialog import router as dialog_router
 from app.routers.websocket import router as ws_router
+from app.services.emotion import emotion_cache
+from app.services.gpt import response_cache
+from app.services.memory import session_store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 멀티 프로세스 배포 시 다른 프로세스의 AI 워커도 쓸 수 있도록 디스패치 백엔드 접속
+    await ai_bridge.start()
+    # 세션 대화 메모리 스냅샷 복원 + 주기 저장 (SESSION_SNAPSHOT_PATH 지정 시)
+    if session_store is not None:
+        await session_store.start(
+            settings.SESSION_SNAPSHOT_PATH, settings.SESSION_SNAPSHOT_INTERVAL_S
+        )
+    yield
+    if session_store is not None:
+        await session_store.stop(settings.SESSION_SNAPSHOT_PATH)
+    await ai_bridge.stop()
+    # 큐에 남은 스팬/로그를 모두 출력
+    if app.state.span_exporter is not None:
+        app.state.span_exporter.shutdown()
+    shutdown_logging()
 
 
 def create_app() -> FastAPI:
@@ -16,8 +44,35 @@ def create_app() -> FastAPI:
         version="1.0.0",
         docs_url="/docs",
         redoc_url="/redoc",
+        lifespan=lifespan,
+    )
+
+    # 바디 크기 제한 + HMAC 서명 검증 (CORS/로깅 안쪽에서 라우트 직전에 실행)
+    app.add_middleware(
+        HMACBodyMiddleware,
+        secret=HMAC_SECRET,
+        allowed_skew=HMAC_ALLOWED_SKEW,
+        max_body_bytes=settings.MAX_BODY_BYTES,
+        protected_prefixes=settings.HMAC_PROTECTED_PREFIXES,
+    )
+
+    # 단계별 시간 측정 (Server-Timing 헤더 + 스팬 내보내기). auth 단계를 재도록 HMAC 바깥
+    app.state.span_exporter = create_exporter(
+        settings.TRACING_EXPORTER,
+        path=settings.TRACING_FILE_PATH,
+        endpoint=settings.TRACING_OTLP_ENDPOINT,
+        queue_size=settings.TRACING_QUEUE_SIZE,
+    )
+    app.add_middleware(
+        TracingMiddleware,
+        exporter=app.state.span_exporter,
+        sample_rate=settings.TRACING_SAMPLE_RATE,
+        server_timing=settings.SERVER_TIMING_ENABLED,
     )
 
+    # 요청 지연 히스토그램 (/metrics)
+    app.add_middleware(MetricsMiddleware)
+
     # CORS
     app.add_middleware(
         CORSMiddleware,
@@ -28,7 +83,16 @@ def create_app() -> FastAPI:
     )
 
     # Observability
-    add_observability(app, log_level="INFO", json=True)
+    add_observability(
+        app,
+        log_level=settings.LOG_LEVEL,
+        json=settings.LOG_JSON,
+        queue_size=settings.LOG_QUEUE_SIZE,
+        sample_rate=settings.LOG_SAMPLE_RATE,
+        slow_ms=settings.LOG_SLOW_MS,
+        log_start=settings.LOG_REQUEST_START,
+        skip_paths=set(settings.LOG_SKIP_PATHS),
+    )
 
     # Routers
     app.include_router(dialog_router)
@@ -39,6 +103,42 @@ def create_app() -> FastAPI:
     async def healthz():
         return {"status": "ok"}
 
+    # 브리지 상태 (워커별 in-flight, 대기열 깊이/상한, 거절/취소 건수)
+    @app.get("/healthz/bridge", tags=["health"])
+    async def healthz_bridge():
+        return ai_bridge.stats()
+
+    # 결과 캐시 적중률/크기
+    @app.get("/healthz/cache", tags=["health"])
+    async def healthz_cache():
+        return {
+            "emotion": emotion_cache.stats() if emotion_cache else None,
+            "dialog": response_cache.stats() if response_cache else None,
+        }
+
+    # 세션 대화 메모리 (세션 수, 요약/버린 턴, LRU 제거/유휴 만료 건수)
+    @app.get("/healthz/memory", tags=["health"])
+    async def healthz_memory():
+        return session_store.stats() if session_store is not None else None
+
+    # 로그 큐 적재량/버린 건수
+    @app.get("/healthz/logging", tags=["health"])
+    async def healthz_logging():
+        return logging_stats()
+
+    # 스팬 내보내기 상태 (TRACING_EXPORTER=none이면 null)
+    @app.get("/healthz/tracing", tags=["health"])
+    async def healthz_tracing():
+        exporter = app.state.span_exporter
+        return exporter.stats() if exporter is not None else None
+
+    # Prometheus 지표 (멀티 프로세스면 모든 프로세스 합산)
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        refresh_bridge_gauges(ai_bridge)
+        body, content_type = render_metrics()
+        return Response(body, media_type=content_type)
+
     # Root
     @app.get("/", tags=["meta"])
     async def root():
@@ -1,26 +1,43 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import time
 import uuid
-from typing import Annotated
+from contextlib import aclosing
+from typing import Annotated, Any, AsyncIterator, Awaitable, Dict, TypeVar
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 
+from app.core import metrics, tracing
+from app.core.bridge import BridgeOverloaded, ai_bridge
 from app.core.config import settings
 from app.core.observability import current_request_id, get_logger
 from app.core.security import (
     SecurityContext,
     api_key_or_hmac_dependency,
+    client_identity,
     rate_limit_dependency,
 )
-from app.schemas import DialogRequest, DialogResponse
+from app.schemas import (
+    DialogBatchItem,
+    DialogBatchRequest,
+    DialogBatchResponse,
+    DialogRequest,
+    DialogResponse,
+)
+from app.services.dialog import DialogService
 from app.services.emotion import EmotionService
 from app.services.gpt import GPTService
+from app.services.memory import remember_turn, session_context
 
 router = APIRouter(prefix="/v1/dialog", tags=["dialog"])
 
 log = get_logger(__name__)
 
+T = TypeVar("T")
+
 
 # ----------------------------
 # 의존성 주입 팩토리 (테스트/모킹 용이)
@@ -33,10 +50,59 @@ def get_gpt_service() -> GPTService:
     return GPTService()
 
 
+def get_dialog_service(
+    emotion_svc: Annotated[EmotionService, Depends(get_emotion_service)],
+    gpt_svc: Annotated[GPTService, Depends(get_gpt_service)],
+) -> DialogService:
+    return DialogService(emotion_svc, gpt_svc)
+
+
 AuthDep = Annotated[SecurityContext, Depends(api_key_or_hmac_dependency)]
 RateDep = Annotated[SecurityContext, Depends(rate_limit_dependency)]
 EmotionDep = Annotated[EmotionService, Depends(get_emotion_service)]
 GptDep = Annotated[GPTService, Depends(get_gpt_service)]
+DialogDep = Annotated[DialogService, Depends(get_dialog_service)]
+
+
+def _overloaded(e: BridgeOverloaded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"Server busy: {e}",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+# UsageInfo에 싣는 단계별 시간 (tracing에 기록된 단계 이름)
+USAGE_STAGES = (
+    "auth",
+    "rate_limit",
+    "emotion_queue",
+    "emotion_compute",
+    "gpt_queue",
+    "gpt_compute",
+    "postprocess",
+)
+
+
+def _usage(ctx: SecurityContext, *, emotion_ms: int | None, gpt_ms: int | None) -> Dict[str, Any]:
+    """단계별 시간은 현재 트레이스(요청, 배치면 항목)에 기록된 값."""
+    timings = tracing.timings()
+    usage: Dict[str, Any] = {"emotion_ms": emotion_ms, "gpt_ms": gpt_ms}
+    for stage in USAGE_STAGES:
+        ms = timings.get(stage)
+        usage[f"{stage}_ms"] = None if ms is None else round(ms, 2)
+    usage["model"] = getattr(settings, "GPT_MODEL", "unknown")
+    usage["auth"] = ctx.method
+    return usage
+
+
+def _check_input_length(payload: DialogRequest) -> None:
+    # 입력 길이 제한(서버 보호)
+    if len(payload.dialog_text) > settings.MAX_INPUT_CHARS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"dialog_text too long (>{settings.MAX_INPUT_CHARS} chars)",
+        )
 
 
 # ----------------------------
@@ -68,64 +134,83 @@ async def generate_dialog(
     request: Request,
     ctx: AuthDep,
     _rl: RateDep,
-    emotion_svc: EmotionDep,
-    gpt_svc: GptDep,
+    dialog_svc: DialogDep,
 ):
     """
     1) 감정 추론 서비스 호출
     2) GPT로 NPC 대사 생성
+       (워커가 "dialog" 능력을 지원하면 1~2를 워커 한 번 왕복으로 처리)
     3) 감정/대사/메타를 반환
     """
     req_id = current_request_id() or f"req_{uuid.uuid4().hex[:12]}"
     t0 = time.perf_counter()
 
-    # 입력 길이 제한(서버 보호)
-    if len(payload.dialog_text) > settings.MAX_INPUT_CHARS:
-        raise HTTPException(
-            status_code=413,
-            detail=f"dialog_text too long (>{settings.MAX_INPUT_CHARS} chars)",
-        )
+    _check_input_length(payload)
 
-    # 1) 감정 추론
+    # 워커 대기열이 가득 차 있으면 감정 추론부터 시작하지 않고 즉시 거절
     try:
-        emo, conf = await emotion_svc.infer(payload.dialog_text, payload.locale)
-    except Exception as e:
-        log.exception("emotion service error", extra={"request_id": req_id})
-        raise HTTPException(status_code=502, detail=f"Emotion service error: {e}")
+        ai_bridge.ensure_capacity(*dialog_svc.task_types())
+    except BridgeOverloaded as e:
+        raise _overloaded(e)
+
+    # 클라이언트가 응답 전에 연결을 끊으면 진행 중인 워커 작업까지 취소(cancel 전파)
+    return await _run_until_disconnect(
+        request,
+        _run_dialog(
+            payload,
+            ctx=ctx,
+            principal=client_identity(request, ctx),
+            dialog_svc=dialog_svc,
+            req_id=req_id,
+            t0=t0,
+        ),
+    )
 
-    # 2) GPT 대사 생성
+
+async def _run_dialog(
+    payload: DialogRequest,
+    *,
+    ctx: SecurityContext,
+    principal: str,
+    dialog_svc: DialogService,
+    req_id: str,
+    t0: float,
+) -> DialogResponse:
+    # 1~2) 감정 추론 → GPT 대사 생성 (생성 실패는 서비스에서 폴백 대사로 처리)
     try:
-        npc_line, safety = await gpt_svc.generate_line(
+        result = await dialog_svc.run(
             dialog_text=payload.dialog_text,
-            emotion=emo,
             persona=payload.npc_persona,
             game_state=payload.game_state,
             locale=payload.locale,
+            session_id=payload.session_id,
+            principal=principal,
         )
-        # 간단 가드: 차단 플래그 시 안전한 대체문구
-        if safety.get("blocked"):
-            npc_line = "그 주제는 조심스럽게 다뤄야 해요. 다른 이야기도 함께 나눠볼까요?"
+    except BridgeOverloaded as e:
+        raise _overloaded(e)
     except Exception as e:
-        log.exception("gpt service error", extra={"request_id": req_id})
-        raise HTTPException(status_code=502, detail=f"GPT service error: {e}")
+        log.exception("dialog service error", extra={"request_id": req_id})
+        raise HTTPException(status_code=502, detail=f"Dialog service error: {e}")
+
+    npc_line, safety = result.npc_line, result.safety
+    metrics.observe_stage("emotion", result.emotion_ms)
+    metrics.observe_stage("gpt", result.gpt_ms)
+    metrics.observe_safety(safety)
+    # 간단 가드: 차단 플래그 시 안전한 대체문구
+    if safety.get("blocked"):
+        npc_line = "그 주제는 조심스럽게 다뤄야 해요. 다른 이야기도 함께 나눠볼까요?"
 
     latency_ms = int((time.perf_counter() - t0) * 1000)
 
     # 3) 응답 구성
     resp = DialogResponse(
-        emotion=str(emo),
-        confidence=float(conf),
+        emotion=str(result.emotion),
+        confidence=float(result.confidence),
         npc_line=str(npc_line),
         safety=dict(safety or {}),
         latency_ms=latency_ms,
         request_id=req_id,
-        usage={
-            # 실제로는 각 서비스에서 측정값을 받아 채우는 것을 권장
-            "emotion_ms": None,
-            "gpt_ms": None,
-            "model": getattr(settings, "GPT_MODEL", "unknown"),
-            "auth": ctx.method,
-        },
+        usage=_usage(ctx, emotion_ms=result.emotion_ms, gpt_ms=result.gpt_ms),
     )
 
     log.info(
@@ -135,6 +220,226 @@ async def generate_dialog(
             "emotion": resp.emotion,
             "confidence": resp.confidence,
             "latency_ms": latency_ms,
+            "fused": result.fused,
         },
     )
     return resp
+
+
+async def _run_until_disconnect(request: Request, coro: Awaitable[T]) -> T:
+    """
+    coro를 실행하되, 그 사이 HTTP 클라이언트가 연결을 끊으면 coro를 취소한다.
+    취소는 브리지까지 전달되어 워커에 cancel 메시지가 전송된다.
+    """
+    work = asyncio.ensure_future(coro)
+
+    async def _wait_disconnect() -> None:
+        # 바디를 이미 읽은 뒤이므로 다음 메시지는 http.disconnect 뿐
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+
+    watcher = asyncio.ensure_future(_wait_disconnect())
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not work.done():
+            work.cancel()
+
+    if not work.done():
+        # cancel()은 요청만 하므로 작업이 취소를 실제로 처리(워커 cancel 전송 포함)할 때까지 대기
+        await asyncio.wait({work})
+    if work.cancelled():
+        log.info(
+            "client disconnected, dialog cancelled", extra={"request_id": current_request_id()}
+        )
+        raise HTTPException(status_code=499, detail="Client closed request")
+    return work.result()
+
+
+# ----------------------------
+# 배치: 여러 NPC 대사를 한 요청으로 생성 (컷신/군중 장면)
+# ----------------------------
+@router.post(
+    "/batch",
+    response_model=DialogBatchResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def generate_dialog_batch(
+    payload: DialogBatchRequest,
+    request: Request,
+    ctx: AuthDep,
+    _rl: RateDep,
+    dialog_svc: DialogDep,
+):
+    """
+    인증/레이트리밋/검증은 배치 전체에 한 번만 적용하고,
+    항목들은 최대 DIALOG_BATCH_CONCURRENCY개씩 동시에 처리한다.
+    항목별 실패(입력 초과 413, 대기열 포화 503, 워커 오류 502)는 전체를 실패시키지 않고
+    해당 항목의 status/error로 반환.
+    """
+    req_id = current_request_id() or f"req_{uuid.uuid4().hex[:12]}"
+    t0 = time.perf_counter()
+
+    if len(payload.items) > settings.DIALOG_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"too many items (>{settings.DIALOG_BATCH_MAX_ITEMS})",
+        )
+
+    sem = asyncio.Semaphore(max(1, settings.DIALOG_BATCH_CONCURRENCY))
+    principal = client_identity(request, ctx)
+
+    async def run_item(index: int, item: DialogRequest) -> DialogBatchItem:
+        # 항목별 usage에는 그 항목의 단계 시간만 (auth/rate_limit은 배치 전체 값)
+        with tracing.child():
+            return await _run_item(index, item)
+
+    async def _run_item(index: int, item: DialogRequest) -> DialogBatchItem:
+        async with sem:
+            try:
+                _check_input_length(item)
+                try:
+                    ai_bridge.ensure_capacity(*dialog_svc.task_types())
+                except BridgeOverloaded as e:
+                    raise _overloaded(e)
+                resp = await _run_dialog(
+                    item,
+                    ctx=ctx,
+                    principal=principal,
+                    dialog_svc=dialog_svc,
+                    req_id=f"{req_id}.{index}",
+                    t0=time.perf_counter(),
+                )
+            except HTTPException as e:
+                return DialogBatchItem(
+                    index=index, ok=False, status=e.status_code, error=str(e.detail)
+                )
+        return DialogBatchItem(index=index, ok=True, response=resp)
+
+    async def run_all() -> DialogBatchResponse:
+        results = await asyncio.gather(*(run_item(i, item) for i, item in enumerate(payload.items)))
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+        log.info(
+            "dialog batch generated",
+            extra={
+                "request_id": req_id,
+                "items": len(results),
+                "failed": sum(1 for r in results if not r.ok),
+                "latency_ms": latency_ms,
+            },
+        )
+        return DialogBatchResponse(results=list(results), request_id=req_id, latency_ms=latency_ms)
+
+    # 클라이언트가 끊으면 남은 항목(워커 작업 포함)을 모두 취소
+    return await _run_until_disconnect(request, run_all())
+
+
+# ----------------------------
+# 스트리밍: 감정 → 대사 조각 순서로 SSE 전송
+# ----------------------------
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/stream")
+async def stream_dialog(
+    payload: DialogRequest,
+    request: Request,
+    ctx: AuthDep,
+    _rl: RateDep,
+    emotion_svc: EmotionDep,
+    gpt_svc: GptDep,
+):
+    """
+    Server-Sent Events로 응답:
+      event: emotion  → {"emotion", "confidence"}
+      event: delta    → {"text"} (NPC 대사 조각, 여러 번)
+      event: replace  → {"text"} (지금까지 받은 조각을 이 문구로 대체; 안전 필터/폴백)
+      event: done     → DialogResponse 전체
+    감정 추론 실패는 스트림 시작 전에 502로, 대기열 포화는 503으로 응답.
+    대사 생성도 입장 제어를 통과한 뒤에 응답을 시작하므로 emotion 이벤트는 첫 조각과 함께 전송.
+    """
+    req_id = current_request_id() or f"req_{uuid.uuid4().hex[:12]}"
+    t0 = time.perf_counter()
+    principal = client_identity(request, ctx)
+
+    _check_input_length(payload)
+
+    try:
+        ai_bridge.ensure_capacity("emotion", "gpt")
+        with tracing.span("emotion"):
+            emo, conf = await emotion_svc.infer(payload.dialog_text, payload.locale)
+        emotion_ms = int((time.perf_counter() - t0) * 1000)
+        metrics.observe_stage("emotion", emotion_ms)
+    except BridgeOverloaded as e:
+        raise _overloaded(e)
+    except Exception as e:
+        log.exception("emotion service error", extra={"request_id": req_id})
+        raise HTTPException(status_code=502, detail=f"Emotion service error: {e}")
+
+    t_gpt = time.perf_counter()
+    events = gpt_svc.stream_line(
+        dialog_text=payload.dialog_text,
+        emotion=emo,
+        persona=payload.npc_persona,
+        game_state=payload.game_state,
+        locale=payload.locale,
+        history=session_context(principal, payload.session_id),
+    )
+    # 첫 이벤트까지 받아 두어야 대사 생성 단계의 대기열 포화도 스트림 시작 전에 503으로 응답 가능
+    try:
+        first = await anext(events)
+    except BridgeOverloaded as e:
+        raise _overloaded(e)
+
+    async def gpt_events() -> AsyncIterator[Dict[str, Any]]:
+        async with aclosing(events):
+            yield first
+            async for event in events:
+                yield event
+
+    async def event_stream() -> AsyncIterator[str]:
+        yield _sse("emotion", {"emotion": str(emo), "confidence": float(conf)})
+
+        async for event in gpt_events():
+            if event["type"] != "done":
+                yield _sse(event["type"], {"text": event["text"]})
+                continue
+
+            remember_turn(
+                principal,
+                payload.session_id,
+                payload.dialog_text,
+                str(event["npc_line"]),
+                payload.locale,
+            )
+            gpt_ms = (time.perf_counter() - t_gpt) * 1000
+            tracing.add_timing("gpt", gpt_ms)
+            metrics.observe_stage("gpt", gpt_ms)
+            metrics.observe_safety(event["safety"] or {})
+            resp = DialogResponse(
+                emotion=str(emo),
+                confidence=float(conf),
+                npc_line=str(event["npc_line"]),
+                safety=dict(event["safety"] or {}),
+                latency_ms=int((time.perf_counter() - t0) * 1000),
+                request_id=req_id,
+                usage=_usage(ctx, emotion_ms=emotion_ms, gpt_ms=int(gpt_ms)),
+            )
+            log.info(
+                "dialog streamed",
+                extra={
+                    "request_id": req_id,
+                    "emotion": resp.emotion,
+                    "confidence": resp.confidence,
+                    "latency_ms": resp.latency_ms,
+                },
+            )
+            yield _sse("done", resp.model_dump())
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
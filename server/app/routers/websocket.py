@@ -9,7 +9,10 @@ router = APIRouter()
 
 @router.websocket("/ws/ai-worker")
 async def websocket_endpoint(
-    websocket: WebSocket, x_api_key: str | None = Header(None, alias="X-Api-Key")
+    websocket: WebSocket,
+    x_api_key: str | None = Header(None, alias="X-Api-Key"),
+    x_worker_id: str | None = Header(None, alias="X-Worker-Id"),
+    x_worker_capabilities: str | None = Header(None, alias="X-Worker-Capabilities"),
 ):
     # 수정된 부분: settings 대신 os.getenv 사용
     server_api_key = os.getenv("SERVER_API_KEY")
@@ -19,10 +22,18 @@ async def websocket_endpoint(
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
-    await ai_bridge.connect(websocket)
+    # 워커는 X-Worker-Capabilities: "emotion,gpt" 형태로 처리 가능한 작업을 알린다 (없으면 전체)
+    capabilities = x_worker_capabilities.split(",") if x_worker_capabilities else None
+    # 프레임 직렬화 방식은 Sec-WebSocket-Protocol(msgpack / json-utf8 / json)로 협상
+    worker = await ai_bridge.connect(websocket, worker_id=x_worker_id, capabilities=capabilities)
     try:
         while True:
-            data = await websocket.receive_text()
-            await ai_bridge.process_message(data)
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            data = message.get("bytes")
+            if data is None:
+                data = message.get("text", "")
+            await ai_bridge.process_message(data, worker)
     except WebSocketDisconnect:
         ai_bridge.disconnect(websocket)
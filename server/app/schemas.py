@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Annotated, Any, Dict, Optional
+from typing import Annotated, Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -51,6 +51,16 @@ class DialogRequest(BaseModel):
     }
 
 
+class DialogBatchRequest(BaseModel):
+    """
+    여러 NPC의 대사를 한 번에 생성하기 위한 배치 요청 (컷신/군중 장면).
+    """
+
+    items: List[DialogRequest] = Field(
+        ..., min_length=1, description="대화 생성 요청 목록 (순서대로 결과 반환)"
+    )
+
+
 # ------------------------------------
 # Response Models
 # ------------------------------------
@@ -73,6 +83,18 @@ class UsageInfo(BaseModel):
 
     emotion_ms: int | None = Field(None, description="감정 추론 소요(ms)")
     gpt_ms: int | None = Field(None, description="GPT 호출 소요(ms)")
+    # 단계별 소요(ms). 측정하지 못한 단계(캐시 적중, 워커가 연산 시간을 보고하지 않음 등)는 None
+    auth_ms: float | None = Field(None, description="인증(API Key/HMAC 검증) 소요(ms)")
+    rate_limit_ms: float | None = Field(None, description="레이트리밋 검사 소요(ms)")
+    emotion_queue_ms: float | None = Field(
+        None, description="감정 추론 대기(배칭/전송/워커 대기열) 소요(ms)"
+    )
+    emotion_compute_ms: float | None = Field(None, description="워커의 감정 추론 연산 소요(ms)")
+    gpt_queue_ms: float | None = Field(
+        None, description="대사 생성 대기(전송/워커 대기열) 소요(ms)"
+    )
+    gpt_compute_ms: float | None = Field(None, description="워커의 대사 생성 연산 소요(ms)")
+    postprocess_ms: float | None = Field(None, description="후처리/안전 검사 소요(ms)")
     model: str | None = Field(None, description="사용된 생성 모델명")
     auth: str | None = Field(None, description="인증 방식(api_key/hmac/none)")
 
@@ -103,3 +125,25 @@ class DialogResponse(BaseModel):
             }
         }
     }
+
+
+class DialogBatchItem(BaseModel):
+    """
+    배치 요청 항목별 결과: 성공 시 response, 실패 시 status/error.
+    """
+
+    index: int = Field(..., description="요청 items 내 위치")
+    ok: bool = Field(..., description="성공 여부")
+    status: int = Field(200, description="항목 단위 HTTP 상태 코드")
+    response: Optional[DialogResponse] = Field(None, description="성공 시 대화 응답")
+    error: str | None = Field(None, description="실패 사유")
+
+
+class DialogBatchResponse(BaseModel):
+    """
+    배치 요청 결과 (items 순서 유지).
+    """
+
+    results: List[DialogBatchItem] = Field(default_factory=list)
+    request_id: str = Field(..., description="배치 요청 식별자(Request ID)")
+    latency_ms: int = Field(..., description="배치 전체 처리 지연(ms)")
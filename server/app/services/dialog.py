@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from app.core import tracing
+from app.core.bridge import BridgeOverloaded, WorkerUnavailable, ai_bridge
+from app.core.config import settings
+from app.services.emotion import EmotionService
+from app.services.gpt import GPTService
+from app.services.memory import remember_turn, session_context
+
+# 워커가 감정 추론 결과로 치환할 자리표시자 (사용자 입력과 겹치지 않도록 제어문자 포함)
+EMOTION_SLOT = "\x00emotion\x00"
+
+
+@dataclass
+class DialogResult:
+    emotion: str
+    confidence: float
+    npc_line: str
+    safety: Dict[str, Any]
+    emotion_ms: Optional[int] = None
+    gpt_ms: Optional[int] = None
+    # 단일 왕복("dialog" 작업)으로 처리했는지 여부
+    fused: bool = False
+
+
+# ----------------------------
+# 감정 → 대사 파이프라인
+# ----------------------------
+class DialogService:
+    """
+    "dialog" 능력을 공지한 워커가 있으면 입력과 프롬프트 템플릿을 한 번에 보내
+    워커 안에서 감정 추론 → 대사 생성을 이어서 처리한다 (브리지 왕복 1회).
+    없으면 기존처럼 emotion / gpt 두 번의 요청으로 처리.
+
+    dialog 작업 프로토콜:
+      - 요청 payload: gpt 작업 payload + {"text", "locale", "emotion_slot"}
+        (감정 자리에 emotion_slot이 들어간 프롬프트를 렌더링한 뒤,
+         emotion_slot을 추론된 감정 레이블로 치환해 생성에 사용)
+      - 응답: {"emotion", "confidence", "content",
+               "timings": {"emotion_ms", "gpt_ms"}, "gpt_error"?}
+        (생성 단계만 실패하면 gpt_error를 담아 감정 결과는 그대로 반환)
+    """
+
+    TASK_TYPE = "dialog"
+
+    def __init__(self, emotion_svc: EmotionService, gpt_svc: GPTService):
+        self.emotion_svc = emotion_svc
+        self.gpt_svc = gpt_svc
+        self.timeout = float(settings.EMOTION_TIMEOUT_S) + float(settings.REQUEST_TIMEOUT_S)
+
+    def task_types(self) -> Tuple[str, ...]:
+        """이번 요청이 거칠 브리지 작업 종류 (입장 제어 사전 점검용)."""
+        if ai_bridge.is_available(self.TASK_TYPE):
+            return (self.TASK_TYPE,)
+        return ("emotion", "gpt")
+
+    async def run(
+        self,
+        *,
+        dialog_text: str,
+        persona: str,
+        game_state: dict | None,
+        locale: str = "ko-KR",
+        temperature: float = 0.7,
+        max_tokens: int = 80,
+        session_id: Optional[str] = None,
+        principal: str = "",
+    ) -> DialogResult:
+        """
+        두 단계 경로: 감정 추론 실패는 예외로, 대사 생성 실패는 폴백 대사로 처리 (기존 동작과 동일).
+        단일 왕복 경로: 타임아웃/워커 오류는 폴백 대사로 (과부하만 예외).
+        session_id가 있으면 세션 대화 맥락을 프롬프트에 넣고, 생성된 대사를 세션에 기록
+        (세션은 principal = 인증된 클라이언트 식별자별로 분리).
+        """
+        history = session_context(principal, session_id)
+        result = await self._run(
+            dialog_text=dialog_text,
+            persona=persona,
+            game_state=game_state,
+            locale=locale,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            history=history,
+        )
+        remember_turn(principal, session_id, dialog_text, result.npc_line, locale)
+        return result
+
+    async def _run(
+        self,
+        *,
+        dialog_text: str,
+        persona: str,
+        game_state: dict | None,
+        locale: str,
+        temperature: float,
+        max_tokens: int,
+        history: str,
+    ) -> DialogResult:
+        # 감정 결과가 캐시에 있으면 생성만 남으므로 gpt 단일 요청으로 충분
+        cached_emotion = await self.emotion_svc.lookup(dialog_text, locale)
+        # dialog 워커의 서킷이 모두 열려 있으면 두 단계 경로로 (각 단계가 폴백 처리)
+        if cached_emotion is None and ai_bridge.is_available(self.TASK_TYPE):
+            return await self._run_fused(
+                dialog_text=dialog_text,
+                persona=persona,
+                game_state=game_state,
+                locale=locale,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                history=history,
+            )
+
+        return await self._run_two_step(
+            dialog_text=dialog_text,
+            persona=persona,
+            game_state=game_state,
+            locale=locale,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            history=history,
+            cached_emotion=cached_emotion,
+        )
+
+    async def _run_two_step(
+        self,
+        *,
+        dialog_text: str,
+        persona: str,
+        game_state: dict | None,
+        locale: str,
+        temperature: float,
+        max_tokens: int,
+        history: str,
+        cached_emotion: Optional[Tuple[str, float]] = None,
+    ) -> DialogResult:
+        t0 = time.perf_counter()
+        with tracing.span("emotion", cached=cached_emotion is not None):
+            if cached_emotion is not None:
+                emo, conf = cached_emotion
+            else:
+                emo, conf = await self.emotion_svc.infer(dialog_text, locale)
+        t1 = time.perf_counter()
+        with tracing.span("gpt"):
+            npc_line, safety = await self.gpt_svc.generate_line(
+                dialog_text=dialog_text,
+                emotion=emo,
+                persona=persona,
+                game_state=game_state,
+                locale=locale,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                history=history,
+            )
+        t2 = time.perf_counter()
+        return DialogResult(
+            emotion=emo,
+            confidence=conf,
+            npc_line=npc_line,
+            safety=safety,
+            emotion_ms=int((t1 - t0) * 1000),
+            gpt_ms=int((t2 - t1) * 1000),
+        )
+
+    async def _run_fused(
+        self,
+        *,
+        dialog_text: str,
+        persona: str,
+        game_state: dict | None,
+        locale: str,
+        temperature: float,
+        max_tokens: int,
+        history: str,
+    ) -> DialogResult:
+        gpt_payload = GPTService.build_payload(
+            dialog_text=dialog_text,
+            emotion=EMOTION_SLOT,
+            persona=persona,
+            game_state=game_state,
+            locale=locale,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            history=history,
+        )
+        payload = {
+            "text": dialog_text,
+            "locale": locale,
+            "emotion_slot": EMOTION_SLOT,
+            **gpt_payload,
+        }
+
+        t0 = time.perf_counter()
+        try:
+            with tracing.span("dialog"):
+                data = await ai_bridge.send_request_and_wait(
+                    task_type=self.TASK_TYPE, payload=payload, timeout=self.timeout
+                )
+        except BridgeOverloaded:
+            # 과부하는 폴백이 아니라 호출 측에서 503으로 빠르게 거절
+            raise
+        except WorkerUnavailable:
+            # 보낸 사이에 dialog 워커 서킷이 모두 열림 → 두 단계 경로로 (각 단계가 폴백 처리)
+            return await self._run_two_step(
+                dialog_text=dialog_text,
+                persona=persona,
+                game_state=game_state,
+                locale=locale,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                history=history,
+            )
+        except Exception as e:
+            # 타임아웃/워커 오류: 두 단계로 다시 보내면 지연이 두 배가 되므로 바로 폴백 대사
+            # (감정은 기본값, confidence 0이라 캐시하지 않음)
+            npc_line, safety = self.gpt_svc.fallback("neutral", persona, e)
+            return DialogResult(
+                emotion="neutral", confidence=0.0, npc_line=npc_line, safety=safety, fused=True
+            )
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        if not isinstance(data, dict):
+            data = {}
+        timings = data.get("timings") if isinstance(data.get("timings"), dict) else {}
+        _record_fused_timings(
+            elapsed_ms, _as_float(timings.get("emotion_ms")), _as_float(timings.get("gpt_ms"))
+        )
+        emo, conf = self.emotion_svc.extract_emotion(data)
+        await self.emotion_svc.remember(dialog_text, locale, emo, conf)
+
+        slot = self.gpt_svc.cache_slot(
+            dialog_text=dialog_text,
+            emotion=emo,
+            persona=persona,
+            game_state=game_state,
+            locale=locale,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            history=history,
+        )
+        if data.get("gpt_error"):
+            npc_line, safety = self.gpt_svc.fallback(emo, persona, data["gpt_error"])
+        else:
+            npc_line, safety = self.gpt_svc.finish_line(
+                self.gpt_svc.extract_text(data), emotion=emo, persona=persona, slot=slot
+            )
+
+        return DialogResult(
+            emotion=emo,
+            confidence=conf,
+            npc_line=npc_line,
+            safety=safety,
+            emotion_ms=_as_ms(timings.get("emotion_ms")),
+            gpt_ms=_as_ms(timings.get("gpt_ms")),
+            fused=True,
+        )
+
+
+def _as_ms(value: Any) -> Optional[int]:
+    value = _as_float(value)
+    return None if value is None else int(value)
+
+
+def _as_float(value: Any) -> Optional[float]:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _record_fused_timings(
+    elapsed_ms: float, emotion_ms: Optional[float], gpt_ms: Optional[float]
+) -> None:
+    """
+    단일 왕복의 단계 분리: 워커 안에서 감정 → 생성이 바로 이어지므로
+    왕복 시간 중 두 연산을 뺀 나머지(전송 + 워커 대기열)는 emotion_queue로 본다.
+    """
+    if emotion_ms is None or gpt_ms is None:
+        return
+    gpt_ms = min(max(gpt_ms, 0.0), elapsed_ms)
+    emotion_ms = min(max(emotion_ms, 0.0), elapsed_ms - gpt_ms)
+    end_ns = time.time_ns()
+    gpt_start_ns = end_ns - int(gpt_ms * 1e6)
+    emotion_start_ns = gpt_start_ns - int(emotion_ms * 1e6)
+    tracing.add_timing("emotion_queue", elapsed_ms - gpt_ms - emotion_ms, end_ns=emotion_start_ns)
+    tracing.add_timing("emotion_compute", emotion_ms, end_ns=gpt_start_ns)
+    tracing.add_timing("gpt_compute", gpt_ms, end_ns=end_ns)
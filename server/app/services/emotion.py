@@ -1,34 +1,97 @@
 from __future__ import annotations
 
-from typing import Any, Tuple, Union, cast
+import hashlib
+import re
+import unicodedata
+from typing import Any, Optional, Tuple, Union, cast
 
-from app.core.bridge import ai_bridge  # Bridge 임포트
+from app.core.bridge import WorkerUnavailable, ai_bridge  # Bridge 임포트
+from app.core.cache import TieredCache, TTLCache
 from app.core.config import settings
 
 Floaty = Union[str, float, int]
 
+_WS = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    캐시 키용 정규화: 유니코드 NFKC, 대소문자 무시, 공백 정리.
+    ("안녕 " / "안녕" / "ＨＩ" / "hi" 가 같은 키가 되도록)
+    """
+    return _WS.sub(" ", unicodedata.normalize("NFKC", text)).strip().casefold()
+
+
+def emotion_cache_key(text: str, locale: str) -> str:
+    digest = hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).hexdigest()
+    return f"{locale.lower()}:{digest}"
+
+
+# 요청마다 서비스 인스턴스가 새로 만들어지므로 캐시는 모듈 단위로 공유
+emotion_cache: Optional[TieredCache] = (
+    TieredCache(
+        TTLCache(
+            ttl_s=settings.EMOTION_CACHE_TTL_S,
+            max_entries=settings.EMOTION_CACHE_MAX_ENTRIES,
+            max_bytes=settings.EMOTION_CACHE_MAX_BYTES,
+        ),
+        store=(lambda: ai_bridge.backend) if settings.EMOTION_CACHE_SHARED else None,
+        namespace="emotion",
+    )
+    if settings.EMOTION_CACHE_ENABLED
+    else None
+)
+
 
 class EmotionService:
     def __init__(self):
         # WebSocket 방식이므로 URL 불필요, 타임아웃만 참조
         self.timeout = float(settings.EMOTION_TIMEOUT_S)
+        self.cache = emotion_cache
 
     async def infer(self, text: str, locale: str = "ko-KR") -> Tuple[str, float]:
+        cached = await self.lookup(text, locale)
+        if cached is not None:
+            return cached
+
+        emo, conf = await self._infer_remote(text, locale)
+        await self.remember(text, locale, emo, conf)
+        return emo, conf
+
+    async def lookup(self, text: str, locale: str) -> Optional[Tuple[str, float]]:
+        """캐시된 감정 결과 (캐시 비활성/미스 시 None)."""
+        if self.cache is None:
+            return None
+        cached = await self.cache.get(emotion_cache_key(text, locale))
+        if cached is None:
+            return None
+        return str(cached[0]), float(cached[1])
+
+    async def remember(self, text: str, locale: str, emo: str, conf: float) -> None:
+        # 응답 형식이 이상해 기본값으로 떨어진 경우는 캐시하지 않음
+        if self.cache is not None and conf > 0.0:
+            await self.cache.set(emotion_cache_key(text, locale), [emo, conf])
+
+    async def _infer_remote(self, text: str, locale: str) -> Tuple[str, float]:
         payload = {"text": text, "locale": locale}
 
         # Bridge를 통해 로컬 워커에 요청
-        # (기존 httpx 요청 부분을 대체)
+        # (기존 httpx 요청 부분을 대체, 동시 요청은 emotion_batch로 묶여 전송될 수 있음)
         try:
-            response_data = await ai_bridge.send_request_and_wait(
+            response_data = await ai_bridge.send_batched_request(
                 task_type="emotion", payload=payload, timeout=self.timeout
             )
-            return self._extract_emotion(response_data)
+            return self.extract_emotion(response_data)
+        except WorkerUnavailable:
+            # 서킷이 열려 있으면 타임아웃까지 기다리지 않고 기본 감정으로 (confidence 0: 캐시 안 함)
+            return "neutral", 0.0
         except Exception as e:
             # 연결 에러나 타임아웃 등을 여기서 잡아서 처리
             raise e
 
-    # _extract_emotion 및 _is_num 메서드는 기존 코드 그대로 유지...
-    def _extract_emotion(self, data: Any) -> Tuple[str, float]:
+    # extract_emotion 및 _is_num 메서드는 기존 코드 그대로 유지...
+    # (fused "dialog" 작업 응답에서도 같은 형식을 쓰므로 DialogService가 재사용)
+    def extract_emotion(self, data: Any) -> Tuple[str, float]:
         # (기존 코드 복사 붙여넣기)
         # ... user provided code ...
         if isinstance(data, dict):
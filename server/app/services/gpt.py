@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
-import re
-from typing import Any, Dict, Tuple
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from app.core.bridge import ai_bridge  # Bridge 임포트
+from app.core import tracing
+from app.core.bridge import BridgeOverloaded, WorkerUnavailable, ai_bridge  # Bridge 임포트
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.prompts import PROMPT_REFS, PROMPT_VARS, PromptMiss, prompt_registry
+from app.services.safety import safety_filter
 
 # ----------------------------
 # 프롬프트 (시스템)
@@ -26,6 +34,29 @@ SYSTEM_PROMPT = """\
 # ----------------------------
 # 사용자 프롬프트 빌더
 # ----------------------------
+# 워커에는 템플릿을 해시로 한 번만 등록하고 요청에는 가변 필드만 싣는다 (app.core.prompts)
+# history: 세션 대화 맥락 (app.services.memory, 없으면 빈 문자열이라 기존 프롬프트와 동일)
+USER_PROMPT_TEMPLATE = (
+    "{history}"
+    "[플레이어 입력]\n{dialog_text}\n\n"
+    "[추론된 감정]\n{emotion}\n\n"
+    "[NPC 페르소나]\n{persona}\n\n"
+    "{state}\n\n"
+    "[요청]\n위 조건을 지켜 NPC의 대사 한 줄만 출력하세요."
+)
+
+SYSTEM_PROMPT_REF = prompt_registry.register_static(SYSTEM_PROMPT)
+USER_PROMPT_TEMPLATE_REF = prompt_registry.register_static(USER_PROMPT_TEMPLATE)
+
+
+def _state_line(game_state: dict | None) -> str:
+    return (
+        f"게임상태: {json.dumps(game_state, ensure_ascii=False)}"
+        if game_state
+        else "게임상태: 없음"
+    )
+
+
 def build_user_prompt(
     *,
     dialog_text: str,
@@ -33,33 +64,29 @@ def build_user_prompt(
     persona: str,
     game_state: dict | None,
     locale: str = "ko-KR",
+    history: str = "",
 ) -> str:
-    state = (
-        f"게임상태: {json.dumps(game_state, ensure_ascii=False)}"
-        if game_state
-        else "게임상태: 없음"
-    )
-    return (
-        f"[플레이어 입력]\n{dialog_text}\n\n"
-        f"[추론된 감정]\n{emotion}\n\n"
-        f"[NPC 페르소나]\n{persona}\n\n"
-        f"{state}\n\n"
-        f"[요청]\n위 조건을 지켜 NPC의 대사 한 줄만 출력하세요."
+    return USER_PROMPT_TEMPLATE.format(
+        history=history,
+        dialog_text=dialog_text,
+        emotion=emotion,
+        persona=persona,
+        state=_state_line(game_state),
     )
 
 
 # ----------------------------
-# 간단 안전 필터 / 후처리
+# 안전 필터(app.services.safety) / 후처리
 # ----------------------------
-_PROFANITY = re.compile(
-    r"(개새|씨발|좆|병신|꺼져|fuck|shit|bitch|asshole|retard)",
-    re.IGNORECASE,
-)
 
 
-def _postprocess(line: str) -> str:
+def _clean(line: str) -> str:
     # 개행/따옴표/여분 공백 제거
-    line = line.strip().strip("`\"'").replace("\n", " ").strip()
+    return line.strip().strip("`\"'").replace("\n", " ").strip()
+
+
+def _postprocess(line: str) -> str:
+    line = _clean(line)
     # 너무 긴 경우 절단(멀티바이트 안전)
     if len(line) > 60:
         line = line[:60].rstrip() + "…"
@@ -68,12 +95,22 @@ def _postprocess(line: str) -> str:
 
 
 def _safety_check(line: str) -> Dict[str, Any]:
-    bad = bool(_PROFANITY.search(line))
-    return {
-        "profanity": bad,
-        "blocked": bad,  # 간단 규칙: 비속어 포함 시 차단
-        "length_over": len(line) > 60,
-    }
+    # 렉시콘 기반 다중 패턴 매칭 (공백/기호 삽입, 자모 분리 등 우회 표기 정규화 포함)
+    return safety_filter.check(line)
+
+
+def fallback_reason_code(error: Any) -> str:
+    """
+    폴백을 일으킨 오류 → 사유 코드 (safety["reason"], /metrics의 dialog_fallbacks_total 라벨).
+    워커가 문자열로 보낸 오류(fused 응답의 gpt_error 등)는 "error".
+    """
+    if isinstance(error, WorkerUnavailable):
+        return "circuit_open"
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return "timeout"
+    if isinstance(error, PromptMiss):
+        return "prompt_miss"
+    return "error"
 
 
 def _fallback_line(emotion: str, persona: str) -> str:
@@ -93,6 +130,100 @@ def _fallback_line(emotion: str, persona: str) -> str:
     return "지금 마음에 공감해요. 천천히 이야기 나누며 제가 도울게요."
 
 
+# ----------------------------
+# 대사 응답 캐시 (페르소나별 정책, N개 변형 라운드로빈)
+# ----------------------------
+@dataclass(frozen=True)
+class CachePolicy:
+    enabled: bool = False
+    ttl_s: float = 600.0
+    variants: int = 1
+
+
+def prompt_cache_key(
+    *,
+    dialog_text: str,
+    emotion: str,
+    persona: str,
+    game_state: dict | None,
+    locale: str,
+    temperature: float,
+    max_tokens: int,
+    history: str = "",
+) -> str:
+    """
+    build_user_prompt 입력(+ 생성 파라미터, 시스템 프롬프트)을 정규화해 해시한 캐시 키.
+    game_state는 키 정렬 JSON으로 직렬화해 dict 순서와 무관하게 같은 키가 되도록 한다.
+    """
+    canonical = json.dumps(
+        {
+            "system": SYSTEM_PROMPT,
+            "dialog_text": dialog_text.strip(),
+            "emotion": emotion,
+            "persona": persona,
+            "game_state": game_state or None,
+            "locale": locale,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "history": history,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DialogResponseCache:
+    """
+    같은 입력 조합에 대해 생성된 대사를 최대 variants개까지 모았다가,
+    다 모이면 워커 호출 없이 라운드로빈으로 돌려준다 (NPC가 매번 같은 말만 하지 않도록).
+    """
+
+    def __init__(self, policies: Dict[str, Dict[str, Any]], local: TTLCache) -> None:
+        self.policies = {name: CachePolicy(**conf) for name, conf in policies.items()}
+        self.local = local
+
+    def policy_for(self, persona: str) -> CachePolicy:
+        return self.policies.get(persona) or self.policies.get("*") or CachePolicy()
+
+    def get(self, key: str, policy: CachePolicy) -> Optional[Tuple[str, Dict[str, Any]]]:
+        entry = self.local.get(key)
+        if entry is None or len(entry["lines"]) < policy.variants:
+            # 아직 변형이 덜 모였으면 새로 생성
+            return None
+        idx = entry["next"] % len(entry["lines"])
+        entry["next"] = idx + 1
+        line, safety = entry["lines"][idx]
+        return line, dict(safety)
+
+    def add(self, key: str, policy: CachePolicy, line: str, safety: Dict[str, Any]) -> None:
+        entry = self.local.get(key) or {"lines": [], "next": 0}
+        lines: List[Any] = entry["lines"]
+        if len(lines) >= policy.variants or any(existing == line for existing, _ in lines):
+            return
+        lines.append([line, safety])
+        self.local.set(key, entry, ttl_s=policy.ttl_s)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.local.stats()
+
+
+response_cache: Optional[DialogResponseCache] = (
+    DialogResponseCache(
+        settings.GPT_CACHE_POLICIES,
+        TTLCache(
+            ttl_s=600.0,
+            max_entries=settings.GPT_CACHE_MAX_ENTRIES,
+            max_bytes=settings.GPT_CACHE_MAX_BYTES,
+        ),
+    )
+    if settings.GPT_CACHE_ENABLED
+    else None
+)
+
+
 # ----------------------------
 # GPT 서비스 (Bridge 적용 버전)
 # ----------------------------
@@ -104,6 +235,7 @@ class GPTService:
     def __init__(self):
         # WebSocket 통신이므로 URL은 필요 없으나, 타임아웃 설정은 가져옴
         self.timeout = float(settings.REQUEST_TIMEOUT_S)
+        self.cache = response_cache
 
     async def generate_line(
         self,
@@ -115,27 +247,39 @@ class GPTService:
         locale: str = "ko-KR",
         temperature: float = 0.7,
         max_tokens: int = 80,
+        history: str = "",
     ) -> Tuple[str, Dict[str, Any]]:
         """
         1) 서버에서 프롬프트 구성 (로직 일관성 유지)
         2) Bridge를 통해 워커로 전송
         3) 응답 수신 후 후처리 및 안전 검사
+        (응답 캐시가 켜져 있고 페르소나 정책이 허용하면 캐시된 변형을 먼저 사용)
         """
-        # 1. 프롬프트 생성
-        user_prompt = build_user_prompt(
+        slot = self.cache_slot(
             dialog_text=dialog_text,
             emotion=emotion,
             persona=persona,
             game_state=game_state,
             locale=locale,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            history=history,
         )
+        cached = self.lookup_cached(slot)
+        if cached is not None:
+            return cached
 
-        payload = {
-            "user_prompt": user_prompt,
-            "system_prompt": SYSTEM_PROMPT,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-        }
+        # 1. 프롬프트 생성
+        payload = self.build_payload(
+            dialog_text=dialog_text,
+            emotion=emotion,
+            persona=persona,
+            game_state=game_state,
+            locale=locale,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            history=history,
+        )
 
         # 2. 로컬 워커 요청 (Bridge)
         try:
@@ -146,24 +290,212 @@ class GPTService:
             )
 
             # 3. 결과 파싱 및 후처리
-            line = self._extract_text(resp_data)
-            line = _postprocess(line)
+            return self.finish_line(
+                self.extract_text(resp_data), emotion=emotion, persona=persona, slot=slot
+            )
+
+        except BridgeOverloaded:
+            # 과부하는 폴백이 아니라 호출 측에서 503으로 빠르게 거절
+            raise
+        except Exception as e:
+            # 에러 발생 시 폴백 반환
+            return self.fallback(emotion, persona, e)
+
+    def cache_slot(
+        self,
+        *,
+        dialog_text: str,
+        emotion: str,
+        persona: str,
+        game_state: dict | None,
+        locale: str,
+        temperature: float,
+        max_tokens: int,
+        history: str = "",
+    ) -> Tuple[Optional[str], CachePolicy]:
+        """(캐시 키, 정책). 캐시가 꺼져 있거나 페르소나 정책이 비활성이면 키는 None."""
+        policy = self.cache.policy_for(persona) if self.cache else CachePolicy()
+        if self.cache is None or not policy.enabled:
+            return None, policy
+        key = prompt_cache_key(
+            dialog_text=dialog_text,
+            emotion=emotion,
+            persona=persona,
+            game_state=game_state,
+            locale=locale,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            history=history,
+        )
+        return key, policy
+
+    def lookup_cached(
+        self, slot: Tuple[Optional[str], CachePolicy]
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        key, policy = slot
+        if self.cache is None or key is None:
+            return None
+        return self.cache.get(key, policy)
+
+    def finish_line(
+        self,
+        raw: str,
+        *,
+        emotion: str,
+        persona: str,
+        slot: Tuple[Optional[str], CachePolicy] = (None, CachePolicy()),
+    ) -> Tuple[str, Dict[str, Any]]:
+        """워커가 생성한 원문 → 후처리/안전 검사/폴백 적용 후 (대사, safety). 정상 대사만 캐시."""
+        with tracing.span("postprocess"):
+            line = _postprocess(raw)
             safety = _safety_check(line)
 
-            if safety.get("blocked"):
-                return _fallback_line(emotion, persona), {**safety, "fallback": True}
+        if safety.get("blocked"):
+            return _fallback_line(emotion, persona), {**safety, "fallback": True}
 
-            return line, {**safety, "fallback": False}
+        safety = {**safety, "fallback": False}
+        key, policy = slot
+        if self.cache is not None and key is not None and line:
+            self.cache.add(key, policy, line, safety)
+        return line, safety
 
+    @staticmethod
+    def fallback(emotion: str, persona: str, error: Any) -> Tuple[str, Dict[str, Any]]:
+        return _fallback_line(emotion, persona), {
+            "error": str(error),
+            "reason": fallback_reason_code(error),
+            "fallback": True,
+        }
+
+    async def stream_line(
+        self,
+        *,
+        dialog_text: str,
+        emotion: str,
+        persona: str,
+        game_state: dict | None,
+        locale: str = "ko-KR",
+        temperature: float = 0.7,
+        max_tokens: int = 80,
+        history: str = "",
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        워커의 부분 응답을 받아 NPC 대사를 조각 단위로 흘려주는 스트리밍 버전.
+        누적된 텍스트에 대해 매 조각마다 후처리/안전 검사를 다시 수행한다.
+        대기열 포화(BridgeOverloaded)는 첫 이벤트 전에 그대로 올린다.
+        이벤트:
+          - {"type": "delta", "text": "..."}    : 새로 확정된 대사 조각
+          - {"type": "replace", "text": "..."}  : 이미 보낸 조각을 폐기하고 이 문구로 대체(폴백)
+          - {"type": "done", "npc_line": "...", "safety": {...}} : 최종 결과 (항상 마지막)
+        """
+        payload = self.build_payload(
+            dialog_text=dialog_text,
+            emotion=emotion,
+            persona=persona,
+            game_state=game_state,
+            locale=locale,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            history=history,
+        )
+
+        raw = ""  # 워커가 보낸 원문 누적
+        sent = ""  # 클라이언트에 이미 내보낸 후처리 텍스트
+        post_s = 0.0  # 조각마다 반복한 후처리/안전 검사 누적 시간 (끝날 때 한 번 기록)
+        try:
+            stream = ai_bridge.stream_request(
+                task_type="gpt", payload=payload, timeout=self.timeout
+            )
+            # 중간에 끊고 나가도 브리지 쪽 대기열이 즉시 정리되도록 aclosing 사용
+            async with aclosing(stream):
+                async for result, done in stream:
+                    if done:
+                        # 부분 응답 없이 최종 응답만 온 경우(비스트리밍 워커) 전체 텍스트 사용
+                        if not raw and isinstance(result, dict):
+                            raw = self.extract_text(result)
+                    elif isinstance(result, dict):
+                        raw += str(result.get("delta", ""))
+
+                    t0 = time.perf_counter()
+                    line = _postprocess(raw)
+                    # 비스트리밍 경로와 같이 후처리된(클라이언트가 받는) 텍스트를 검사
+                    safety = _safety_check(line)
+                    post_s += time.perf_counter() - t0
+                    if safety.get("blocked"):
+                        tracing.add_timing("postprocess", post_s * 1000)
+                        fallback = _fallback_line(emotion, persona)
+                        yield {"type": "replace", "text": fallback}
+                        yield {
+                            "type": "done",
+                            "npc_line": fallback,
+                            "safety": {**safety, "fallback": True},
+                        }
+                        return
+
+                    # 후처리 결과가 이미 보낸 텍스트를 이어가는 경우에만 조각을 확정해 전송
+                    if line.startswith(sent) and len(line) > len(sent):
+                        yield {"type": "delta", "text": line[len(sent) :]}
+                        sent = line
+
+                    if done or len(_clean(raw)) > 60:
+                        # 60자 초과 시 _postprocess가 절단하므로 더 받을 필요 없음
+                        tracing.add_timing("postprocess", post_s * 1000)
+                        if line != sent:
+                            yield {"type": "replace", "text": line}
+                        yield {
+                            "type": "done",
+                            "npc_line": line,
+                            "safety": {**safety, "fallback": False},
+                        }
+                        return
+
+        except BridgeOverloaded:
+            # generate_line과 같이 폴백이 아니라 호출 측에서 503으로 거절
+            raise
         except Exception as e:
-            # 에러 발생 시 폴백 반환
-            return _fallback_line(emotion, persona), {
-                "error": str(e),
-                "fallback": True,
+            fallback = _fallback_line(emotion, persona)
+            yield {"type": "replace", "text": fallback}
+            yield {
+                "type": "done",
+                "npc_line": fallback,
+                "safety": {"error": str(e), "reason": fallback_reason_code(e), "fallback": True},
             }
 
     @staticmethod
-    def _extract_text(data: Dict[str, Any]) -> str:
+    def build_payload(
+        *,
+        dialog_text: str,
+        emotion: str,
+        persona: str,
+        game_state: dict | None,
+        locale: str,
+        temperature: float,
+        max_tokens: int,
+        history: str = "",
+    ) -> Dict[str, Any]:
+        """
+        워커 요청 payload. 시스템 프롬프트/사용자 템플릿/페르소나는 해시 참조로,
+        나머지는 가변 필드로 싣는다 (워커 렌더링 결과 == build_user_prompt).
+        "prompts" 능력이 없는 워커에는 브리지가 user_prompt/system_prompt로 펼쳐서 보낸다.
+        """
+        return {
+            PROMPT_REFS: {
+                "system": SYSTEM_PROMPT_REF,
+                "template": USER_PROMPT_TEMPLATE_REF,
+                "persona": prompt_registry.register(persona),
+            },
+            PROMPT_VARS: {
+                "dialog_text": dialog_text,
+                "emotion": emotion,
+                "state": _state_line(game_state),
+                "history": history,
+            },
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+
+    @staticmethod
+    def extract_text(data: Dict[str, Any]) -> str:
         """
         워커 응답 데이터에서 실제 텍스트 추출
         """
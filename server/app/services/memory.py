@@ -0,0 +1,394 @@
+"""
+세션별 대화 메모리: (클라이언트 식별자, session_id) → 최근 대화 턴 + 누적 요약.
+
+  - 프롬프트에는 [이전 대화 요약] + [최근 대화]를 넣되 추정 토큰이 token_budget을 넘지 않도록
+    최근 턴부터 채운다 (요약이 늦어져도 프롬프트 크기는 항상 제한됨)
+  - 턴이 max_turns를 넘거나 추정 토큰이 token_budget을 넘으면 오래된 턴을 워커가 기존 요약에
+    합친다. 증분 요약이라 이전 요약 + 새로 밀려난 턴만 보내고, 응답을 기다리지 않고 백그라운드로
+  - "summarize" 능력을 알린 워커가 없거나 요약이 실패하면 밀려난 턴은 버린다
+  - 세션은 인증된 클라이언트 식별자별로 분리 (다른 클라이언트가 같은 session_id를 써도 섞이지 않음)
+  - 세션 수는 LRU(max_sessions) + 유휴 만료(idle_ttl_s)로 제한, 선택적으로 디스크 스냅샷
+  - 프로세스마다 따로 보관 (멀티 프로세스 배포에서는 세션이 같은 프로세스로 가야 이어짐)
+
+summarize 작업 프로토콜:
+  - 요청 payload: {"summary": 이전 요약, "turns": [{"player", "npc"}, ...], "locale", "max_tokens"}
+  - 응답: {"summary": 새 요약}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import os
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from app.core.bridge import ai_bridge
+from app.core.config import settings
+
+SUMMARIZE_TASK = "summarize"
+SNAPSHOT_VERSION = 2
+
+# (클라이언트 식별자, session_id)
+SessionKey = Tuple[str, str]
+
+# (이전 요약, 밀려난 턴, 로캘, 요약 토큰 상한) → 새 요약
+Summarizer = Callable[[str, List["Turn"], str, int], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 대략적인 토큰 수 (UTF-8 3바이트당 1: 한글은 글자당 ~1, 영문은 ~3글자당 1)."""
+    return (len(text.encode("utf-8")) + 2) // 3
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    data = text.strip().encode("utf-8")
+    if len(data) <= max_tokens * 3:
+        return text.strip()
+    return data[: max_tokens * 3].decode("utf-8", errors="ignore").rstrip() + "…"
+
+
+@dataclass
+class Turn:
+    player: str
+    npc: str
+
+    def render(self) -> str:
+        return f"플레이어: {self.player}\nNPC: {self.npc}"
+
+
+@dataclass
+class Session:
+    turns: Deque[Turn] = field(default_factory=deque)
+    summary: str = ""
+    locale: str = "ko-KR"
+    last_used: float = 0.0
+    # 백그라운드 요약이 진행 중인지 (세션당 한 번에 하나)
+    compacting: bool = False
+
+
+def render_history(summary: str, turns: Deque[Turn], token_budget: int) -> str:
+    """
+    프롬프트에 넣을 대화 맥락. 요약 → 최근 턴(최신부터 예산 안에서) 순서로,
+    내용이 있으면 사용자 템플릿의 다음 블록과 빈 줄로 구분되도록 끝에 개행 2개를 붙인다.
+    """
+    budget = token_budget - estimate_tokens(summary)
+    recent: List[str] = []
+    for turn in reversed(turns):
+        text = turn.render()
+        budget -= estimate_tokens(text)
+        if budget < 0:
+            break
+        recent.append(text)
+
+    blocks = []
+    if summary:
+        blocks.append(f"[이전 대화 요약]\n{summary}")
+    if recent:
+        blocks.append("[최근 대화]\n" + "\n".join(reversed(recent)))
+    return "".join(f"{block}\n\n" for block in blocks)
+
+
+class SessionStore:
+    def __init__(
+        self,
+        *,
+        max_sessions: int = 10_000,
+        idle_ttl_s: float = 1800.0,
+        max_turns: int = 6,
+        token_budget: int = 600,
+        summary_max_tokens: int = 200,
+        summarize: Optional[Summarizer] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_sessions = max(1, max_sessions)
+        self.idle_ttl_s = idle_ttl_s
+        self.max_turns = max(1, max_turns)
+        self.token_budget = token_budget
+        # 요약이 예산을 다 차지하지 않도록 최대 절반까지만
+        self.summary_max_tokens = max(1, min(summary_max_tokens, token_budget // 2))
+        self.summarize = summarize
+        self._clock = clock
+        # (클라이언트 식별자, session_id) : Session (가장 오래 안 쓴 세션이 앞)
+        self._sessions: "OrderedDict[SessionKey, Session]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+        self._snapshot_task: Optional[asyncio.Task] = None
+
+        self.evictions = 0
+        self.expirations = 0
+        self.compactions = 0
+        self.compaction_failures = 0
+        self.dropped_turns = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    # ----------------------------
+    # 조회 / 기록
+    # ----------------------------
+    def context(self, principal: str, session_id: str) -> str:
+        """프롬프트에 넣을 대화 맥락 (기록이 없으면 빈 문자열)."""
+        session = self._get((principal, session_id))
+        if session is None:
+            return ""
+        return render_history(session.summary, session.turns, self.token_budget)
+
+    def record(
+        self, principal: str, session_id: str, player: str, npc: str, *, locale: str = "ko-KR"
+    ) -> None:
+        """대화 한 턴 추가. 한도를 넘으면 오래된 턴의 요약을 백그라운드로 시작."""
+        session = self._get((principal, session_id), create=True)
+        assert session is not None
+        session.turns.append(Turn(player=player, npc=npc))
+        session.locale = locale
+        if not session.compacting and self._over_budget(session):
+            session.compacting = True
+            # 빈 컨텍스트에서 시작: 요청의 트레이스/request_id를 물려받으면 요약 작업의 스팬이
+            # 이미 끝난 요청에 붙는다
+            task = contextvars.Context().run(asyncio.ensure_future, self._compact(session))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _get(self, key: SessionKey, *, create: bool = False) -> Optional[Session]:
+        self._expire()
+        session = self._sessions.get(key)
+        if session is None:
+            if not create:
+                return None
+            session = self._sessions[key] = Session()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._sessions.move_to_end(key)
+        session.last_used = self._clock()
+        return session
+
+    def _expire(self) -> None:
+        # 최근 사용 순으로 정렬되어 있으므로 앞에서부터 만료된 세션만 제거
+        now = self._clock()
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.last_used < self.idle_ttl_s:
+                return
+            del self._sessions[key]
+            self.expirations += 1
+
+    # ----------------------------
+    # 증분 요약
+    # ----------------------------
+    def _tokens(self, session: Session) -> int:
+        return estimate_tokens(session.summary) + sum(
+            estimate_tokens(turn.render()) for turn in session.turns
+        )
+
+    def _over_budget(self, session: Session) -> bool:
+        return len(session.turns) > self.max_turns or self._tokens(session) > self.token_budget
+
+    def _fold_count(self, session: Session) -> int:
+        """
+        요약에 합칠 오래된 턴 수. 호출 횟수를 줄이도록 최근 max_turns/2턴만 남기고,
+        남은 턴 + 요약 상한이 예산을 넘으면 더 합친다.
+        """
+        turns = list(session.turns)
+        n = min(len(turns), max(1, len(turns) - self.max_turns // 2))
+        while n < len(turns) and (
+            sum(estimate_tokens(t.render()) for t in turns[n:]) + self.summary_max_tokens
+            > self.token_budget
+        ):
+            n += 1
+        return n
+
+    async def _compact(self, session: Session) -> None:
+        try:
+            while session.turns and self._over_budget(session):
+                n = self._fold_count(session)
+                folded = list(islice(session.turns, n))
+                summary: Optional[str] = None
+                if self.summarize is not None:
+                    try:
+                        summary = await self.summarize(
+                            session.summary, folded, session.locale, self.summary_max_tokens
+                        )
+                    except Exception:
+                        self.compaction_failures += 1
+                # 요약하는 동안 추가된 턴은 뒤에 붙으므로 앞의 n개가 그대로 합친 턴
+                for _ in range(n):
+                    session.turns.popleft()
+                if summary:
+                    session.summary = _clip(summary, self.summary_max_tokens)
+                    self.compactions += 1
+                else:
+                    self.dropped_turns += n
+        finally:
+            session.compacting = False
+
+    # ----------------------------
+    # 디스크 스냅샷
+    # ----------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        now = self._clock()
+        return {
+            "version": SNAPSHOT_VERSION,
+            "saved_at": time.time(),
+            "sessions": [
+                {
+                    "principal": principal,
+                    "session_id": session_id,
+                    "summary": session.summary,
+                    "turns": [[turn.player, turn.npc] for turn in session.turns],
+                    "locale": session.locale,
+                    "idle_s": now - session.last_used,
+                }
+                for (principal, session_id), session in self._sessions.items()
+            ],
+        }
+
+    def restore(self, data: Dict[str, Any]) -> int:
+        """
+        스냅샷에서 아직 만료되지 않은 세션만 복원 (저장 후 흐른 시간도 유휴 시간에 포함).
+        클라이언트 식별자가 없는 이전 형식의 스냅샷은 복원하지 않음.
+        """
+        if data.get("version") != SNAPSHOT_VERSION:
+            return 0
+        offline_s = max(0.0, time.time() - float(data.get("saved_at") or 0.0))
+        now = self._clock()
+        entries = sorted(
+            data.get("sessions") or [], key=lambda entry: -float(entry.get("idle_s") or 0.0)
+        )
+        restored = 0
+        for entry in entries:
+            key = (str(entry.get("principal") or ""), str(entry.get("session_id") or ""))
+            idle_s = float(entry.get("idle_s") or 0.0) + offline_s
+            if idle_s >= self.idle_ttl_s:
+                continue
+            turns = deque(Turn(str(p), str(n)) for p, n in entry.get("turns") or [])
+            self._sessions[key] = Session(
+                turns=deque(islice(turns, max(0, len(turns) - self.max_turns), None)),
+                summary=_clip(str(entry.get("summary") or ""), self.summary_max_tokens),
+                locale=str(entry.get("locale") or "ko-KR"),
+                last_used=now - idle_s,
+            )
+            self._sessions.move_to_end(key)
+            restored += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return restored
+
+    async def save(self, path: str) -> None:
+        # 직렬화할 데이터는 이벤트 루프에서 떠 두고, 파일 쓰기는 스레드에서
+        await asyncio.to_thread(_write_json_atomic, path, self.snapshot())
+
+    async def load(self, path: str) -> int:
+        if not os.path.exists(path):
+            return 0
+        try:
+            data = await asyncio.to_thread(_read_json, path)
+        except (OSError, ValueError) as e:
+            print(f"Session snapshot ignored ({path}): {e}")
+            return 0
+        return self.restore(data)
+
+    async def start(self, path: str = "", interval_s: float = 60.0) -> None:
+        if not path:
+            return
+        restored = await self.load(path)
+        if restored:
+            print(f"Session memory restored: {restored} sessions from {path}")
+        if interval_s > 0:
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop(path, interval_s))
+
+    async def stop(self, path: str = "") -> None:
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            self._snapshot_task = None
+        for task in list(self._tasks):
+            task.cancel()
+        if path:
+            await self.save(path)
+
+    async def _snapshot_loop(self, path: str, interval_s: float) -> None:
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                await self.save(path)
+            except Exception as e:
+                print(f"Session snapshot failed ({path}): {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "compacting": len(self._tasks),
+            "compactions": self.compactions,
+            "compaction_failures": self.compaction_failures,
+            "dropped_turns": self.dropped_turns,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def summarize_with_worker(
+    summary: str, turns: List[Turn], locale: str, max_tokens: int
+) -> str:
+    """워커의 summarize 작업으로 요약. 보낼 워커가 없으면 빈 문자열 (밀려난 턴은 버려짐)."""
+    if not ai_bridge.is_available(SUMMARIZE_TASK):
+        return ""
+    data = await ai_bridge.send_request_and_wait(
+        task_type=SUMMARIZE_TASK,
+        payload={
+            "summary": summary,
+            "turns": [{"player": t.player, "npc": t.npc} for t in turns],
+            "locale": locale,
+            "max_tokens": max_tokens,
+        },
+        timeout=float(settings.REQUEST_TIMEOUT_S),
+    )
+    return str(data.get("summary") or "") if isinstance(data, dict) else ""
+
+
+session_store: Optional[SessionStore] = (
+    SessionStore(
+        max_sessions=settings.SESSION_MAX_SESSIONS,
+        idle_ttl_s=settings.SESSION_IDLE_TTL_S,
+        max_turns=settings.SESSION_MAX_TURNS,
+        token_budget=settings.SESSION_TOKEN_BUDGET,
+        summary_max_tokens=settings.SESSION_SUMMARY_MAX_TOKENS,
+        summarize=summarize_with_worker,
+    )
+    if settings.SESSION_MEMORY_ENABLED
+    else None
+)
+
+
+def session_context(principal: str, session_id: Optional[str]) -> str:
+    """
+    프롬프트용 대화 맥락 (메모리 비활성/세션 없음이면 빈 문자열 → 기존과 같은 프롬프트).
+    principal: 인증된 클라이언트 식별자 (app.core.security.client_identity)
+    """
+    if session_store is None or not session_id:
+        return ""
+    return session_store.context(principal, session_id)
+
+
+def remember_turn(
+    principal: str, session_id: Optional[str], player: str, npc: str, locale: str
+) -> None:
+    if session_store is not None and session_id:
+        session_store.record(principal, session_id, player, npc, locale=locale)
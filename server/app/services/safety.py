@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import unicodedata
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+# ----------------------------
+# 기본 금칙어 (렉시콘 파일이 없어도 동작하도록 내장)
+# ----------------------------
+DEFAULT_LEXICON: Dict[str, List[str]] = {
+    "profanity": [
+        "개새",
+        "씨발",
+        "좆",
+        "병신",
+        "꺼져",
+        # 라틴 금칙어는 단어 단위로만 매칭하므로 흔한 활용형도 함께 둔다
+        "fuck",
+        "fucks",
+        "fucked",
+        "fucker",
+        "fucking",
+        "shit",
+        "shits",
+        "shitty",
+        "bitch",
+        "bitches",
+        "asshole",
+        "assholes",
+        "retard",
+        "retarded",
+    ],
+}
+
+# ----------------------------
+# 정규화 (우회 표기 대응)
+# ----------------------------
+# 한글 음절 → 호환 자모 (초성 19 / 중성 21 / 종성 27+없음)
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = ("", *"ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ")
+_SYLLABLE_BASE = 0xAC00
+_SYLLABLE_LAST = 0xD7A3
+# NFKC는 호환 자모(ㅂ)를 조합형 자모(U+1107)로 바꾸므로 다시 호환 자모로 되돌림
+_CONJOINING_TO_COMPAT = {
+    **{0x1100 + i: c for i, c in enumerate(_CHOSEONG)},
+    **{0x1161 + i: c for i, c in enumerate(_JUNGSEONG)},
+    **{0x11A8 + i: c for i, c in enumerate(_JONGSEONG[1:])},
+}
+
+# 라틴 문자 우회 표기 (sh1t, $hit 등). 라틴 문자 옆에 있을 때만 글자로 보고, 아니면 패딩으로 버림
+_LEET = {"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "@": "a", "$": "s"}
+
+
+def _is_latin(ch: str) -> bool:
+    return "a" <= ch <= "z"
+
+
+# 매칭이 넘을 수 없는 단어 사이 간격 (자모/라틴 문자와 겹치지 않음)
+GAP = " "
+# check_many에서 줄 사이에 넣는 구분자 (어떤 패턴에도 없는 문자라 자동자가 여기서 초기 상태로)
+LINE_SEP = "\x00"
+
+
+def _words(text: str) -> List[List[str]]:
+    """
+    단어별 비교 단위 목록. NFKC + casefold 후 공백/기호/숫자를 단어 구분으로 보고,
+    한글 음절은 자모 묶음으로 분해한다 ("씨ㅂㅏㄹ" → "씨발"과 같은 자모열).
+    """
+    text = unicodedata.normalize("NFKC", text).casefold().translate(_CONJOINING_TO_COMPAT)
+    words: List[List[str]] = []
+    word: List[str] = []
+    for i, ch in enumerate(text):
+        if ch in _LEET:
+            prev = text[i - 1] if i else ""
+            nxt = text[i + 1] if i + 1 < len(text) else ""
+            if _is_latin(prev) or _is_latin(nxt):
+                ch = _LEET[ch]
+        code = ord(ch)
+        if _SYLLABLE_BASE <= code <= _SYLLABLE_LAST:
+            idx = code - _SYLLABLE_BASE
+            cho, rest = divmod(idx, 21 * 28)
+            jung, jong = divmod(rest, 28)
+            word.append(_CHOSEONG[cho] + _JUNGSEONG[jung] + _JONGSEONG[jong])
+        elif ch.isalpha():
+            # 라틴/자모 등은 한 글자가 한 단위 (반각/전각 자모도 위에서 호환 자모로 통일)
+            word.append(ch)
+        elif word:
+            words.append(word)
+            word = []
+    if word:
+        words.append(word)
+    return words
+
+
+def normalize_for_match(text: str) -> Tuple[str, bytearray, bytearray]:
+    """
+    (자모열, 글자 경계, 단어 경계).
+    - 한 글자짜리 단어끼리는 붙여 쓴 것으로 보고 이어 붙인다 ("s h i t", "씨 발", "병*신").
+      그 밖의 단어 사이에는 GAP을 넣어 매칭이 단어를 건너가지 못하게 한다
+      ("his hit", "그 병 신경", "개 새로운" 같은 정상 문장이 걸리지 않도록)
+    - 글자 경계[i] == 1: i 위치에서 원래 글자(음절) 하나가 시작된다. 매칭은 글자 경계에서만
+      시작/끝나야 하므로 "조 좋아" 안의 "ㅈㅗㅈ"처럼 음절에 걸친 우연한 일치는 배제
+    - 단어 경계[i] == 1: 원래 단어의 시작/끝, 또는 라틴 문자와 다른 문자가 바뀌는 위치
+      (라틴 금칙어는 단어 경계에서 시작하고 끝나야 함: "shitake", "passholes" 제외)
+    """
+    parts: List[str] = []
+    starts: List[int] = []
+    bounds: List[int] = []
+    pos = 0
+    prev: List[str] = []
+    for word in _words(text):
+        if parts and not (len(prev) == 1 and len(word) == 1):
+            parts.append(GAP)
+            pos += len(GAP)
+        bounds.append(pos)
+        was_latin: Optional[bool] = None
+        for unit in word:
+            latin = _is_latin(unit)
+            if was_latin is not None and latin != was_latin:
+                bounds.append(pos)
+            was_latin = latin
+            starts.append(pos)
+            parts.append(unit)
+            pos += len(unit)
+        bounds.append(pos)
+        starts.append(pos)
+        prev = word
+
+    flat = "".join(parts)
+    start_marks = bytearray(len(flat) + 1)
+    bound_marks = bytearray(len(flat) + 1)
+    for i in starts:
+        start_marks[i] = 1
+    for i in bounds:
+        bound_marks[i] = 1
+    return flat, start_marks, bound_marks
+
+
+# ----------------------------
+# Aho-Corasick 자동자
+# ----------------------------
+@dataclass(frozen=True)
+class SafetyMatch:
+    term: str
+    category: str
+
+
+class SafetyFilter:
+    """
+    렉시콘 전체를 하나의 Aho-Corasick 자동자로 만들어 입력 길이에 선형 시간으로 검사한다.
+    (금칙어가 수만 개여도 검사 비용은 입력 길이 + 매칭 수에 비례)
+    """
+
+    def __init__(self, lexicon: Dict[str, Iterable[str]]):
+        # 상태별 전이 / 실패 링크 / 출력(패턴 번호 목록)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        # 패턴 번호 : (원래 표기, 분류, 정규화된 길이, 단어 단위로만 매칭할지)
+        self._patterns: List[Tuple[str, str, int, bool]] = []
+
+        seen = set()
+        for category, terms in lexicon.items():
+            for term in terms:
+                norm, _, _ = normalize_for_match(term)
+                if not norm or (norm, category) in seen:
+                    continue
+                seen.add((norm, category))
+                whole_word = all(_is_latin(ch) or ch == GAP for ch in norm)
+                self._add(norm, (term, category, len(norm), whole_word))
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def _add(self, norm: str, pattern: Tuple[str, str, int, bool]) -> None:
+        state = 0
+        for ch in norm:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(len(self._patterns))
+        self._patterns.append(pattern)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str, *, first_only: bool = False) -> List[SafetyMatch]:
+        flat, starts, bounds = normalize_for_match(text)
+        return [match for _, match in self._scan(flat, starts, bounds, first_only=first_only)]
+
+    def _scan(
+        self, flat: str, starts: bytearray, bounds: bytearray, *, first_only: bool = False
+    ) -> List[Tuple[int, SafetyMatch]]:
+        """정규화된 텍스트를 한 번 훑어 (매칭 끝 위치, 매칭) 목록."""
+        goto, fail, out = self._goto, self._fail, self._out
+        matches: List[Tuple[int, SafetyMatch]] = []
+        state = 0
+        for i, ch in enumerate(flat):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state] or not starts[i + 1]:
+                continue
+            for idx in out[state]:
+                term, category, length, whole_word = self._patterns[idx]
+                if not starts[i + 1 - length]:
+                    continue
+                if not whole_word or (bounds[i + 1 - length] and bounds[i + 1]):
+                    matches.append((i + 1, SafetyMatch(term, category)))
+                    if first_only:
+                        return matches
+        return matches
+
+    def contains(self, text: str) -> bool:
+        return bool(self.find(text, first_only=True))
+
+    def check(self, line: str) -> Dict[str, Any]:
+        """gpt 서비스의 safety 딕셔너리 형식 (분류별 매칭 포함)."""
+        return _safety_result(line, self.find(line))
+
+    def check_many(self, lines: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        여러 줄을 한 번에 검사 (결과는 check(line)과 같음, 순서 유지).
+        정규화된 줄들을 LINE_SEP으로 이어 붙여 자동자를 한 번만 돌리고 매칭 끝 위치로 줄을 찾는다.
+        같은 줄이 여러 번 나오면 정규화도 한 번만 한다.
+        """
+        unique = list(dict.fromkeys(lines))
+        normalized = [normalize_for_match(line) for line in unique]
+        joined = LINE_SEP.join(flat for flat, _, _ in normalized)
+        starts = bytearray(len(joined) + 1)
+        bounds = bytearray(len(joined) + 1)
+        offsets: List[int] = []
+        pos = 0
+        for flat, line_starts, line_bounds in normalized:
+            # 줄의 끝 표시(len(flat) 위치)는 구분자 자리에 놓이므로 매칭이 줄 끝에서 끝날 수 있다
+            starts[pos : pos + len(flat) + 1] = line_starts
+            bounds[pos : pos + len(flat) + 1] = line_bounds
+            offsets.append(pos)
+            pos += len(flat) + len(LINE_SEP)
+
+        found: Dict[str, List[SafetyMatch]] = {line: [] for line in unique}
+        for end, match in self._scan(joined, starts, bounds):
+            found[unique[bisect_right(offsets, end - 1) - 1]].append(match)
+        return [_safety_result(line, found[line]) for line in lines]
+
+
+def _safety_result(line: str, matches: List[SafetyMatch]) -> Dict[str, Any]:
+    categories = sorted({m.category for m in matches})
+    return {
+        "profanity": bool(matches),
+        "blocked": bool(matches),  # 간단 규칙: 금칙어 포함 시 차단
+        "length_over": len(line) > 60,
+        "categories": categories,
+    }
+
+
+# ----------------------------
+# 렉시콘 로딩 (시작 시 1회)
+# ----------------------------
+def read_lexicon(path: str | Path) -> List[str]:
+    """한 줄에 금칙어 하나, '#'으로 시작하는 줄은 주석 (UTF-8)."""
+    terms = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            terms.append(line)
+    return terms
+
+
+def load_safety_filter(
+    paths: Optional[Iterable[str]] = None, *, include_default: Optional[bool] = None
+) -> SafetyFilter:
+    """
+    렉시콘 파일들로 필터를 만든다. 파일 이름(확장자 제외)이 분류명이 된다
+    (예: lexicons/hate.txt → "hate").
+    """
+    paths = settings.SAFETY_LEXICON_PATHS if paths is None else paths
+    if include_default is None:
+        include_default = settings.SAFETY_INCLUDE_DEFAULT_LEXICON
+    lexicon: Dict[str, List[str]] = {}
+    if include_default:
+        for category, terms in DEFAULT_LEXICON.items():
+            lexicon.setdefault(category, []).extend(terms)
+    for path in paths:
+        lexicon.setdefault(Path(path).stem, []).extend(read_lexicon(path))
+    return SafetyFilter(lexicon)
+
+
+safety_filter = load_safety_filter()
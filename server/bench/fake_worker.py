@@ -0,0 +1,305 @@
+"""
+GPU 없이 서버를 부하 테스트하기 위한 가짜 AI 워커.
+/ws/ai-worker 에 WebSocket으로 접속해 실제 워커와 같은 프로토콜로 응답한다.
+  - emotion / emotion_batch / gpt (stream 포함) / dialog(단일 왕복) / summarize(세션 요약) 작업
+  - 지연 분포: const:MS | uniform:LO,HI | normal:MEAN,STD | lognormal:MEDIAN,SIGMA (ms)
+  - 오류율(error 응답), 무응답률(서버 타임아웃 유발)
+  - slots: 동시에 "연산"할 수 있는 수 (GPU 동시 처리 한도), 넘치면 워커 안에서 대기
+  - cancel 제어 메시지를 받으면 작업을 중단하고 cancel_ack, 하트비트 ping에는 pong
+  - 응답에 timings {"queue_ms", "compute_ms"}를 실어 서버의 단계별 시간 측정에 쓰이게 함
+
+실행 (server/ 에서, 서버가 떠 있는 상태):
+    python -m bench.fake_worker --url ws://localhost:8000/ws/ai-worker
+    python -m bench.fake_worker --gpt-latency lognormal:300,0.4 --error-rate 0.01 --workers 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# uvicorn[standard] 의존성으로 함께 설치됨
+from websockets.asyncio.client import ClientConnection, connect
+from websockets.exceptions import ConnectionClosed
+
+EMOTIONS = ["joy", "sadness", "anger", "fear", "surprise", "neutral"]
+LINES = [
+    "오늘 정말 수고 많으셨어요. 잠시 쉬어가세요.",
+    "좋은 소식이네요! 다음 걸음도 함께해요.",
+    "걱정이 크셨겠어요. 한 걸음씩 함께 살펴볼게요.",
+    "상점 주인이 오늘 특별 할인을 한다고 했어요.",
+]
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """지연 분포 문자열 → 샘플러 (ms, 음수는 0으로)."""
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(v) for v in args.split(",")] if args else []
+        if kind == "const" and len(values) == 1:
+            (ms,) = values
+            return lambda rng: ms
+        if kind == "uniform" and len(values) == 2:
+            lo, hi = values
+            return lambda rng: rng.uniform(lo, hi)
+        if kind == "normal" and len(values) == 2:
+            mean, std = values
+            return lambda rng: max(0.0, rng.gauss(mean, std))
+        if kind == "lognormal" and len(values) == 2:
+            median, sigma = values
+            mu = math.log(max(median, 1e-9))
+            return lambda rng: rng.lognormvariate(mu, sigma)
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"invalid latency distribution: {spec!r}")
+
+
+@dataclass
+class WorkerProfile:
+    emotion_latency: Callable[[random.Random], float] = field(
+        default_factory=lambda: parse_latency("lognormal:15,0.3")
+    )
+    gpt_latency: Callable[[random.Random], float] = field(
+        default_factory=lambda: parse_latency("lognormal:150,0.4")
+    )
+    # emotion_batch: 배치 하나 = emotion 지연 1회 + 항목당 추가 비용
+    batch_item_ms: float = 1.0
+    error_rate: float = 0.0
+    hang_rate: float = 0.0
+    slots: int = 32
+    stream_chunks: int = 4
+    capabilities: List[str] = field(
+        default_factory=lambda: ["emotion", "emotion_batch", "gpt", "summarize", "heartbeat"]
+    )
+
+
+class FakeWorker:
+    def __init__(
+        self, url: str, worker_id: str, profile: WorkerProfile, *, api_key: Optional[str] = None
+    ) -> None:
+        self.url = url
+        self.worker_id = worker_id
+        self.profile = profile
+        self.api_key = api_key
+        self.rng = random.Random(worker_id)
+        self.slots = asyncio.Semaphore(max(1, profile.slots))
+        self.jobs: Dict[str, asyncio.Task] = {}
+        self.served = 0
+        self.errors = 0
+        self.hung = 0
+        self.cancelled = 0
+
+    async def run(self) -> None:
+        """연결이 끊기면 1초 뒤 재접속 (서버 재시작 중에도 계속 돌 수 있게)."""
+        headers = {
+            "X-Worker-Id": self.worker_id,
+            "X-Worker-Capabilities": ",".join(self.profile.capabilities),
+        }
+        if self.api_key:
+            headers["X-Api-Key"] = self.api_key
+        while True:
+            try:
+                async with connect(self.url, additional_headers=headers, max_size=None) as ws:
+                    print(f"fake worker {self.worker_id} connected")
+                    await self._serve(ws)
+            except (OSError, ConnectionClosed) as e:
+                print(f"fake worker {self.worker_id} disconnected: {e}")
+            for job in self.jobs.values():
+                job.cancel()
+            self.jobs.clear()
+            await asyncio.sleep(1.0)
+
+    async def _serve(self, ws: ClientConnection) -> None:
+        async for raw in ws:
+            message = json.loads(raw)
+            if message.get("type") == "ping":
+                await ws.send(json.dumps({"type": "pong", "id": message.get("id")}))
+            elif message.get("type") == "cancel":
+                job = self.jobs.pop(message.get("request_id"), None)
+                if job is not None:
+                    job.cancel()
+                    self.cancelled += 1
+                await ws.send(
+                    json.dumps(
+                        {
+                            "type": "cancel_ack",
+                            "request_id": message.get("request_id"),
+                            "aborted": job is not None,
+                        }
+                    )
+                )
+            elif "request_id" in message:
+                req_id = message["request_id"]
+                job = asyncio.create_task(self._handle(ws, message))
+                self.jobs[req_id] = job
+                job.add_done_callback(lambda _t, r=req_id: self.jobs.pop(r, None))
+            # register_prompts 등 나머지 제어 메시지는 무시 ("prompts" 능력을 알리지 않음)
+
+    async def _handle(self, ws: ClientConnection, message: Dict[str, Any]) -> None:
+        req_id = message["request_id"]
+        task_type = message.get("type")
+        payload = message.get("payload") or {}
+        rng = self.rng
+        if rng.random() < self.profile.hang_rate:
+            self.hung += 1
+            return  # 응답하지 않음 → 서버 타임아웃
+        if rng.random() < self.profile.error_rate:
+            self.errors += 1
+            await ws.send(json.dumps({"request_id": req_id, "error": "simulated worker error"}))
+            return
+
+        t_queued = time.perf_counter()
+        async with self.slots:
+            t_start = time.perf_counter()
+            if task_type == "emotion_batch":
+                items = payload.get("items") or []
+                ms = self.profile.emotion_latency(rng) + self.profile.batch_item_ms * len(items)
+                await asyncio.sleep(ms / 1000)
+                result: Any = {"results": [self._emotion() for _ in items]}
+            elif task_type == "emotion":
+                await asyncio.sleep(self.profile.emotion_latency(rng) / 1000)
+                result = self._emotion()
+            elif task_type == "dialog":
+                emotion_ms = self.profile.emotion_latency(rng)
+                gpt_ms = self.profile.gpt_latency(rng)
+                await asyncio.sleep((emotion_ms + gpt_ms) / 1000)
+                result = {
+                    **self._emotion(),
+                    "content": rng.choice(LINES),
+                    "timings": {"emotion_ms": emotion_ms, "gpt_ms": gpt_ms},
+                }
+            elif task_type == "gpt" and message.get("stream"):
+                await self._stream(ws, req_id, t_queued, t_start)
+                return
+            elif task_type == "gpt":
+                await asyncio.sleep(self.profile.gpt_latency(rng) / 1000)
+                result = {"content": rng.choice(LINES)}
+            elif task_type == "summarize":
+                await asyncio.sleep(self.profile.gpt_latency(rng) / 1000)
+                result = {"summary": _summarize(payload)}
+            else:
+                await ws.send(
+                    json.dumps({"request_id": req_id, "error": f"unsupported task {task_type}"})
+                )
+                return
+        self.served += 1
+        await ws.send(
+            json.dumps(
+                {
+                    "request_id": req_id,
+                    "result": result,
+                    "timings": _timings(t_queued, t_start),
+                },
+                ensure_ascii=False,
+            )
+        )
+
+    async def _stream(
+        self, ws: ClientConnection, req_id: str, t_queued: float, t_start: float
+    ) -> None:
+        line = self.rng.choice(LINES)
+        chunks = max(1, self.profile.stream_chunks)
+        step = math.ceil(len(line) / chunks)
+        delay = self.profile.gpt_latency(self.rng) / 1000 / chunks
+        for i in range(0, len(line), step):
+            await asyncio.sleep(delay)
+            await ws.send(
+                json.dumps(
+                    {
+                        "request_id": req_id,
+                        "partial": True,
+                        "result": {"delta": line[i : i + step]},
+                    },
+                    ensure_ascii=False,
+                )
+            )
+        self.served += 1
+        await ws.send(
+            json.dumps({"request_id": req_id, "result": {}, "timings": _timings(t_queued, t_start)})
+        )
+
+    def _emotion(self) -> Dict[str, Any]:
+        return {"emotion": self.rng.choice(EMOTIONS), "confidence": round(self.rng.random(), 3)}
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "served": self.served,
+            "errors": self.errors,
+            "hung": self.hung,
+            "cancelled": self.cancelled,
+        }
+
+
+def _timings(t_queued: float, t_start: float) -> Dict[str, float]:
+    return {
+        "queue_ms": round((t_start - t_queued) * 1000, 3),
+        "compute_ms": round((time.perf_counter() - t_start) * 1000, 3),
+    }
+
+
+def _summarize(payload: Dict[str, Any]) -> str:
+    """이전 요약 + 플레이어 발화 앞부분 (max_tokens를 글자 수로 보고 뒤쪽을 남김)."""
+    parts = [str(payload.get("summary") or "")]
+    parts += [str(turn.get("player", ""))[:20] for turn in payload.get("turns") or []]
+    summary = " / ".join(p for p in parts if p)
+    return summary[-int(payload.get("max_tokens") or 200) :]
+
+
+def _latency_spec(spec: str) -> str:
+    """argparse용: 형식만 검사하고 원문을 보관 (하위 프로세스에 그대로 넘길 수 있게)."""
+    parse_latency(spec)
+    return spec
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--workers", type=int, default=1, help="접속할 가짜 워커 수")
+    parser.add_argument("--emotion-latency", type=_latency_spec, default="lognormal:15,0.3")
+    parser.add_argument("--gpt-latency", type=_latency_spec, default="lognormal:150,0.4")
+    parser.add_argument("--batch-item-ms", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--slots", type=int, default=32)
+    parser.add_argument(
+        "--capabilities",
+        default="emotion,emotion_batch,gpt,summarize,heartbeat",
+        help='쉼표 구분 (단일 왕복까지 시험하려면 "dialog" 추가)',
+    )
+
+
+def profile_from_args(args: argparse.Namespace) -> WorkerProfile:
+    return WorkerProfile(
+        emotion_latency=parse_latency(args.emotion_latency),
+        gpt_latency=parse_latency(args.gpt_latency),
+        batch_item_ms=args.batch_item_ms,
+        error_rate=args.error_rate,
+        hang_rate=args.hang_rate,
+        slots=args.slots,
+        capabilities=[c.strip() for c in args.capabilities.split(",") if c.strip()],
+    )
+
+
+async def run_workers(url: str, count: int, profile: WorkerProfile, api_key: Optional[str]) -> None:
+    workers = [FakeWorker(url, f"fake-{i}", profile, api_key=api_key) for i in range(count)]
+    await asyncio.gather(*(w.run() for w in workers))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulated AI worker")
+    parser.add_argument("--url", default="ws://localhost:8000/ws/ai-worker")
+    parser.add_argument("--api-key", default=None, help="서버 SERVER_API_KEY (설정된 경우)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_workers(args.url, args.workers, profile_from_args(args), args.api_key))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+/v1/dialog/generate 부하 생성기. 목표 요청률(req/s)로 요청을 열린 루프(open loop)로 보내고
+처리량, p50/p95/p99 지연, 상태코드 분포, 타임아웃/폴백 비율, 단계별 시간(usage) 중앙값을 출력한다.
+
+--url 없이 실행하면 오프라인 모드: 서버(uvicorn)와 가짜 AI 워커(bench.fake_worker)를
+하위 프로세스로 띄워서 측정 후 종료한다 (make bench). 레이트리밋은 끄고, 요청 로그는 샘플링 0.
+--max-p99-ms / --max-error-rate를 넘으면 종료 코드 1 (배포 전 회귀 검사용).
+
+실행 (server/ 에서):
+    python -m bench.load
+    python -m bench.load --rate 200 --duration 20 --gpt-latency lognormal:300,0.4 --workers 2
+    python -m bench.load --url http://localhost:8000 --rate 50     # 이미 떠 있는 서버
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from bench.fake_worker import add_profile_arguments
+
+PATH = "/v1/dialog/generate"
+STAGES = ("emotion_queue", "emotion_compute", "gpt_queue", "gpt_compute", "postprocess")
+TEXTS = [
+    "오늘 던전에서 또 졌어요. 너무 속상해요.",
+    "드디어 전설 무기를 얻었어요!",
+    "이 마을에 수상한 사람이 있다던데 알고 계세요?",
+    "길을 잃었는데 북쪽 다리로 가려면 어떻게 해야 하나요?",
+]
+
+
+@dataclass
+class Results:
+    latencies_ms: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    timeouts: int = 0
+    fallbacks: int = 0
+    stages: Dict[str, List[float]] = field(default_factory=dict)
+    sent: int = 0
+
+    @property
+    def completed(self) -> int:
+        return sum(self.statuses.values())
+
+    @property
+    def errors(self) -> int:
+        return sum(n for status, n in self.statuses.items() if status != 200)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """최근접 순위(nearest-rank) 백분위수."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), round(q / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+async def _one(client: httpx.AsyncClient, body: Dict[str, Any], results: Results) -> None:
+    t0 = time.perf_counter()
+    try:
+        resp = await client.post(PATH, json=body)
+    except httpx.TimeoutException:
+        results.statuses["client_timeout"] += 1
+        results.timeouts += 1
+        return
+    except httpx.HTTPError as e:
+        results.statuses[type(e).__name__] += 1
+        return
+    latency_ms = (time.perf_counter() - t0) * 1000
+    results.statuses[resp.status_code] += 1
+    if resp.status_code != 200:
+        # 감정 추론 타임아웃은 502 "... timed out"으로 돌아옴
+        if "timed out" in resp.text:
+            results.timeouts += 1
+        return
+    results.latencies_ms.append(latency_ms)
+    data = resp.json()
+    safety = data.get("safety") or {}
+    if safety.get("fallback"):
+        results.fallbacks += 1
+        # 대사 생성 타임아웃은 200 + 폴백 대사
+        if "timed out" in str(safety.get("error") or ""):
+            results.timeouts += 1
+    usage = data.get("usage") or {}
+    for stage in STAGES:
+        value = usage.get(f"{stage}_ms")
+        if value is not None:
+            results.stages.setdefault(stage, []).append(float(value))
+
+
+async def generate_load(
+    url: str,
+    *,
+    rate: float,
+    duration: float,
+    timeout: float,
+    distinct: int,
+    api_key: Optional[str] = None,
+    seed: int = 1,
+) -> Results:
+    """
+    포아송 도착으로 rate req/s를 duration초 동안 보낸다 (응답을 기다리지 않고 다음 요청 전송).
+    distinct: 서로 다른 입력 문장 수 (0이면 매 요청 다른 문장 → 캐시/합치기 영향 없음)
+    """
+    rng = random.Random(seed)
+    results = Results()
+    headers = {"X-Api-Key": api_key} if api_key else {}
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=1000)
+    async with httpx.AsyncClient(
+        base_url=url, headers=headers, timeout=timeout, limits=limits
+    ) as client:
+        tasks = []
+        t0 = time.perf_counter()
+        next_at = 0.0
+        i = 0
+        while next_at < duration:
+            delay = t0 + next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            n = rng.randrange(distinct) if distinct > 0 else i
+            body = {
+                "session_id": f"bench-{i % 100}",
+                "player_id": f"p{i % 1000}",
+                "npc_id": "merchant",
+                "dialog_text": f"{TEXTS[n % len(TEXTS)]} #{n}",
+            }
+            tasks.append(asyncio.create_task(_one(client, body, results)))
+            results.sent += 1
+            i += 1
+            next_at += rng.expovariate(rate)
+        await asyncio.gather(*tasks)
+    return results
+
+
+def report(results: Results, elapsed_s: float, rate: float) -> None:
+    lat = results.latencies_ms
+    total = max(1, results.completed)
+    print(f"target={rate:.0f} req/s sent={results.sent} completed={results.completed}")
+    print(f"  throughput   {results.statuses[200] / elapsed_s:>9.1f} ok req/s")
+    print(
+        f"  latency ms   p50={percentile(lat, 50):.1f} p95={percentile(lat, 95):.1f} "
+        f"p99={percentile(lat, 99):.1f} max={max(lat, default=float('nan')):.1f}"
+    )
+    statuses = ", ".join(f"{k}={v}" for k, v in sorted(results.statuses.items(), key=str))
+    print(f"  status       {statuses}")
+    print(f"  error rate   {results.errors / total:>9.2%}")
+    print(f"  timeout rate {results.timeouts / total:>9.2%}")
+    print(f"  fallback     {results.fallbacks / total:>9.2%}")
+    for stage in STAGES:
+        values = results.stages.get(stage)
+        if values:
+            print(
+                f"  {stage:<16} p50={percentile(values, 50):.1f} p95={percentile(values, 95):.1f}"
+            )
+
+
+# ----------------------------
+# 오프라인 모드: 서버 + 가짜 워커를 하위 프로세스로
+# ----------------------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _server_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    for name in ("SERVER_API_KEY", "SERVER_HMAC_SECRET"):
+        env.pop(name, None)
+    env.update(
+        {
+            "RL_DEFAULT_RATE": str(10**9),
+            "LOG_LEVEL": "ERROR",
+            "LOG_SAMPLE_RATE": "0",
+            "PYTHONUNBUFFERED": "1",
+        }
+    )
+    return env
+
+
+async def _wait_ready(url: str, workers: int, deadline_s: float = 30.0) -> None:
+    """서버가 뜨고 가짜 워커가 모두 접속할 때까지 대기."""
+    deadline = time.perf_counter() + deadline_s
+    async with httpx.AsyncClient(base_url=url, timeout=1.0) as client:
+        while time.perf_counter() < deadline:
+            try:
+                stats = (await client.get("/healthz/bridge")).json()
+                if len(stats.get("workers") or {}) >= workers:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server or fake workers did not come up in time")
+
+
+def _worker_args(args: argparse.Namespace) -> List[str]:
+    out = ["--workers", str(args.workers), "--slots", str(args.slots)]
+    out += ["--batch-item-ms", str(args.batch_item_ms)]
+    out += ["--error-rate", str(args.error_rate), "--hang-rate", str(args.hang_rate)]
+    out += ["--capabilities", args.capabilities]
+    out += ["--emotion-latency", args.emotion_latency, "--gpt-latency", args.gpt_latency]
+    return out
+
+
+async def run_offline(args: argparse.Namespace) -> Results:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    # 주입한 오류/타임아웃의 트레이스백이 결과를 가리지 않도록 서버 출력은 파일(또는 버림)로
+    server_log = open(args.server_log or os.devnull, "w")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1"]
+        + ["--port", str(port), "--log-level", "warning", "--no-access-log"],
+        env=_server_env(),
+        stdout=server_log,
+        stderr=subprocess.STDOUT,
+    )
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "bench.fake_worker", "--url", f"ws://127.0.0.1:{port}/ws/ai-worker"]
+        + _worker_args(args),
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        await _wait_ready(url, args.workers)
+        return await _measure(url, args)
+    finally:
+        for proc in (worker, server):
+            proc.terminate()
+        for proc in (worker, server):
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        server_log.close()
+
+
+async def _measure(url: str, args: argparse.Namespace) -> Results:
+    if args.warmup > 0:
+        await generate_load(
+            url, rate=args.rate, duration=args.warmup, timeout=args.timeout, distinct=0, seed=0
+        )
+    t0 = time.perf_counter()
+    results = await generate_load(
+        url,
+        rate=args.rate,
+        duration=args.duration,
+        timeout=args.timeout,
+        distinct=args.distinct,
+        api_key=args.api_key,
+    )
+    report(results, time.perf_counter() - t0, args.rate)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Dialog load generator")
+    parser.add_argument("--url", default=None, help="대상 서버 (없으면 서버+가짜 워커를 띄움)")
+    parser.add_argument("--api-key", default=os.getenv("SERVER_API_KEY"))
+    parser.add_argument("--rate", type=float, default=50.0, help="목표 요청률 (req/s)")
+    parser.add_argument("--duration", type=float, default=10.0, help="측정 시간 (초)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="측정 전 워밍업 (초)")
+    parser.add_argument("--timeout", type=float, default=15.0, help="클라이언트 타임아웃 (초)")
+    parser.add_argument("--distinct", type=int, default=0, help="서로 다른 입력 수 (0=모두 다름)")
+    parser.add_argument("--server-log", default=None, help="오프라인 모드 서버 출력 파일")
+    parser.add_argument("--max-p99-ms", type=float, default=None)
+    parser.add_argument("--max-error-rate", type=float, default=None)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.url:
+        results = asyncio.run(_measure(args.url.rstrip("/"), args))
+    else:
+        results = asyncio.run(run_offline(args))
+
+    failed = []
+    p99 = percentile(results.latencies_ms, 99)
+    if args.max_p99_ms is not None and not p99 <= args.max_p99_ms:
+        failed.append(f"p99 {p99:.1f}ms > {args.max_p99_ms:.1f}ms")
+    error_rate = results.errors / max(1, results.completed)
+    if args.max_error_rate is not None and error_rate > args.max_error_rate:
+        failed.append(f"error rate {error_rate:.2%} > {args.max_error_rate:.2%}")
+    if failed:
+        print("FAILED: " + "; ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
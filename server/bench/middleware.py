@@ -0,0 +1,154 @@
+"""
+요청 컨텍스트 미들웨어 벤치마크: BaseHTTPMiddleware 구현(이전)과 순수 ASGI 구현(현재)의
+/v1/dialog/ping 처리량(req/s)을 비교. 네트워크/서버 없이 ASGI 앱을 직접 호출해
+미들웨어와 라우팅 오버헤드만 잰다 (로그는 /dev/null로 보냄).
+
+실행 (server/ 에서):
+    python -m bench.middleware
+    python -m bench.middleware --requests 20000 --concurrency 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict
+
+# 벤치마크 중 레이트리밋에 걸리지 않도록 (security 모듈 import 전에 설정)
+os.environ.setdefault("RL_DEFAULT_RATE", str(10**9))
+
+from fastapi import Request, Response  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.types import ASGIApp  # noqa: E402
+
+from app.core.observability import (  # noqa: E402
+    RequestContextMiddleware,
+    _gen_request_id,
+    _request_id_ctx,
+    get_logger,
+)
+from app.main import create_app  # noqa: E402
+
+PATH = "/v1/dialog/ping"
+
+
+class LegacyRequestContextMiddleware(BaseHTTPMiddleware):
+    """비교용: 이전 BaseHTTPMiddleware 기반 구현 (로깅 내용은 현재 구현과 같음)."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        super().__init__(app)
+        self.skip_paths = {"/healthz"}
+        self._logger = get_logger("request")
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:  # type: ignore[override]
+        request_id = request.headers.get("X-Request-ID") or _gen_request_id()
+        _request_id_ctx.set(request_id)
+        start = time.perf_counter()
+        extra: Dict[str, Any] = {"method": request.method, "path": request.url.path}
+        self._logger.info("request start", extra={**extra, "status_code": None, "latency_ms": None})
+        response: Response = await call_next(request)
+        response.headers.setdefault("X-Request-ID", request_id)
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        self._logger.info(
+            "request end",
+            extra={**extra, "status_code": response.status_code, "latency_ms": latency_ms},
+        )
+        return response
+
+
+def build_app(legacy: bool) -> ASGIApp:
+    app = create_app()
+    if legacy:
+        for i, mw in enumerate(app.user_middleware):
+            if mw.cls is RequestContextMiddleware:
+                app.user_middleware[i] = type(mw)(LegacyRequestContextMiddleware)
+    return app
+
+
+def _silence_logs() -> None:
+    devnull = open(os.devnull, "w")
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(devnull)
+
+
+async def _call(app: ASGIApp) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": PATH,
+        "raw_path": PATH.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 40000),
+        "server": ("bench", 80),
+    }
+    sent_request = False
+    status = 0
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal sent_request
+        if not sent_request:
+            sent_request = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # 실제 서버처럼 연결이 끊길 때까지 대기
+        await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)  # type: ignore[arg-type]
+    return status
+
+
+async def measure(app: ASGIApp, total: int, concurrency: int) -> float:
+    # 워밍업 (미들웨어 스택 빌드 포함)
+    for _ in range(200):
+        assert await _call(app) == 200
+    remaining = total
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await _call(app)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - t0)
+
+
+async def run(total: int, concurrency: int, rounds: int) -> None:
+    apps = {"base_http": build_app(legacy=True), "pure_asgi": build_app(legacy=False)}
+    _silence_logs()  # create_app()이 로깅 핸들러를 다시 설정하므로 앱 생성 후
+    best = {name: 0.0 for name in apps}
+    for _ in range(rounds):
+        for name, app in apps.items():
+            best[name] = max(best[name], await measure(app, total, concurrency))
+    print(f"path={PATH} requests={total} concurrency={concurrency} rounds={rounds} (best)")
+    for name, rps in best.items():
+        print(f"{name:>10} {rps:>10.0f} req/s")
+    print(f"{'speedup':>10} {best['pure_asgi'] / best['base_http']:>10.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Request middleware benchmark")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
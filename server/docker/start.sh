@@ -7,6 +7,7 @@ set -e
 : "${UVICORN_PORT:=8000}"
 : "${APP_MODULE:=app.main:app}"
 : "${ENV:=prod}"
+: "${BRIDGE_BROKER_PATH:=/tmp/dialog-bridge.sock}"
 
 echo "[start.sh] Starting server in $ENV mode..."
 
@@ -17,6 +18,21 @@ if [ "$ENV" = "dev" ]; then
     --host "$UVICORN_HOST" \
     --port "$UVICORN_PORT"
 else
+  # 멀티 프로세스에서 AI 워커를 공유하기 위한 브리지 백엔드 (none | unix | redis)
+  : "${BRIDGE_BACKEND:=unix}"
+  export BRIDGE_BACKEND BRIDGE_BROKER_PATH
+
+  # 로컬 브로커: 각 gunicorn 프로세스가 Unix 소켓으로 접속해 AI 워커를 공유
+  if [ "$BRIDGE_BACKEND" = "unix" ]; then
+    python -m app.core.broker --path "$BRIDGE_BROKER_PATH" &
+  fi
+
+  # /metrics 멀티 프로세스 집계: 프로세스별 지표 파일 디렉터리 (시작 시 비움)
+  : "${PROMETHEUS_MULTIPROC_DIR:=/tmp/prometheus-multiproc}"
+  rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+  export PROMETHEUS_MULTIPROC_DIR
+
   # 프로덕션 모드: Gunicorn + UvicornWorker
   exec gunicorn "$APP_MODULE" \
     -k uvicorn.workers.UvicornWorker \
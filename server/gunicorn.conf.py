@@ -0,0 +1,9 @@
+# gunicorn 설정 (실행 디렉터리의 gunicorn.conf.py는 gunicorn이 자동으로 읽음)
+# 나머지 옵션은 docker/start.sh의 명령행 인자로 지정
+
+
+def child_exit(server, worker):
+    # 종료된 워커 프로세스의 Prometheus 게이지 파일 정리 (PROMETHEUS_MULTIPROC_DIR 사용 시)
+    from app.core.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
@@ -0,0 +1,44 @@
+import asyncio
+import json
+
+
+class FakeWorkerSocket:
+    """
+    요청마다 delay초 뒤에 {"content": name}으로 응답하는 워커 WebSocket (cancel은 기록만).
+    respond를 주면 그 함수가 요청 메시지로 만든 값을 result로 응답.
+    """
+
+    def __init__(self, bridge, name: str, delay: float, respond=None) -> None:
+        self.scope = {}
+        self.bridge = bridge
+        self.name = name
+        self.delay = delay
+        self.respond = respond
+        self.requests = []
+        self.cancels = []
+        self.closed = None
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def close(self, code=1000):
+        self.closed = code
+
+    async def send_text(self, text):
+        message = json.loads(text)
+        if message.get("type") == "cancel":
+            self.cancels.append(message.get("reason"))
+            return
+        if "request_id" not in message:
+            return
+        self.requests.append(message)
+
+        result = self.respond(message) if self.respond else {"content": self.name}
+
+        async def reply():
+            await asyncio.sleep(self.delay)
+            await self.bridge.process_message(
+                json.dumps({"request_id": message["request_id"], "result": result})
+            )
+
+        asyncio.ensure_future(reply())
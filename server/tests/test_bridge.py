@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core import metrics
+from app.core.bridge import AIConnectionManager, MicroBatcher
+from tests.fakes import FakeWorkerSocket
+
+
+def _label_items(message):
+    return {"results": [{"emotion": item["text"]} for item in message["payload"]["items"]]}
+
+
+async def _batching_bridge(*, max_size: int, max_wait_ms: float):
+    bridge = AIConnectionManager(task_limits={})
+    bridge.coalesce_tasks = frozenset()
+    bridge.batchers["emotion"] = MicroBatcher(
+        bridge,
+        task_type="emotion",
+        batch_type="emotion_batch",
+        max_size=max_size,
+        max_wait_ms=max_wait_ms,
+    )
+    socket = FakeWorkerSocket(bridge, "w1", 0.0, respond=_label_items)
+    await bridge.connect(socket, worker_id="w1", capabilities=["emotion", "emotion_batch"])
+    return bridge, socket
+
+
+async def test_batch_flushes_as_soon_as_it_is_full():
+    # 대기 시간이 길어도 max_size개가 모이면 바로 전송
+    bridge, socket = await _batching_bridge(max_size=3, max_wait_ms=10_000)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(
+            *(bridge.send_batched_request("emotion", {"text": t}) for t in ("a", "b", "c"))
+        ),
+        timeout=1.0,
+    )
+
+    assert results == [{"emotion": "a"}, {"emotion": "b"}, {"emotion": "c"}]
+    assert [m["type"] for m in socket.requests] == ["emotion_batch"]
+    assert len(socket.requests[0]["payload"]["items"]) == 3
+
+
+async def test_partial_batch_flushes_after_max_wait():
+    bridge, socket = await _batching_bridge(max_size=8, max_wait_ms=50)
+
+    calls = [
+        asyncio.ensure_future(bridge.send_batched_request("emotion", {"text": t}))
+        for t in ("a", "b")
+    ]
+    await asyncio.sleep(0.01)
+    assert socket.requests == []
+
+    assert await asyncio.gather(*calls) == [{"emotion": "a"}, {"emotion": "b"}]
+    assert len(socket.requests) == 1
+    assert socket.requests[0]["payload"]["items"] == [{"text": "a"}, {"text": "b"}]
+
+
+async def test_per_item_errors_fail_only_that_item():
+    bridge, socket = await _batching_bridge(max_size=2, max_wait_ms=10_000)
+    socket.respond = lambda message: {"results": [{"emotion": "joy"}, {"error": "bad input"}]}
+
+    ok, failed = await asyncio.gather(
+        bridge.send_batched_request("emotion", {"text": "a"}),
+        bridge.send_batched_request("emotion", {"text": "b"}),
+        return_exceptions=True,
+    )
+
+    assert ok == {"emotion": "joy"}
+    assert str(failed) == "bad input"
+
+
+async def test_reconnect_with_same_id_closes_the_old_socket():
+    bridge = AIConnectionManager(task_limits={})
+    bridge.coalesce_tasks = frozenset()
+    old = FakeWorkerSocket(bridge, "old", 1.0)
+    await bridge.connect(old, worker_id="w1", capabilities=["gpt"])
+    call = asyncio.ensure_future(bridge.send_request_and_wait("gpt", {"n": 1}))
+    await asyncio.sleep(0.01)
+
+    new = FakeWorkerSocket(bridge, "new", 0.0)
+    await bridge.connect(new, worker_id="w1", capabilities=["gpt"])
+    await asyncio.sleep(0.01)
+
+    assert old.closed == 1011 and new.closed is None
+    # 이전 연결에 걸려 있던 요청은 타임아웃까지 기다리지 않고 실패
+    with pytest.raises(ConnectionError):
+        await call
+    assert await bridge.send_request_and_wait("gpt", {"n": 2}) == {"content": "new"}
+
+
+async def test_dropping_a_worker_removes_its_metric_series():
+    bridge = AIConnectionManager(task_limits={})
+    socket = FakeWorkerSocket(bridge, "gone", 0.0)
+    await bridge.connect(socket, worker_id="gone-1", capabilities=["gpt"])
+    metrics.refresh_bridge_gauges(bridge)
+    labels = {"worker_id": "gone-1"}
+    assert REGISTRY.get_sample_value("bridge_circuit_trips_total", labels) == 0.0
+    assert REGISTRY.get_sample_value("bridge_worker_in_flight", labels) == 0.0
+
+    bridge.disconnect(socket)
+
+    assert REGISTRY.get_sample_value("bridge_circuit_trips_total", labels) is None
+    assert REGISTRY.get_sample_value("bridge_worker_in_flight", labels) is None
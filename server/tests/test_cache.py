@@ -0,0 +1,90 @@
+from app.core.cache import TieredCache, TTLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeStore:
+    def __init__(self, *, broken: bool = False) -> None:
+        self.data = {}
+        self.broken = broken
+
+    async def kv_get(self, key):
+        if self.broken:
+            raise ConnectionError("store down")
+        return self.data.get(key)
+
+    async def kv_set(self, key, value, ttl_s):
+        if self.broken:
+            raise ConnectionError("store down")
+        self.data[key] = value
+
+
+def test_ttl_expiry_and_per_entry_ttl():
+    clock = FakeClock()
+    cache = TTLCache(ttl_s=10.0, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl_s=100.0)
+
+    clock.now = 10.0
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_lru_eviction_by_entries():
+    cache = TTLCache(ttl_s=60.0, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # a를 최근 사용으로
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_byte_budget_and_oversized_values():
+    cache = TTLCache(ttl_s=60.0, max_bytes=100, sizeof=lambda key, value: len(value))
+    cache.set("a", "x" * 60)
+    cache.set("b", "x" * 60)
+    assert cache.get("a") is None and cache.get("b") == "x" * 60
+    assert cache.bytes == 60
+
+    # 전체 상한보다 큰 항목은 저장하지 않고 기존 항목도 밀어내지 않음
+    cache.set("huge", "x" * 101)
+    assert cache.get("huge") is None and cache.get("b") == "x" * 60
+
+    # 같은 키를 덮어쓰면 크기를 다시 계산
+    cache.set("b", "x" * 10)
+    assert cache.bytes == 10
+
+
+async def test_tiered_cache_fills_local_from_shared_store():
+    store = FakeStore()
+    writer = TieredCache(TTLCache(ttl_s=60.0), store=lambda: store, namespace="emo")
+    reader = TieredCache(TTLCache(ttl_s=60.0), store=lambda: store, namespace="emo")
+
+    await writer.set("k", ["joy", 0.9])
+    assert store.data == {"emo:k": ["joy", 0.9]}
+
+    assert await reader.get("k") == ["joy", 0.9]
+    assert reader.shared_hits == 1
+    # 두 번째 조회는 로컬 캐시에서
+    assert await reader.get("k") == ["joy", 0.9]
+    assert reader.shared_hits == 1
+
+
+async def test_tiered_cache_treats_store_errors_as_misses():
+    cache = TieredCache(TTLCache(ttl_s=60.0), store=lambda: FakeStore(broken=True))
+    await cache.set("k", 1)
+    assert await cache.get("k") == 1
+    assert await cache.get("missing") is None
+
+    no_store = TieredCache(TTLCache(ttl_s=60.0), store=lambda: None)
+    assert await no_store.get("missing") is None
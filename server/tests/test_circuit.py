@@ -0,0 +1,74 @@
+from app.core.circuit import CLOSED, HALF_OPEN, OPEN, WorkerHealth
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _health(clock, **kwargs) -> WorkerHealth:
+    options = {"failure_threshold": 3, "open_s": 5.0, "max_open_s": 20.0, **kwargs}
+    return WorkerHealth(clock=clock, **options)
+
+
+def test_closed_open_half_open_closed():
+    clock = FakeClock()
+    health = _health(clock)
+    trips = []
+    health.on_trip = lambda: trips.append(clock.now)
+
+    for _ in range(3):
+        assert health.allows()
+        health.record(False)
+    assert health.state == OPEN and trips == [0.0]
+    assert not health.allows()
+
+    # open_s가 지나면 시험 요청 1건만 허용
+    clock.now = 5.0
+    assert health.allows() and health.state == HALF_OPEN
+    health.begin()
+    assert not health.allows()
+
+    health.record(True, 12.0)
+    assert health.state == CLOSED
+    assert health.allows()
+    assert health.snapshot()["error_rate_ewma"] == 0.0
+
+
+def test_failed_trial_reopens_with_backoff():
+    clock = FakeClock()
+    health = _health(clock, failure_threshold=1)
+    health.record(False)
+
+    for open_s in (10.0, 20.0, 20.0):
+        clock.now += health.open_s
+        assert health.allows()
+        health.begin()
+        health.record(False)
+        assert health.state == OPEN and health.open_s == open_s
+
+    clock.now += health.open_s
+    assert health.allows()
+    health.record(True)
+    assert health.state == CLOSED and health.open_s == 5.0
+
+
+def test_heartbeat_worker_needs_a_pong_to_half_open():
+    clock = FakeClock()
+    health = _health(clock, requires_probe=True)
+    health.trip()
+
+    clock.now = 10.0
+    assert not health.allows()
+    health.probe()
+    assert health.state == HALF_OPEN and health.allows()
+
+
+def test_cancelled_requests_do_not_count():
+    health = _health(FakeClock())
+    for _ in range(10):
+        health.record(None)
+    assert health.state == CLOSED and health.samples == 0
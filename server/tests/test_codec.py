@@ -0,0 +1,61 @@
+import importlib.util
+import sys
+
+import pytest
+
+from app.core import codec
+from app.core.bridge import AIConnectionManager
+
+
+def _load_codec_without_msgpack(monkeypatch):
+    """msgpack이 설치되지 않은 환경처럼 codec 모듈을 새로 불러온다 (기존 모듈은 그대로)."""
+    monkeypatch.setitem(sys.modules, "msgpack", None)
+    spec = importlib.util.find_spec("app.core.codec")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_negotiation_falls_back_without_msgpack(monkeypatch):
+    fallback = _load_codec_without_msgpack(monkeypatch)
+
+    assert "msgpack" not in fallback.CODECS
+    assert fallback.negotiate_codec(["msgpack", "json-utf8"]).name == "json-utf8"
+    assert fallback.negotiate_codec(["msgpack"]) is fallback.JSON_CODEC
+    assert fallback.negotiate_codec(None) is fallback.JSON_CODEC
+
+
+def test_negotiation_picks_first_supported_offer():
+    assert codec.negotiate_codec(["cbor", "json-utf8", "json"]).name == "json-utf8"
+    assert codec.negotiate_codec(["cbor"]) is codec.JSON_CODEC
+
+
+@pytest.mark.parametrize("name", sorted(codec.CODECS))
+def test_round_trip_keeps_korean_text(name):
+    message = {"request_id": "r1", "result": {"content": "어서 오세요"}}
+    c = codec.CODECS[name]
+    frame = c.encode(message)
+    assert isinstance(frame, bytes) == c.binary
+    assert c.decode(frame) == message
+
+
+class _Socket:
+    def __init__(self, offered):
+        self.scope = {"subprotocols": offered}
+        self.accepted = "unset"
+
+    async def accept(self, subprotocol=None):
+        self.accepted = subprotocol
+
+
+async def test_connect_echoes_the_negotiated_subprotocol():
+    bridge = AIConnectionManager(task_limits={})
+
+    socket = _Socket(["cbor", "json-utf8"])
+    worker = await bridge.connect(socket, worker_id="w1")
+    assert socket.accepted == "json-utf8" and worker.codec.name == "json-utf8"
+
+    # 아무것도 제시하지 않은 기존 워커는 서브프로토콜 없이 JSON 텍스트
+    legacy = _Socket([])
+    worker = await bridge.connect(legacy, worker_id="w2")
+    assert legacy.accepted is None and worker.codec is codec.JSON_CODEC
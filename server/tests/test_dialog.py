@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.core.bridge import BridgeOverloaded, WorkerUnavailable
+from app.services import dialog as dialog_module
+from app.services import emotion as emotion_module
+from app.services import gpt as gpt_module
+from app.services.dialog import DialogService
+from app.services.emotion import EmotionService
+from app.services.gpt import GPTService
+
+
+class _FakeBridge:
+    """dialog 작업은 지정한 예외로 실패, emotion/gpt 작업은 고정 응답."""
+
+    def __init__(self, dialog_error: Exception) -> None:
+        self.dialog_error = dialog_error
+        self.calls = []
+
+    def is_available(self, task_type):
+        return True
+
+    async def send_request_and_wait(self, task_type, payload, timeout):
+        self.calls.append(task_type)
+        if task_type == "dialog":
+            raise self.dialog_error
+        return {"content": "어서 오세요, 모험가님."}
+
+    async def send_batched_request(self, task_type, payload, timeout):
+        self.calls.append(task_type)
+        return {"emotion": "joy", "confidence": 0.9}
+
+
+def _service(monkeypatch, dialog_error: Exception):
+    bridge = _FakeBridge(dialog_error)
+    for module in (dialog_module, emotion_module, gpt_module):
+        monkeypatch.setattr(module, "ai_bridge", bridge)
+    emotion_svc = EmotionService()
+    emotion_svc.cache = None
+    gpt_svc = GPTService()
+    gpt_svc.cache = None
+    return DialogService(emotion_svc, gpt_svc), bridge
+
+
+async def _run(svc: DialogService):
+    return await svc.run(dialog_text="안녕", persona="상인", game_state=None)
+
+
+@pytest.mark.parametrize(
+    "error", [asyncio.TimeoutError(), RuntimeError("worker error: model crashed")]
+)
+async def test_fused_failure_returns_fallback_line(monkeypatch, error):
+    svc, bridge = _service(monkeypatch, error)
+
+    result = await _run(svc)
+
+    assert bridge.calls == ["dialog"]
+    assert result.fused is True
+    assert (result.emotion, result.confidence) == ("neutral", 0.0)
+    assert result.safety["fallback"] is True
+    assert result.npc_line
+
+
+async def test_fused_worker_unavailable_falls_back_to_two_steps(monkeypatch):
+    svc, bridge = _service(monkeypatch, WorkerUnavailable("circuit open"))
+
+    result = await _run(svc)
+
+    assert bridge.calls == ["dialog", "emotion", "gpt"]
+    assert result.fused is False
+    assert (result.emotion, result.confidence) == ("joy", 0.9)
+    assert result.npc_line == "어서 오세요, 모험가님."
+    assert result.safety["fallback"] is False
+
+
+async def test_fused_overload_is_not_swallowed(monkeypatch):
+    svc, _ = _service(monkeypatch, BridgeOverloaded("dialog", 1))
+
+    with pytest.raises(BridgeOverloaded):
+        await _run(svc)
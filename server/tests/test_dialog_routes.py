@@ -0,0 +1,181 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.bridge import AIConnectionManager, BridgeOverloaded
+from app.core.security import SecurityContext, rate_limit_dependency
+from app.routers import dialog as dialog_router
+from app.services import gpt as gpt_module
+from app.services.dialog import DialogResult
+from app.services.gpt import GPTService
+from tests.fakes import FakeWorkerSocket
+
+ITEM = {"player_id": "p1", "session_id": "s1", "dialog_text": "안녕"}
+
+
+class FakeEmotionService:
+    async def infer(self, text, locale="ko-KR"):
+        return "joy", 0.9
+
+
+class FakeGPTService:
+    async def stream_line(self, **kwargs):
+        for text in ("어서 ", "오세요"):
+            await asyncio.sleep(0)
+            yield {"type": "delta", "text": text}
+        yield {"type": "done", "npc_line": "어서 오세요", "safety": {"blocked": False}}
+
+
+class FakeDialogService:
+    """브리지로 "gpt" 작업 한 건을 보내고 그 응답을 대사로 쓰는 대화 서비스."""
+
+    def __init__(self, bridge) -> None:
+        self.bridge = bridge
+
+    def task_types(self):
+        return ("gpt",)
+
+    async def run(self, *, dialog_text, **kwargs):
+        result = await self.bridge.send_request_and_wait("gpt", {"text": dialog_text}, timeout=5.0)
+        return DialogResult("joy", 0.9, result["content"], {"blocked": False})
+
+
+def _app(monkeypatch, bridge) -> FastAPI:
+    monkeypatch.setattr(dialog_router, "ai_bridge", bridge)
+    app = FastAPI()
+    app.include_router(dialog_router.router)
+    app.dependency_overrides[rate_limit_dependency] = lambda: SecurityContext("test", "none")
+    app.dependency_overrides[dialog_router.get_emotion_service] = FakeEmotionService
+    app.dependency_overrides[dialog_router.get_gpt_service] = FakeGPTService
+    app.dependency_overrides[dialog_router.get_dialog_service] = lambda: FakeDialogService(bridge)
+    return app
+
+
+async def _worker_bridge(delay: float, **kwargs):
+    bridge = AIConnectionManager(task_limits={}, **kwargs)
+    socket = FakeWorkerSocket(bridge, "w1", delay)
+    await bridge.connect(socket, worker_id="w1", capabilities=["emotion", "gpt"])
+    return bridge, socket
+
+
+def _sse_events(text: str):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_sends_emotion_then_deltas_then_done(monkeypatch):
+    client = TestClient(_app(monkeypatch, AIConnectionManager(task_limits={})))
+
+    resp = client.post("/v1/dialog/stream", json=ITEM)
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(resp.text)
+    assert [name for name, _ in events] == ["emotion", "delta", "delta", "done"]
+    assert events[0][1] == {"emotion": "joy", "confidence": 0.9}
+    assert "".join(data["text"] for name, data in events if name == "delta") == "어서 오세요"
+    assert events[-1][1]["npc_line"] == "어서 오세요"
+
+
+async def test_client_disconnect_returns_499_and_cancels_worker_job(monkeypatch):
+    bridge, socket = await _worker_bridge(1.0)
+    app = _app(monkeypatch, bridge)
+    body = json.dumps(ITEM).encode()
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # 바디를 다 보낸 뒤 워커 응답 전에 클라이언트가 연결을 끊음
+        await asyncio.sleep(0.05)
+        return {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/v1/dialog/generate",
+        "raw_path": b"/v1/dialog/generate",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+    await asyncio.wait_for(app(scope, receive, send), timeout=1.0)
+    await asyncio.sleep(0.01)
+
+    assert sent[0]["status"] == 499
+    assert len(socket.requests) == 1
+    assert socket.cancels == ["cancelled"]
+    assert not bridge.pending_requests and sum(bridge.admitted.values()) == 0
+
+
+@pytest.mark.parametrize("path", ["/v1/dialog/generate", "/v1/dialog/stream"])
+def test_full_queue_returns_503_with_retry_after(monkeypatch, path):
+    bridge = AIConnectionManager(max_in_flight=0, task_limits={}, retry_after_s=7)
+    client = TestClient(_app(monkeypatch, bridge))
+
+    resp = client.post(path, json=ITEM)
+
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "7"
+    assert bridge.rejected
+
+
+class _OverloadedStreamBridge:
+    """입장 제어 사전 점검은 통과하지만 gpt 스트림을 시작할 때 대기열이 가득 찬 브리지."""
+
+    def ensure_capacity(self, *task_types):
+        pass
+
+    async def stream_request(self, task_type, payload, timeout):
+        raise BridgeOverloaded(task_type, 3)
+        yield
+
+
+def test_stream_overload_after_precheck_returns_503(monkeypatch):
+    bridge = _OverloadedStreamBridge()
+    monkeypatch.setattr(gpt_module, "ai_bridge", bridge)
+    app = _app(monkeypatch, bridge)
+    app.dependency_overrides[dialog_router.get_gpt_service] = GPTService
+
+    resp = TestClient(app).post("/v1/dialog/stream", json=ITEM)
+
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "3"
+
+
+async def test_batch_reports_per_item_status(monkeypatch):
+    monkeypatch.setattr(dialog_router.settings, "MAX_INPUT_CHARS", 10)
+    bridge, socket = await _worker_bridge(0.0)
+    bridge.coalesce_tasks = frozenset()
+    client = TestClient(_app(monkeypatch, bridge))
+    items = [ITEM, {**ITEM, "dialog_text": "아주 긴 입력 문장입니다, 열 글자가 넘어요"}, ITEM]
+
+    resp = client.post("/v1/dialog/batch", json={"items": items})
+
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [(r["index"], r["ok"], r["status"]) for r in results] == [
+        (0, True, 200),
+        (1, False, 413),
+        (2, True, 200),
+    ]
+    assert results[0]["response"]["npc_line"] == "w1"
+    assert "too long" in results[1]["error"]
+    # 길이 초과 항목은 워커까지 가지 않음
+    assert len(socket.requests) == 2
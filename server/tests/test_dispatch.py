@@ -0,0 +1,256 @@
+import asyncio
+import struct
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import dispatch
+from app.core.broker import Broker, encode_frame, read_frame
+from app.core.dispatch import RedisBackend, UnixSocketBackend
+
+
+async def _wait_for(predicate, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+async def test_unix_backend_survives_handler_error(tmp_path):
+    path = str(tmp_path / "broker.sock")
+    server = await asyncio.start_unix_server(Broker().handle, path=path)
+    received = []
+
+    async def on_message(message):
+        if message.get("boom"):
+            raise ValueError("bad message")
+        received.append(message)
+
+    async def ignore(message):
+        pass
+
+    receiver = UnixSocketBackend(path, reconnect_s=0.05)
+    sender = UnixSocketBackend(path, reconnect_s=0.05)
+    try:
+        await receiver.start("a", on_message)
+        await sender.start("b", ignore)
+        await receiver.announce({"w1": {"capabilities": ["gpt"]}})
+        await _wait_for(lambda: "a" in sender.directory)
+
+        await sender.publish("a", {"boom": True})
+        await sender.publish("a", {"kind": "reply", "n": 1})
+        await _wait_for(lambda: received)
+
+        assert received == [{"kind": "reply", "n": 1}]
+        assert not receiver._task.done()
+    finally:
+        await receiver.close()
+        await sender.close()
+        server.close()
+
+
+async def test_broker_answers_bad_frames_and_keeps_the_connection(tmp_path):
+    path = str(tmp_path / "broker.sock")
+    server = await asyncio.start_unix_server(Broker().handle, path=path)
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        writer.write(encode_frame({"op": "rl", "id": 1, "key": "k"}))  # rate/per 누락
+        writer.write(encode_frame({"op": "nonce", "id": 2, "nonce": "n", "window_s": "soon"}))
+        writer.write(encode_frame({"op": "send", "target": "nobody"}))  # 응답 없는 op
+        body = b"{not json"
+        writer.write(struct.pack(">I", len(body)) + body)
+        writer.write(encode_frame({"op": "nonce", "id": 3, "nonce": "n", "window_s": 60}))
+        await writer.drain()
+
+        replies = [await asyncio.wait_for(read_frame(reader), 1.0) for _ in range(3)]
+
+        assert [(r["op"], r["id"]) for r in replies] == [
+            ("rl_result", 1),
+            ("nonce_result", 2),
+            ("nonce_result", 3),
+        ]
+        assert "error" in replies[0] and "error" in replies[1]
+        assert replies[2]["fresh"] is True
+    finally:
+        writer.close()
+        server.close()
+
+
+async def test_unix_backend_raises_broker_errors(tmp_path):
+    path = str(tmp_path / "broker.sock")
+    server = await asyncio.start_unix_server(Broker().handle, path=path)
+
+    async def ignore(message):
+        pass
+
+    backend = UnixSocketBackend(path, reconnect_s=0.05)
+    try:
+        await backend.start("a", ignore)
+        await _wait_for(lambda: backend._writer is not None)
+
+        with pytest.raises(RuntimeError):
+            await backend.rate_limit("k", rate="many", per=60.0)
+        assert await backend.claim_nonce("nonce-0001", window_s=60.0)
+        assert not await backend.claim_nonce("nonce-0001", window_s=60.0)
+    finally:
+        await backend.close()
+        server.close()
+
+
+# ----------------------------
+# RedisBackend (redis 패키지 없이 가짜 클라이언트로; Lua는 announce 스크립트만 파이썬으로 흉내)
+# ----------------------------
+class FakePubSub:
+    def __init__(self, redis) -> None:
+        self.redis = redis
+        self.queue = asyncio.Queue()
+        self.channel = None
+
+    async def subscribe(self, channel):
+        self.channel = channel
+        self.redis.subscribers.setdefault(channel, []).append(self.queue)
+        self.queue.put_nowait({"type": "subscribe", "channel": channel})
+
+    async def listen(self):
+        while True:
+            item = await self.queue.get()
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    async def aclose(self):
+        queues = self.redis.subscribers.get(self.channel, [])
+        if self.queue in queues:
+            queues.remove(self.queue)
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.kv = {}
+        self.hash = {}
+        self.beats = {}
+        self.subscribers = {}
+
+    def register_script(self, source):
+        if source == dispatch._ANNOUNCE_LUA:
+            return self._announce
+        return None
+
+    async def _announce(self, keys, args):
+        pid, ttl_s, workers = args
+        self.hash[pid] = workers.encode()
+        self.beats[pid] = self.now
+        for stale in [p for p, t in self.beats.items() if t <= self.now - ttl_s]:
+            self.hash.pop(stale, None)
+            self.beats.pop(stale, None)
+        return [x for pid, value in self.hash.items() for x in (pid.encode(), value)]
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    async def publish(self, channel, data):
+        queues = self.subscribers.get(channel, [])
+        for queue in queues:
+            queue.put_nowait({"type": "message", "data": data.encode()})
+        return len(queues)
+
+    def lose_subscriptions(self):
+        for queues in self.subscribers.values():
+            for queue in queues:
+                queue.put_nowait(ConnectionError("connection reset"))
+
+    async def get(self, key):
+        return self.kv.get(key)
+
+    async def set(self, key, value, *, nx=False, px=None):
+        if nx and key in self.kv:
+            return None
+        self.kv[key] = value
+        return True
+
+    async def hdel(self, key, field):
+        self.hash.pop(field, None)
+
+    async def zrem(self, key, member):
+        self.beats.pop(member, None)
+
+    async def aclose(self):
+        pass
+
+
+async def _redis_pair(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(dispatch, "aioredis", SimpleNamespace(from_url=lambda url: fake))
+    inboxes = {"a": [], "b": []}
+    backends = {}
+    for pid in ("a", "b"):
+        backends[pid] = RedisBackend("redis://fake", ttl_s=5.0, reconnect_s=0.01)
+
+        async def on_message(message, pid=pid):
+            inboxes[pid].append(message)
+
+        await backends[pid].start(pid, on_message)
+    await _wait_for(lambda: all(f"bridge:proc:{p}" in fake.subscribers for p in inboxes))
+    return fake, backends["a"], backends["b"], inboxes
+
+
+async def test_redis_backend_directory_and_messages(monkeypatch):
+    fake, a, b, inboxes = await _redis_pair(monkeypatch)
+    try:
+        await a.announce({"w1": {"capabilities": ["gpt"], "in_flight": 0}})
+        await b.announce({})
+        assert b.directory == {"a": {"w1": {"capabilities": ["gpt"], "in_flight": 0}}}
+        assert a.directory == {}
+
+        await b.publish("a", {"kind": "request", "text": "안녕"})
+        await _wait_for(lambda: inboxes["a"])
+        assert inboxes["a"] == [{"kind": "request", "text": "안녕"}]
+
+        # ttl 동안 공지가 없는 프로세스는 다음 공지에서 빠짐
+        fake.now += 5.0
+        await b.announce({})
+        assert b.directory == {}
+    finally:
+        await a.close()
+        await b.close()
+    assert fake.hash == {} and fake.beats == {}
+
+
+async def test_redis_backend_kv_and_nonce(monkeypatch):
+    fake, a, b, _ = await _redis_pair(monkeypatch)
+    try:
+        await a.kv_set("emo:k", ["joy", 0.9], ttl_s=60.0)
+        assert await b.kv_get("emo:k") == ["joy", 0.9]
+        assert await b.kv_get("missing") is None
+
+        assert await a.claim_nonce("nonce-0001", window_s=60.0)
+        assert not await b.claim_nonce("nonce-0001", window_s=60.0)
+    finally:
+        await a.close()
+        await b.close()
+
+
+async def test_redis_backend_resubscribes_after_connection_loss(monkeypatch):
+    fake, a, b, inboxes = await _redis_pair(monkeypatch)
+    try:
+        await a.announce({})
+        await b.announce({"w1": {}})
+        await a.announce({})
+        assert a.directory
+
+        lost = list(fake.subscribers["bridge:proc:a"])
+        fake.lose_subscriptions()
+        await _wait_for(lambda: {"kind": "backend_reset"} in inboxes["a"])
+        assert a.directory == {}
+
+        # 재구독(이전 구독 정리 후 새 구독)을 기다린 뒤 메시지가 다시 도착하는지 확인
+        await _wait_for(
+            lambda: (queues := fake.subscribers["bridge:proc:a"]) and queues[0] not in lost
+        )
+        await b.publish("a", {"kind": "response", "n": 1})
+        await _wait_for(lambda: {"kind": "response", "n": 1} in inboxes["a"])
+        assert not a._task.done()
+    finally:
+        await a.close()
+        await b.close()
@@ -0,0 +1,66 @@
+import asyncio
+
+from app.core.bridge import AIConnectionManager
+from app.core.hedging import HedgePolicy
+from tests.fakes import FakeWorkerSocket
+
+
+def test_quantile_is_cached_between_recomputes():
+    policy = HedgePolicy(percentile=50.0, min_delay_ms=0.0, min_samples=4, recompute_every=3)
+    for latency in (10.0, 20.0, 30.0):
+        policy.observe(latency)
+    assert policy.delay_s() is None
+
+    policy.observe(40.0)
+    assert policy.delay_s() == 0.03
+
+    # 다음 계산 전까지는 캐시된 값을 그대로 쓴다
+    policy.observe(1000.0)
+    policy.observe(1000.0)
+    assert policy.delay_s() == 0.03
+    policy.observe(1000.0)
+    assert policy.delay_s() == 0.04
+
+
+def test_fixed_delay_and_floor():
+    assert HedgePolicy(delay_ms=25.0).delay_s() == 0.025
+    policy = HedgePolicy(min_delay_ms=50.0, min_samples=1)
+    policy.observe(5.0)
+    assert policy.delay_s() == 0.05
+
+
+async def _hedging_bridge(task_limits):
+    bridge = AIConnectionManager(task_limits=task_limits)
+    bridge.coalesce_tasks = frozenset()
+    policy = bridge.hedging["gpt"] = HedgePolicy(delay_ms=20.0, budget=1.0, burst=1.0)
+    slow = FakeWorkerSocket(bridge, "slow", 0.3)
+    fast = FakeWorkerSocket(bridge, "fast", 0.1)
+    await bridge.connect(slow, worker_id="slow", capabilities=["gpt"])
+    await bridge.connect(fast, worker_id="fast", capabilities=["gpt"])
+    # 첫 시도가 느린 워커로 가도록 빠른 워커에 가짜 부하
+    bridge.workers["fast"].in_flight += 1
+    return bridge, policy, slow
+
+
+async def test_hedge_is_admitted_and_released():
+    bridge, policy, slow = await _hedging_bridge({"gpt": 4})
+
+    call = asyncio.ensure_future(bridge.send_request_and_wait("gpt", {"n": 1}, timeout=2.0))
+    await asyncio.sleep(0.05)
+    assert bridge.admitted["gpt"] == 2
+
+    assert await call == {"content": "fast"}
+    assert bridge.admitted["gpt"] == 0
+    assert policy.hedge_wins == 1
+    # 진 첫 시도도 취소 시점까지의 경과 시간으로 기록
+    assert len(policy.samples) == 1 and policy.samples[0] >= 20.0
+    await asyncio.sleep(0.05)
+    assert slow.cancels == ["hedge"]
+
+
+async def test_hedge_respects_task_limit():
+    bridge, policy, _ = await _hedging_bridge({"gpt": 1})
+
+    assert await bridge.send_request_and_wait("gpt", {"n": 1}, timeout=2.0) == {"content": "slow"}
+    assert policy.hedged == 0
+    assert bridge.admitted["gpt"] == 0
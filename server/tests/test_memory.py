@@ -0,0 +1,70 @@
+import asyncio
+
+from app.core import tracing
+from app.services.memory import SessionStore
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_sessions_are_isolated_per_principal():
+    store = SessionStore()
+    store.record("client-a", "s1", "안녕", "어서 오세요")
+
+    assert "어서 오세요" in store.context("client-a", "s1")
+    assert store.context("client-b", "s1") == ""
+
+
+def test_lru_eviction_and_idle_expiry():
+    clock = FakeClock()
+    store = SessionStore(max_sessions=2, idle_ttl_s=100.0, clock=clock)
+    store.record("p", "s1", "a", "b")
+    store.record("p", "s2", "a", "b")
+    store.context("p", "s1")  # s1을 최근 사용으로
+    store.record("p", "s3", "a", "b")
+
+    assert store.context("p", "s2") == ""
+    assert store.context("p", "s1") and store.context("p", "s3")
+    assert store.evictions == 1
+
+    clock.now = 150.0
+    assert store.context("p", "s1") == ""
+    assert len(store) == 0 and store.expirations == 2
+
+
+def test_snapshot_round_trip_keeps_principal():
+    source = SessionStore()
+    source.record("client-a", "s1", "안녕", "어서 오세요")
+    restored = SessionStore()
+
+    assert restored.restore(source.snapshot()) == 1
+    assert "어서 오세요" in restored.context("client-a", "s1")
+    assert restored.context("client-b", "s1") == ""
+    # 클라이언트 식별자가 없는 이전 형식은 복원하지 않음
+    assert restored.restore({"version": 1, "sessions": {"s1": {}}}) == 0
+
+
+async def test_compaction_runs_outside_the_request_trace():
+    seen = []
+
+    async def summarize(summary, turns, locale, max_tokens):
+        seen.append(tracing.current())
+        return "요약"
+
+    store = SessionStore(max_turns=2, summarize=summarize)
+    token = tracing._trace.set(tracing.Trace("0" * 32))
+    try:
+        for i in range(3):
+            store.record("p", "s1", f"질문 {i}", f"답 {i}")
+    finally:
+        tracing._trace.reset(token)
+    await asyncio.gather(*store._tasks)
+
+    assert seen == [None]
+    assert store.compactions == 1
+    assert "요약" in store.context("p", "s1")
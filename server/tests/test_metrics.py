@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from app.core.bridge import WorkerUnavailable
+from app.core.metrics import fallback_reason
+from app.core.prompts import PromptMiss
+from app.services.gpt import GPTService
+
+
+@pytest.mark.parametrize(
+    "error, reason",
+    [
+        (asyncio.TimeoutError(), "timeout"),
+        (TimeoutError("AI Worker response timed out (gpt)"), "timeout"),
+        (WorkerUnavailable("gpt"), "circuit_open"),
+        (PromptMiss(["deadbeef"]), "prompt_miss"),
+        # 메시지에 특정 문구가 있어도 예외 타입으로만 분류
+        (RuntimeError("model timed out; circuit open"), "error"),
+        ("worker said: timed out", "error"),
+    ],
+)
+def test_fallback_reason_follows_exception_type(error, reason):
+    _, safety = GPTService.fallback("joy", "상인", error)
+    assert safety["reason"] == reason
+    assert fallback_reason(safety) == reason
+
+
+def test_fallback_reason_for_non_error_cases():
+    assert fallback_reason({"fallback": False}) is None
+    assert fallback_reason({"fallback": True, "blocked": True}) == "blocked"
+    assert fallback_reason({"fallback": True}) == "other"
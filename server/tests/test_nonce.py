@@ -0,0 +1,53 @@
+import pytest
+
+from app.core.nonce import BloomFilter, NonceStore
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.parametrize("mode", ["exact", "bloom"])
+def test_replay_rejected_within_window(mode):
+    clock = FakeClock()
+    store = NonceStore(window_s=60.0, buckets=4, mode=mode, bloom_capacity=1000, clock=clock)
+
+    assert store.claim("nonce-0001")
+    assert not store.claim("nonce-0001")
+    assert store.claim("nonce-0002")
+
+    # 버킷 경계를 여러 번 넘어도 window 안이면 계속 거절
+    clock.now = 59.0
+    assert not store.claim("nonce-0001")
+    assert store.stats()["replayed"] == 2
+
+
+@pytest.mark.parametrize("mode", ["exact", "bloom"])
+def test_old_buckets_are_dropped_after_window(mode):
+    clock = FakeClock()
+    store = NonceStore(window_s=60.0, buckets=4, mode=mode, bloom_capacity=1000, clock=clock)
+    store.claim("nonce-0001")
+
+    clock.now = 200.0
+    assert store.claim("nonce-0001")
+    # 현재 버킷 + buckets개를 넘지 않음
+    assert store.stats()["buckets"] <= 5
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        NonceStore(window_s=60.0, mode="lru")
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, fp_rate=1e-4)
+    items = [f"nonce-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+    assert false_positives <= 10
@@ -0,0 +1,77 @@
+import pytest
+
+from app.core.observability import RequestContextMiddleware
+
+
+@pytest.mark.parametrize(
+    "path, skipped",
+    [
+        ("/healthz", True),
+        ("/healthz/bridge", True),
+        ("/healthz/memory", True),
+        ("/metrics", True),
+        ("/healthzz", False),
+        ("/v1/dialog/generate", False),
+    ],
+)
+def test_default_skip_paths_cover_health_and_metrics(path, skipped):
+    middleware = RequestContextMiddleware(app=None)
+    assert middleware._skipped(path) is skipped
+
+
+def test_empty_skip_paths_logs_everything():
+    middleware = RequestContextMiddleware(app=None, skip_paths=set())
+    assert not middleware._skipped("/healthz")
+
+
+class _RecordingLogger:
+    def __init__(self) -> None:
+        self.messages = []
+
+    def info(self, msg, *args, **kwargs):
+        self.messages.append(msg)
+
+    def log(self, level, msg, *args, **kwargs):
+        self.messages.append(msg)
+
+    def exception(self, msg, *args, **kwargs):
+        self.messages.append(msg)
+
+
+async def _request(middleware, status=200):
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware.app = app
+    scope = {"type": "http", "method": "GET", "path": "/v1/dialog/ping", "headers": []}
+    await middleware(scope, receive, send)
+
+
+@pytest.mark.parametrize(
+    "sample_rate, status, expected",
+    [
+        (1.0, 200, ["request start", "request end"]),
+        (0.0, 200, []),
+        # 표본이 아니어도 5xx는 end를 남김 (start는 표본일 때만)
+        (0.0, 503, ["request end"]),
+    ],
+)
+async def test_request_start_and_end_follow_one_sampling_decision(sample_rate, status, expected):
+    logger = _RecordingLogger()
+    middleware = RequestContextMiddleware(app=None, logger=logger, sample_rate=sample_rate)
+    await _request(middleware, status)
+    assert logger.messages == expected
+
+
+async def test_log_start_can_be_disabled():
+    logger = _RecordingLogger()
+    middleware = RequestContextMiddleware(app=None, logger=logger, log_start=False)
+    await _request(middleware)
+    assert logger.messages == ["request end"]
@@ -0,0 +1,68 @@
+import pytest
+
+from app.core.prompts import PROMPT_REFS, PROMPT_VARS, PromptMiss, PromptRegistry
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _payload(system: str, template: str, persona: str) -> dict:
+    return {
+        PROMPT_REFS: {"system": system, "template": template, "persona": persona},
+        PROMPT_VARS: {"text": "안녕"},
+        "temperature": 0.7,
+    }
+
+
+def test_static_prompts_survive_ttl_expiry():
+    clock = FakeClock()
+    registry = PromptRegistry(ttl_s=10.0, clock=clock)
+    system = registry.register_static("시스템")
+    template = registry.register_static("{persona}: {text}")
+    persona = registry.register("상인")
+
+    clock.now = 3600.0
+    assert registry.get(system) == "시스템"
+    assert registry.get(template) == "{persona}: {text}"
+    with pytest.raises(PromptMiss):
+        registry.get(persona)
+
+    # 요청마다 다시 등록되는 페르소나는 다시 살아남
+    persona = registry.register("상인")
+    expanded = registry.expand(_payload(system, template, persona))
+    assert expanded["user_prompt"] == "상인: 안녕"
+    assert expanded["system_prompt"] == "시스템"
+    assert PROMPT_REFS not in expanded and expanded["temperature"] == 0.7
+
+
+def test_many_personas_do_not_evict_static_prompts():
+    registry = PromptRegistry(max_entries=5)
+    system = registry.register_static("시스템")
+    template = registry.register_static("{persona}")
+    for i in range(100):
+        registry.register(f"페르소나 {i}")
+
+    assert registry.get(system) == "시스템"
+    assert registry.get(template) == "{persona}"
+    latest = registry.register("페르소나 99")
+    assert registry.expand(_payload(system, template, latest))["user_prompt"] == "페르소나 99"
+
+
+def test_register_of_static_text_does_not_touch_dynamic_cache():
+    registry = PromptRegistry(max_entries=1)
+    system = registry.register_static("시스템")
+    assert registry.register("시스템") == system
+    registry.register("다른 페르소나")
+    assert registry.get(system) == "시스템"
+
+
+def test_texts_for_reports_missing_hash():
+    registry = PromptRegistry()
+    with pytest.raises(PromptMiss) as info:
+        registry.texts_for({PROMPT_REFS: {"system": "deadbeef"}})
+    assert info.value.missing == ["deadbeef"]
@@ -0,0 +1,72 @@
+import pytest
+
+from app.core.ratelimit import GCRALimiter, RateLimit
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_burst_up_to_rate_then_limited():
+    clock = FakeClock()
+    limiter = GCRALimiter(clock=clock)
+    limit = RateLimit(rate=5, per=10.0)
+
+    assert all(limiter.hit("a", limit)[0] for _ in range(5))
+    allowed, retry_after = limiter.hit("a", limit)
+    assert not allowed
+    assert retry_after == pytest.approx(2.0)
+
+    # 다른 키는 따로 센다
+    assert limiter.hit("b", limit)[0]
+
+    # 간격(per / rate)만큼 지나면 한 건 더 허용
+    clock.now += 2.0
+    assert limiter.hit("a", limit)[0]
+    assert not limiter.hit("a", limit)[0]
+
+
+def test_no_double_burst_at_window_boundary():
+    clock = FakeClock()
+    limiter = GCRALimiter(clock=clock)
+    limit = RateLimit(rate=10, per=60.0)
+
+    for _ in range(10):
+        assert limiter.hit("k", limit)[0]
+    clock.now += 30.0
+    # 고정 윈도우라면 새 윈도우에서 10건이 더 통과하지만 GCRA는 경과 시간만큼만
+    assert sum(limiter.hit("k", limit)[0] for _ in range(10)) == 5
+
+
+def test_cost_counts_as_multiple_hits():
+    limiter = GCRALimiter(clock=FakeClock())
+    limit = RateLimit(rate=4, per=4.0)
+    assert limiter.hit("k", limit, cost=3)[0]
+    assert not limiter.hit("k", limit, cost=2)[0]
+    assert limiter.hit("k", limit, cost=1)[0]
+
+
+def test_idle_keys_are_swept():
+    clock = FakeClock()
+    limiter = GCRALimiter(sweep_interval_s=5.0, clock=clock)
+    limit = RateLimit(rate=1, per=1.0)
+    for i in range(10):
+        limiter.hit(f"k{i}", limit)
+    assert len(limiter) == 10
+
+    clock.now += 10.0
+    limiter.hit("fresh", limit)
+    assert len(limiter) == 1
+    assert limiter.stats()["evicted"] == 10
+
+
+def test_max_keys_bounds_memory():
+    limiter = GCRALimiter(max_keys=100, clock=FakeClock())
+    limit = RateLimit(rate=1, per=60.0)
+    for i in range(1000):
+        limiter.hit(f"k{i}", limit)
+    assert len(limiter) <= 100
@@ -0,0 +1,138 @@
+import pytest
+
+from app.services.safety import DEFAULT_LEXICON, SafetyFilter
+
+flt = SafetyFilter(DEFAULT_LEXICON)
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        # 단어 사이 공백을 지우면 금칙어가 되지만 정상 문장 (이전 정규식도 통과)
+        "That was his hit song",
+        "this hit was great",
+        "그 병 신경 쓰지 마세요",
+        "개 새로운 장난감이네요",
+        "ass hole",
+        # 라틴 금칙어가 다른 단어 안에 들어 있는 경우
+        "Try the shitake soup",
+        "The passholes are closed",
+        # 음절에 걸친 자모 일치
+        "조 좋아요",
+        "오늘 정말 수고 많으셨어요. 잠시 쉬어가세요.",
+        "",
+    ],
+)
+def test_clean_lines_pass(line):
+    assert not flt.contains(line)
+    assert flt.check(line)["blocked"] is False
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "씨발",
+        "씨발놈아",
+        "씨 발",
+        "씨*발",
+        "병*신",
+        "씨ㅂㅏㄹ",
+        "what the fuck",
+        "FUCK!",
+        "f u c k you",
+        "s h i t",
+        "sh1t happens",
+        "$hit",
+        "fucking hell",
+        "shit이야",
+        "you are an asshole.",
+        "ｆｕｃｋ",
+    ],
+)
+def test_profanity_and_evasions_blocked(line):
+    result = flt.check(line)
+    assert result["blocked"] is True
+    assert result["categories"] == ["profanity"]
+
+
+def test_multi_word_lexicon_term():
+    custom = SafetyFilter({"custom": ["bad word"]})
+    assert custom.contains("that is a bad word!")
+    assert not custom.contains("badword")
+    assert not custom.contains("bad words")
+
+
+def test_match_reports_term_and_category():
+    custom = SafetyFilter({"hate": ["씨발"], "spoiler": ["final boss"]})
+    matches = custom.find("씨 발, the final boss")
+    assert {(m.term, m.category) for m in matches} == {("씨발", "hate"), ("final boss", "spoiler")}
+
+
+class _FakeBridge:
+    """워커 응답을 고정한 브리지 (스트리밍은 조각으로 나눠 보냄)."""
+
+    def __init__(self, content: str) -> None:
+        self.content = content
+
+    async def send_request_and_wait(self, task_type, payload, timeout):
+        return {"content": self.content}
+
+    async def stream_request(self, task_type, payload, timeout):
+        for i in range(0, len(self.content), 7):
+            yield {"delta": self.content[i : i + 7]}, False
+        yield {}, True
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        # 금칙어가 60자 절단 위치에 걸침 → 클라이언트가 받는 대사에는 "shi…"만 남음
+        "가" * 56 + " shit",
+        # 60자 절단 뒤에만 금칙어가 있음
+        "모험가님, 북쪽 다리는 폭풍이 지나갈 때까지 닫혀 있으니 "
+        "남쪽 길로 돌아가시는 편이 좋겠어요 정말로 shit",
+        '`"오늘은 상점이 일찍 문을 닫아요."`',
+        "그 병 신경 쓰지 마세요.",
+        "씨 발 진짜",
+    ],
+)
+async def test_stream_and_non_stream_agree(monkeypatch, content):
+    from app.services import gpt as gpt_module
+
+    monkeypatch.setattr(gpt_module, "ai_bridge", _FakeBridge(content))
+    svc = gpt_module.GPTService()
+    svc.cache = None
+    kwargs = dict(dialog_text="안녕", emotion="joy", persona="상인", game_state=None)
+
+    line, safety = await svc.generate_line(**kwargs)
+    events = [event async for event in svc.stream_line(**kwargs)]
+    done = events[-1]
+
+    assert done["type"] == "done"
+    assert done["npc_line"] == line
+    assert done["safety"]["blocked"] == safety["blocked"]
+    assert done["safety"]["fallback"] == safety["fallback"]
+
+
+def test_check_many_matches_check_per_line():
+    lines = [
+        "씨 발",
+        "That was his hit song",
+        "",
+        "shit",  # 앞 줄 끝과 이어지면 안 됨
+        "조 좋아요",
+        "what the fuck",
+        "씨 발",  # 중복 줄
+        "f u c k",
+        "asshole",
+        "hole",
+    ]
+    assert flt.check_many(lines) == [flt.check(line) for line in lines]
+    assert flt.check_many([]) == []
+
+
+def test_check_many_does_not_match_across_lines():
+    custom = SafetyFilter({"custom": ["씨발", "bad word", "ab"]})
+    # 줄 경계를 넘는 "씨|발", "bad|word", "a|b"는 매칭되지 않아야 함
+    results = custom.check_many(["씨", "발", "bad", "word", "a", "b"])
+    assert [r["blocked"] for r in results] == [False] * 6
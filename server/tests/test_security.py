@@ -0,0 +1,184 @@
+import base64
+import json
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.security import (
+    HEADER_NONCE,
+    HEADER_SIGNATURE,
+    HEADER_TIMESTAMP,
+    HMACBodyMiddleware,
+    _hmac_sign,
+    _hmac_sign_digest,
+    verify_hmac_headers,
+)
+
+SECRET = "test-secret"
+
+
+class _Downstream:
+    """하위 앱: 받은 바디 메시지를 기록하고 200으로 응답."""
+
+    def __init__(self) -> None:
+        self.called = False
+        self.messages = []
+        self.scope = None
+
+    async def __call__(self, scope, receive, send):
+        self.called = True
+        self.scope = scope
+        while True:
+            message = await receive()
+            self.messages.append(message)
+            if not message.get("more_body", False):
+                break
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    @property
+    def body(self) -> bytes:
+        return b"".join(m.get("body", b"") for m in self.messages)
+
+
+def _signed_headers(body: bytes, *, ts=None, nonce=None, secret=SECRET):
+    ts = str(int(time.time()) if ts is None else ts)
+    nonce = nonce or uuid.uuid4().hex
+    return {
+        HEADER_TIMESTAMP: ts,
+        HEADER_NONCE: nonce,
+        HEADER_SIGNATURE: _hmac_sign(secret, body, ts, nonce).hex(),
+    }
+
+
+async def _call(headers, chunks, *, path="/v1/dialog/ping", max_body_bytes=1024):
+    downstream = _Downstream()
+    middleware = HMACBodyMiddleware(
+        downstream, secret=SECRET, max_body_bytes=max_body_bytes, protected_prefixes=("/v1/",)
+    )
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+    incoming = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+    received = []
+
+    async def receive():
+        if incoming:
+            received.append(incoming[0])
+            return incoming.pop(0)
+        return {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    status = sent[0]["status"]
+    body = b"".join(m.get("body", b"") for m in sent[1:])
+    return status, body, downstream, received
+
+
+async def test_valid_signature_reaches_route_with_original_bytes():
+    body = json.dumps({"dialog_text": "안녕"}, ensure_ascii=False).encode()
+    status, _, downstream, _ = await _call(_signed_headers(body), [body])
+
+    assert status == 200
+    assert downstream.body == body
+    assert downstream.scope["state"]["security"].method == "hmac"
+
+
+async def test_chunked_body_is_verified_and_replayed_unchanged():
+    body = ("가나다라마바사" * 20).encode()
+    chunks = [body[:7], body[7:100], body[100:101], body[101:]]
+    status, _, downstream, _ = await _call(_signed_headers(body), chunks)
+
+    assert status == 200
+    # 하위 앱은 같은 청크를 같은 순서로 받는다 (이어 붙인 복사본이 아님)
+    assert [m["body"] for m in downstream.messages] == chunks
+    assert downstream.body == body
+
+
+async def test_tampered_body_is_rejected():
+    headers = _signed_headers(b'{"dialog_text": "hi"}')
+    status, body, downstream, _ = await _call(headers, [b'{"dialog_text": "bye"}'])
+
+    assert status == 401
+    assert json.loads(body) == {"detail": "Invalid HMAC signature."}
+    assert not downstream.called
+
+
+async def test_replayed_nonce_is_rejected():
+    body = b"{}"
+    headers = _signed_headers(body)
+    assert (await _call(headers, [body]))[0] == 200
+
+    status, payload, downstream, _ = await _call(headers, [body])
+    assert status == 401
+    assert json.loads(payload) == {"detail": "Replayed X-Nonce."}
+    assert not downstream.called
+
+
+async def test_forged_request_does_not_burn_the_nonce():
+    body = b"{}"
+    headers = _signed_headers(body)
+    forged = {**headers, HEADER_SIGNATURE: "00" * 32}
+    assert (await _call(forged, [body]))[0] == 401
+    # 서명이 틀린 요청은 nonce를 소모하지 않으므로 진짜 요청은 통과
+    assert (await _call(headers, [body]))[0] == 200
+
+
+@pytest.mark.parametrize("skew", [-301, 301])
+async def test_timestamp_outside_skew_is_rejected(skew):
+    body = b"{}"
+    headers = _signed_headers(body, ts=int(time.time()) + skew)
+    status, payload, downstream, _ = await _call(headers, [body])
+
+    assert status == 401
+    assert "timestamp" in json.loads(payload)["detail"]
+    assert not downstream.called
+
+
+async def test_oversized_body_rejected_before_route_runs():
+    body = b"x" * 2000
+    chunks = [body[:500], body[500:1000], body[1000:1500], body[1500:]]
+    status, _, downstream, received = await _call(_signed_headers(body), chunks)
+
+    assert status == 413
+    assert not downstream.called
+    # 상한을 넘는 청크에서 멈추고 나머지는 읽지 않음
+    assert len(received) == 3
+
+
+async def test_oversized_content_length_rejected_without_reading_body():
+    body = b"x" * 2000
+    headers = {**_signed_headers(body), "content-length": str(len(body))}
+    status, _, downstream, received = await _call(headers, [body])
+
+    assert status == 413
+    assert not downstream.called and received == []
+
+
+async def test_unprotected_path_passes_through_unsigned():
+    status, _, downstream, _ = await _call({}, [b"{}"], path="/healthz")
+    assert status == 200 and downstream.body == b"{}"
+
+
+def test_verify_hmac_headers_accepts_base64_signature():
+    body_sha = "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+    ts, nonce = str(int(time.time())), "nonce-1234"
+    sig = base64.b64encode(_hmac_sign_digest(SECRET, body_sha, ts, nonce)).decode()
+    headers = {HEADER_TIMESTAMP: ts, HEADER_NONCE: nonce, HEADER_SIGNATURE: sig}
+    assert verify_hmac_headers(headers, secret=SECRET, body_sha256=body_sha).method == "hmac"
+
+    with pytest.raises(HTTPException) as info:
+        verify_hmac_headers({**headers, HEADER_NONCE: "short"}, secret=SECRET, body_sha256="")
+    assert info.value.status_code == 400
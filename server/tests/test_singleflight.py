@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from app.core.bridge import AIConnectionManager
+from tests.fakes import FakeWorkerSocket
+
+
+async def _bridge(delay: float):
+    bridge = AIConnectionManager(task_limits={})
+    bridge.coalesce_tasks = frozenset({"gpt"})
+    socket = FakeWorkerSocket(bridge, "w1", delay)
+    await bridge.connect(socket, worker_id="w1", capabilities=["gpt"])
+    return bridge, socket
+
+
+async def test_identical_requests_share_one_worker_call():
+    bridge, socket = await _bridge(0.05)
+
+    results = await asyncio.gather(
+        *(bridge.send_request_and_wait("gpt", {"text": "안녕", "n": 1}) for _ in range(5)),
+        bridge.send_request_and_wait("gpt", {"n": 1, "text": "다른 입력"}),
+    )
+
+    assert results == [{"content": "w1"}] * 6
+    assert len(socket.requests) == 2
+    assert bridge.coalesced["gpt"] == 4
+    assert not bridge.flights
+
+
+async def test_one_waiter_leaving_does_not_cancel_the_shared_call():
+    bridge, socket = await _bridge(0.1)
+    first = asyncio.ensure_future(bridge.send_request_and_wait("gpt", {"n": 1}))
+    second = asyncio.ensure_future(bridge.send_request_and_wait("gpt", {"n": 1}))
+    await asyncio.sleep(0.02)
+
+    first.cancel()
+    assert await second == {"content": "w1"}
+    assert first.cancelled()
+    assert socket.cancels == []
+
+
+async def test_all_waiters_timing_out_cancels_the_worker_job():
+    bridge, socket = await _bridge(0.5)
+
+    with pytest.raises(TimeoutError):
+        await asyncio.gather(
+            bridge.send_request_and_wait("gpt", {"n": 1}, timeout=0.05),
+            bridge.send_request_and_wait("gpt", {"n": 1}, timeout=0.05),
+        )
+    await asyncio.sleep(0.05)
+
+    assert len(socket.requests) == 1
+    assert socket.cancels == ["timeout"]
+    assert bridge.timeouts["gpt"] == 1